@@ -0,0 +1,326 @@
+"""
+Cache backends
+
+The chat reply cache, the filter result cache, the LLM extraction cache and
+the chat sessions store their entries through a CacheBackend, chosen with CACHE_BACKEND:
+
+- "memory": a bounded LRU in this worker's memory (the default)
+- "redis": a Redis server (or anything speaking the Redis protocol) at
+  REDIS_URL, shared by every worker and instance and surviving deploys
+
+Values must be JSON-compatible. Each cache has its own key namespace. The
+Redis client is deliberately small (GET/SET/DEL/SCAN over a pool of up to
+REDIS_POOL_SIZE connections) and never fails a request: errors and lookups
+slower than CACHE_TIMEOUT_MS count as misses, and after an error Redis is
+skipped for REDIS_RETRY_SECONDS instead of stalling every request on a dead
+server.
+
+The client blocks on its socket, so code on the event loop goes through
+run_cache_op, which runs the operation in the threadpool when the backend
+does network I/O (and inline for the in-memory backend).
+"""
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import unquote, urlparse
+import orjson
+from starlette.concurrency import run_in_threadpool
+from core.config import settings
+
+# Seconds to skip Redis after a connection error
+REDIS_RETRY_SECONDS = 5.0
+
+# Keys deleted per SCAN page when clearing a namespace
+SCAN_COUNT = 500
+
+# Seconds a Redis namespace's entry count (a full SCAN) is reused
+SIZE_REFRESH_SECONDS = 30.0
+
+
+class CacheBackend:
+    """Key-value store with per-entry TTL for one cache namespace"""
+    # Whether other workers and instances see the same entries
+    shared = False
+
+    def get(self, key: str) -> Optional[Any]:
+        """The value stored for key, or None if absent or expired"""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value, expiring after ttl seconds (the backend default if None)"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        """Remove every entry in this namespace"""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """LRU cache in this worker's memory, with per-entry expiry"""
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Caches are used from the event loop and from LLM worker threads
+        self._lock = threading.Lock()
+        self.stats = {"evictions": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisError(Exception):
+    """Error reply from the Redis server"""
+
+
+class RedisConnection:
+    """One connection to a Redis server, used by one thread at a time"""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+
+    def close(self):
+        for closable in (self.reader, self.sock):
+            try:
+                closable.close()
+            except OSError:
+                pass
+
+    def send(self, args: List) -> Any:
+        """Send one command and read its reply"""
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self.sock.sendall(b"".join(parts))
+        return self.read_reply()
+
+    def read_reply(self) -> Any:
+        line = self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by Redis")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            raise RedisError(payload.decode("utf-8"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Connection closed by Redis")
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self.read_reply() for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply from Redis: {line[:40]!r}")
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache entries in Redis under "<CACHE_PREFIX>:<namespace>:<key>"
+
+    Size is bounded by the server's maxmemory policy, not max_entries.
+    Concurrent commands each take a connection from a pool, so a slow reply
+    only holds up its own caller.
+    """
+    shared = True
+
+    def __init__(self, url: str, namespace: str, ttl: Optional[float] = None, timeout: float = 0.05, pool_size: int = 8):
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported REDIS_URL scheme '{parsed.scheme}' (expected redis://)")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.prefix = f"{settings.CACHE_PREFIX}:{namespace}:"
+        self.ttl = ttl
+        self.timeout = timeout
+        self.pool_size = max(1, pool_size)
+        # Idle connections; more are opened while all are in use, and the
+        # extra ones are closed when they come back to a full pool
+        self._idle: List[RedisConnection] = []
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+        self._size = (0, -SIZE_REFRESH_SECONDS)
+        self.stats = {"errors": 0}
+
+    def _connect(self) -> RedisConnection:
+        connection = RedisConnection(self.host, self.port, self.timeout)
+        try:
+            if self.password:
+                connection.send(["AUTH", self.username, self.password] if self.username else ["AUTH", self.password])
+            if self.db:
+                connection.send(["SELECT", self.db])
+        except Exception:
+            connection.close()
+            raise
+        return connection
+
+    def _command(self, *args) -> Any:
+        """
+        Run a command
+
+        Returns:
+            The reply, or None if Redis is unreachable or failed
+        """
+        if time.monotonic() < self._down_until:
+            return None
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+        try:
+            if connection is None:
+                connection = self._connect()
+            reply = connection.send(list(args))
+        except (OSError, ConnectionError, RedisError, ValueError) as e:
+            # A timed-out reply would arrive as the next command's reply,
+            # so the connection is dropped after any error
+            if connection is not None:
+                connection.close()
+            self.stats["errors"] += 1
+            self._down_until = time.monotonic() + REDIS_RETRY_SECONDS
+            print(f"Warning: Redis cache unavailable ({self.host}:{self.port}): {e}")
+            return None
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(connection)
+                connection = None
+        if connection is not None:
+            connection.close()
+        return reply
+
+    def get(self, key: str) -> Optional[Any]:
+        data = self._command("GET", self.prefix + key)
+        if data is None:
+            return None
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        args = ["SET", self.prefix + key, orjson.dumps(value)]
+        if ttl is not None:
+            args += ["PX", max(1, int(ttl * 1000))]
+        self._command(*args)
+
+    def delete(self, key: str):
+        self._command("DEL", self.prefix + key)
+
+    def _scan(self):
+        cursor = b"0"
+        while True:
+            reply = self._command("SCAN", cursor, "MATCH", self.prefix + "*", "COUNT", SCAN_COUNT)
+            if not reply:
+                return
+            cursor, keys = reply
+            yield keys
+            if cursor == b"0":
+                return
+
+    def clear(self):
+        for keys in self._scan():
+            if keys:
+                self._command("DEL", *keys)
+        self._size = (0, -SIZE_REFRESH_SECONDS)
+
+    def __len__(self) -> int:
+        """Entries in this namespace, counted at most every SIZE_REFRESH_SECONDS"""
+        size, counted_at = self._size
+        if time.monotonic() - counted_at >= SIZE_REFRESH_SECONDS:
+            size = sum(len(keys) for keys in self._scan())
+            self._size = (size, time.monotonic())
+        return size
+
+
+def create_cache(namespace: str, max_entries: int, ttl: Optional[float] = None) -> CacheBackend:
+    """
+    Backend for one cache, per the CACHE_BACKEND setting
+
+    Args:
+        namespace: Key namespace ("replies", "filters", "llm", "sessions")
+        max_entries: Entry limit of the in-memory backend; 0 disables the cache
+                     with either backend
+        ttl: Default entry lifetime in seconds (None = no expiry)
+    """
+    backend = settings.CACHE_BACKEND.lower()
+    if max_entries <= 0 or backend == "memory":
+        return MemoryCache(max_entries, ttl)
+    if backend == "redis":
+        return RedisCache(
+            settings.REDIS_URL, namespace, ttl,
+            timeout=settings.CACHE_TIMEOUT_MS / 1000, pool_size=settings.REDIS_POOL_SIZE,
+        )
+    raise ValueError(f"Unknown CACHE_BACKEND '{settings.CACHE_BACKEND}' (expected 'memory' or 'redis')")
+
+
+def backend_stats(cache: CacheBackend) -> Dict:
+    """Backend name and counters, for /admin/metrics"""
+    return {"backend": "redis" if cache.shared else "memory", **cache.stats}
+
+
+async def run_cache_op(cache: CacheBackend, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Call func (a cache operation, or code using one) from the event loop
+
+    Args:
+        cache: Backend func uses; a shared backend blocks on the network, so
+               func then runs in the threadpool
+        func: Function to call with *args and **kwargs
+
+    Returns:
+        func's result
+    """
+    if cache.shared:
+        return await run_in_threadpool(func, *args, **kwargs)
+    return func(*args, **kwargs)
@@ -10,6 +10,40 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     FRONTEND_URL: str = "http://localhost:3000"
+    ADMIN_API_KEY: Optional[str] = None  # Enables the /admin catalog API when set
+    CATALOG_WATCH_INTERVAL: Optional[float] = None  # Seconds between data file/journal checks (0 = off; unset = 2 with more than one worker, else off)
+    WEB_CONCURRENCY: int = 1  # Worker processes serving the app (gunicorn.conf.py sets it)
+    PROPERTY_BACKEND: str = "json"  # "json" (backend/data files) or "mongo" (properties collection)
+    LLM_BATCH_WINDOW_MS: float = 10  # How long to collect LLM entity extractions into one call (0 = off)
+    LLM_BATCH_MAX_SIZE: int = 8  # Most messages sent in one batched LLM call
+    REPLY_CACHE_SIZE: int = 1000  # Cached Gemini chat replies (0 = off)
+    REPLY_CACHE_TTL: float = 600  # Seconds a cached reply is reused
+    REPLY_CACHE_VARIANTS: int = 3  # Differently worded replies kept per cache key
+    LLM_USAGE_HEADER: bool = False  # Add an X-LLM-Usage debug header to /chat/message responses
+    CHAT_DEADLINE_MS: float = 800  # Latency budget for the LLM stages of a chat request (0 = no deadline)
+    CHAT_STAGE_WORKERS: int = 32  # Threads running deadline-bound LLM stages
+    CHAT_SESSIONS_MAX: int = 10000  # Chat sessions whose learned preferences are kept (0 = off)
+    CHAT_SESSION_TTL: float = 1800  # Seconds of inactivity before a chat session is forgotten
+    PROPERTIES_MAX_AGE: int = 0  # Seconds clients may reuse a property listing before revalidating its ETag
+    FILTER_CACHE_SIZE: int = 1024  # Cached filter_properties result lists (0 = off)
+    CACHE_BACKEND: str = "memory"  # "memory" (per worker) or "redis" (shared via REDIS_URL) for reply, filter and LLM caches
+    REDIS_URL: str = "redis://localhost:6379/0"  # Redis (or Redis-protocol) server for CACHE_BACKEND=redis
+    CACHE_PREFIX: str = "agent_mira"  # Prefix of cache keys in Redis
+    CACHE_TIMEOUT_MS: float = 50  # Redis cache round-trip timeout; failed lookups count as misses
+    REDIS_POOL_SIZE: int = 8  # Idle Redis connections kept per cache
+    LLM_CACHE_SIZE: int = 5000  # Cached LLM extraction results (0 = off)
+    LLM_CACHE_TTL: float = 86400  # Seconds a cached LLM extraction is reused
+    COMPRESSION_MIN_SIZE: int = 1024  # Property and chat responses of at least this many bytes are compressed (0 = off)
+    CHAT_RATE_PER_MINUTE: float = 20  # Chat messages per client per minute (0 = unlimited)
+    CHAT_RATE_BURST: int = 5  # Chat messages a client may send at once
+    AUTH_RATE_PER_MINUTE: float = 10  # Login/register attempts per client per minute (0 = unlimited)
+    AUTH_RATE_BURST: int = 5  # Login/register attempts a client may make at once
+    SEARCH_RATE_PER_MINUTE: float = 300  # Property searches per client per minute (0 = unlimited)
+    SEARCH_RATE_BURST: int = 60  # Property searches a client may make at once
+    TRUSTED_PROXIES: str = "127.0.0.1,::1,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16"  # Proxies (addresses or networks, "*" = any) whose X-Forwarded-For gives the client IP
+    RATE_LIMIT_CLIENTS: int = 100000  # Clients tracked per rate limit budget (least recently seen are forgotten)
+    MAX_LLM_IN_FLIGHT: int = 64  # Reject chat with 503 while this many Gemini calls are running (0 = off)
+    MAX_QUEUED_JOBS: int = 64  # Reject chat with 503 while this many LLM stages/threadpool jobs wait for a thread (0 = off)
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,114 @@
+"""
+Currency rates for comparing prices across currencies
+
+Budgets and budget buckets are in INR, so every price is converted to INR
+before it is compared. Rates (INR per unit of each currency) are read from
+data/currency_rates.json. refresh_rates() re-reads the file when it changes;
+the catalog watcher calls it (see services/catalog_store.sync_rates), so
+rates can be updated without a restart. Converted prices are only
+recomputed when the rates actually change.
+"""
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+RATES_PATH = Path(__file__).resolve().parents[1] / "data" / "currency_rates.json"
+BASE_CURRENCY = "INR"
+
+# Used when the rates file is missing or unreadable
+DEFAULT_RATES = {"INR": 1.0, "USD": 83.0}
+
+CURRENCY_SYMBOLS = {"INR": "₹", "USD": "$", "EUR": "€", "GBP": "£"}
+
+# Words naming a currency in budget text ("50k dollars", "2 crore rupees")
+CURRENCY_WORDS = {
+    "rs": "INR", "rupee": "INR", "rupees": "INR", "lakh": "INR", "lakhs": "INR", "crore": "INR", "crores": "INR",
+    "dollar": "USD", "dollars": "USD", "euro": "EUR", "euros": "EUR", "pound": "GBP", "pounds": "GBP",
+}
+
+_CURRENCY_PATTERN = re.compile(
+    "|".join(re.escape(symbol) for symbol in CURRENCY_SYMBOLS.values())
+    + r"|\b(?:" + "|".join(CURRENCY_WORDS) + r"|[a-z]{3})\b"
+)
+
+_rates: Optional[Dict[str, float]] = None
+_rates_mtime: Optional[float] = None
+_lock = threading.Lock()
+
+
+def _mtime() -> float:
+    return RATES_PATH.stat().st_mtime if RATES_PATH.exists() else 0.0
+
+
+def _read_rates() -> Dict[str, float]:
+    try:
+        with open(RATES_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        rates = {code.upper(): float(rate) for code, rate in data["rates"].items() if float(rate) > 0}
+        if data.get("base", BASE_CURRENCY).upper() != BASE_CURRENCY:
+            raise ValueError(f"rates must be in {BASE_CURRENCY}")
+        rates[BASE_CURRENCY] = 1.0
+        return rates
+    except FileNotFoundError:
+        print(f"Warning: {RATES_PATH.name} not found, using default currency rates")
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        print(f"Warning: Invalid {RATES_PATH.name}, using default currency rates: {e}")
+    return dict(DEFAULT_RATES)
+
+
+def get_rates() -> Dict[str, float]:
+    """INR per unit of each currency, loading the rates file on first use"""
+    if _rates is None:
+        refresh_rates()
+    return _rates
+
+
+def refresh_rates() -> bool:
+    """
+    Re-read the rates file if it changed since it was last read
+
+    Returns:
+        True if the rates changed
+    """
+    global _rates, _rates_mtime
+    with _lock:
+        mtime = _mtime()
+        if _rates is not None and mtime == _rates_mtime:
+            return False
+        rates = _read_rates()
+        changed = rates != _rates
+        _rates, _rates_mtime = rates, mtime
+        if changed:
+            print(f"💱 Currency rates loaded ({', '.join(f'{c}={r:g}' for c, r in sorted(rates.items()))})")
+        return changed
+
+
+def to_inr(amount: float, currency: Optional[str]) -> float:
+    """Convert an amount to INR (unknown currencies are treated as INR)"""
+    return amount * get_rates().get((currency or BASE_CURRENCY).upper(), 1.0)
+
+
+def detect_currency(text: str) -> Optional[str]:
+    """
+    Currency named in a piece of text ("$500k", "2 crore", "300000 EUR")
+
+    Returns:
+        The currency code, or None if the text doesn't name a known currency
+    """
+    for match in _CURRENCY_PATTERN.finditer(text.lower()):
+        token = match.group(0)
+        for code, symbol in CURRENCY_SYMBOLS.items():
+            if token == symbol:
+                return code
+        code = CURRENCY_WORDS.get(token) or token.upper()
+        if code in get_rates():
+            return code
+    return None
+
+
+def currency_symbol(currency: Optional[str]) -> str:
+    """Display prefix for prices in a currency ("₹", "$", "AED ")"""
+    currency = (currency or BASE_CURRENCY).upper()
+    return CURRENCY_SYMBOLS.get(currency, f"{currency} ")
@@ -0,0 +1,181 @@
+"""
+Token, latency and cost accounting for Gemini calls
+
+Every Gemini call goes through record_call (see PromptTemplate.generate in
+nlp/prompts.py), which reads token counts from the response's usage
+metadata and records them:
+
+- per call site (template name), in process-wide totals
+- per request, in a RequestUsage held in a context variable. The usage
+  middleware in main.py starts one per request and folds it into
+  per-endpoint totals when the request ends. /chat/message can report it
+  in an X-LLM-Usage header (LLM_USAGE_HEADER).
+
+Threadpool calls (run_in_threadpool) inherit the request's context. Work
+handed to other threads, like batched extraction, captures the
+RequestUsage explicitly (see current_usage).
+"""
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# USD per million tokens (input, output); unknown models are costed at 0
+MODEL_PRICING = {
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-pro": (0.50, 1.50),
+}
+
+
+def _model_key(model_name: str) -> str:
+    return (model_name or "").rsplit("/", 1)[-1]
+
+
+def call_cost(model_name: str, prompt_tokens: int, response_tokens: int) -> float:
+    """Cost of one call in USD"""
+    input_price, output_price = MODEL_PRICING.get(_model_key(model_name), (0.0, 0.0))
+    return (prompt_tokens * input_price + response_tokens * output_price) / 1_000_000
+
+
+def _new_totals() -> Dict[str, float]:
+    return {
+        "calls": 0, "errors": 0, "prompt_tokens": 0, "response_tokens": 0,
+        "latency_ms": 0.0, "cost_usd": 0.0,
+    }
+
+
+def _add(totals: Dict[str, float], other: Dict[str, float]):
+    for key, value in other.items():
+        totals[key] = totals.get(key, 0) + value
+
+
+class RequestUsage:
+    """LLM usage of one request (mutable, shared with the request's threads)"""
+
+    def __init__(self):
+        self.totals = _new_totals()
+        self.by_call_site: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, call_site: str, call: Dict[str, float]):
+        with self._lock:
+            _add(self.totals, call)
+            _add(self.by_call_site.setdefault(call_site, _new_totals()), call)
+
+    def merge(self, other: "RequestUsage", share: float = 1.0):
+        """
+        Add another usage record, with its tokens and cost scaled by share
+        (e.g. 1/n for one of n requests served by a batched call)
+        """
+        for call_site, totals in other.by_call_site.items():
+            self.add(call_site, {
+                key: value * share if key in ("prompt_tokens", "response_tokens", "cost_usd") else value
+                for key, value in totals.items()
+            })
+
+    def header_value(self) -> str:
+        """Compact summary for the X-LLM-Usage header"""
+        totals = self.totals
+        sites = ",".join(f"{site}:{int(t['calls'])}" for site, t in self.by_call_site.items())
+        return (
+            f"calls={int(totals['calls'])}; errors={int(totals['errors'])}; "
+            f"prompt_tokens={int(totals['prompt_tokens'])}; response_tokens={int(totals['response_tokens'])}; "
+            f"latency_ms={totals['latency_ms']:.0f}; cost_usd={totals['cost_usd']:.6f}"
+            + (f"; sites={sites}" if sites else "")
+        )
+
+
+_current_usage: contextvars.ContextVar[Optional[RequestUsage]] = contextvars.ContextVar("llm_usage", default=None)
+
+# Process-wide totals
+_lock = threading.Lock()
+_by_call_site: Dict[str, Dict[str, float]] = {}
+_by_endpoint: Dict[str, Dict[str, float]] = {}
+_in_flight = 0
+
+# Endpoint key of requests that matched no route (404s), so arbitrary URLs
+# don't each get their own totals
+UNMATCHED_ENDPOINT = "<unmatched>"
+
+
+def start_request() -> RequestUsage:
+    """Begin accounting for a request in the current context"""
+    usage = RequestUsage()
+    _current_usage.set(usage)
+    return usage
+
+
+def current_usage() -> Optional[RequestUsage]:
+    """The current request's usage (None outside a request)"""
+    return _current_usage.get()
+
+
+def use_request(usage: Optional[RequestUsage]):
+    """Attribute calls in this thread to a request captured elsewhere"""
+    _current_usage.set(usage)
+
+
+def finish_request(endpoint: str, usage: RequestUsage):
+    """Fold a finished request into the per-endpoint totals"""
+    with _lock:
+        totals = _by_endpoint.setdefault(endpoint, {"requests": 0, **_new_totals()})
+        totals["requests"] += 1
+        _add(totals, usage.totals)
+
+
+def _usage_metadata(response) -> Dict[str, int]:
+    metadata = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(metadata, "prompt_token_count", 0) or 0
+    response_tokens = getattr(metadata, "candidates_token_count", 0) or 0
+    return {"prompt_tokens": int(prompt_tokens), "response_tokens": int(response_tokens)}
+
+
+def record_call(call_site: str, model_name: str, func: Callable[[], Any]) -> Any:
+    """
+    Run a Gemini call and record its usage
+
+    Args:
+        call_site: Name of the calling prompt/template
+        model_name: Model being called
+        func: Performs the generate_content call
+
+    Returns:
+        func()'s result (exceptions are recorded and re-raised)
+    """
+    global _in_flight
+    started = time.perf_counter()
+    call = _new_totals()
+    call["calls"] = 1
+    with _lock:
+        _in_flight += 1
+    try:
+        response = func()
+        call.update(_usage_metadata(response))
+        return response
+    except Exception:
+        call["errors"] = 1
+        raise
+    finally:
+        call["latency_ms"] = (time.perf_counter() - started) * 1000
+        call["cost_usd"] = call_cost(model_name, call["prompt_tokens"], call["response_tokens"])
+        site = f"{call_site}@{_model_key(model_name)}"
+        with _lock:
+            _in_flight -= 1
+            _add(_by_call_site.setdefault(site, _new_totals()), call)
+        usage = current_usage()
+        if usage is not None:
+            usage.add(call_site, call)
+
+
+def in_flight_calls() -> int:
+    """Gemini calls currently running in this process (admission control reads it)"""
+    return _in_flight
+
+
+def get_usage_stats() -> Dict[str, Dict]:
+    """Process-wide LLM usage by call site and by endpoint"""
+    with _lock:
+        return {
+            "by_call_site": {site: dict(totals) for site, totals in _by_call_site.items()},
+            "by_endpoint": {endpoint: dict(totals) for endpoint, totals in _by_endpoint.items()},
+        }
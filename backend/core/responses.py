@@ -0,0 +1,153 @@
+"""
+Fast JSON responses with compression
+
+Routes returning large, already-plain payloads (property listings, chat
+results) build their responses with json_response() instead of returning a
+dict: FastAPI would otherwise walk the whole payload with jsonable_encoder
+and encode it with the stdlib json module. json_response() encodes with
+orjson and compresses bodies of COMPRESSION_MIN_SIZE bytes or more with
+brotli (when the brotli package is installed) or gzip, whichever the client
+accepts.
+
+EncodedBody holds a payload's encoded bytes and its compressed variants, so
+a payload that rarely changes (the full listing) is encoded and compressed
+once per version instead of on every request. Bodies of
+THREADED_COMPRESSION_SIZE bytes or more are compressed in the threadpool so
+a large listing doesn't stall the event loop.
+
+Each encoding of a response is a different representation, so a strong
+ETag gets the encoding appended ("abc" -> "abc-gzip", see encoded_etag);
+caches holding the gzip body never treat it as the identity one.
+"""
+import gzip
+from typing import Any, Dict, Optional
+import orjson
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+from core.config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Bodies at least this large are compressed in the threadpool, not on the event loop
+THREADED_COMPRESSION_SIZE = 64 * 1024
+
+# Content encodings json_response may use, best first
+CONTENT_ENCODINGS = ("br", "gzip")
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    """Types orjson doesn't handle natively"""
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def encode_json(content: Any) -> bytes:
+    """Serialize a payload to JSON bytes with orjson"""
+    return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Best content encoding the client accepts ("br", "gzip" or None)
+
+    The coding with the highest q-value wins (br on a tie). A coding listed
+    with q=0 is never chosen, even when "*" is acceptable.
+
+    Args:
+        accept_encoding: The Accept-Encoding header, e.g. "gzip, deflate, br;q=0.9"
+    """
+    qualities: Dict[str, float] = {}
+    for item in (accept_encoding or "").lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            param = param.strip()
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if name.strip():
+            qualities[name.strip()] = quality
+    # A coding's own q-value wins over "*"; q=0 means "not acceptable"
+    best, best_quality = None, 0.0
+    for encoding in CONTENT_ENCODINGS:
+        if encoding == "br" and brotli is None:
+            continue
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag of a representation in a content encoding ('"abc"' -> '"abc-gzip"')"""
+    if not encoding or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class EncodedBody:
+    """A payload's JSON bytes plus compressed variants, made on first use"""
+
+    def __init__(self, content: Any):
+        self.body = encode_json(content)
+        self._compressed: Dict[str, bytes] = {}
+
+    async def variant(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        if encoding not in self._compressed:
+            if len(self.body) >= THREADED_COMPRESSION_SIZE:
+                self._compressed[encoding] = await run_in_threadpool(compress, self.body, encoding)
+            else:
+                self._compressed[encoding] = compress(self.body, encoding)
+        return self._compressed[encoding]
+
+    async def response(self, request: Request, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+        """Response with the variant the request accepts (and that variant's ETag)"""
+        headers = dict(headers or {})
+        encoding = None
+        if 0 < settings.COMPRESSION_MIN_SIZE <= len(self.body):
+            encoding = choose_encoding(request.headers.get("accept-encoding"))
+            headers["Vary"] = "Accept-Encoding"
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            if "ETag" in headers:
+                headers["ETag"] = encoded_etag(headers["ETag"], encoding)
+        return Response(
+            content=await self.variant(encoding),
+            status_code=status_code,
+            headers=headers,
+            media_type="application/json",
+        )
+
+
+async def json_response(content: Any, request: Request, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Encode a plain payload with orjson, compressed if it's large enough
+
+    Args:
+        content: JSON-compatible payload (dicts, lists, str, numbers, None)
+        request: The request, for its Accept-Encoding
+        status_code: Response status
+        headers: Extra response headers
+    """
+    return await EncodedBody(content).response(request, status_code, headers)
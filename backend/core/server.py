@@ -0,0 +1,26 @@
+"""
+Production server worker for gunicorn
+"""
+from uvicorn_worker import UvicornWorker
+from core.config import settings
+
+
+class ProductionUvicornWorker(UvicornWorker):
+    """
+    Uvicorn worker pinned to the uvloop event loop and httptools parser.
+
+    The stock worker uses "auto", which silently drops to asyncio/h11 when the
+    compiled extensions are missing - we'd rather fail loudly at boot.
+    Keep-alive comes from gunicorn's own `keepalive` setting.
+
+    Behind a load balancer every connection comes from the proxy, so the
+    client address (what rate limits key on) is taken from X-Forwarded-For
+    when the peer is in TRUSTED_PROXIES. That replaces gunicorn's
+    `forwarded_allow_ips`, which only takes single addresses, not networks.
+    """
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings.TRUSTED_PROXIES,
+    }
@@ -0,0 +1,46 @@
+"""
+Gunicorn configuration for multi-worker production deployments
+
+All values can be overridden through environment variables:
+    PORT               - port to bind (default 8000)
+    WEB_CONCURRENCY    - number of worker processes (default: CPU count)
+    KEEP_ALIVE         - seconds to hold idle keep-alive connections (default 5)
+    WORKER_TIMEOUT     - seconds before a silent worker is restarted (default 60)
+    MAX_REQUESTS       - recycle a worker after this many requests (0 = never)
+    TRUSTED_PROXIES    - proxies whose X-Forwarded-For names the client
+                         (default: loopback and private networks, see core/config.py)
+"""
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+# Tell the app the resolved count (the catalog watcher defaults on with >1 worker)
+os.environ["WEB_CONCURRENCY"] = str(workers)
+# The worker reads client IPs from X-Forwarded-For of TRUSTED_PROXIES
+# (gunicorn's forwarded_allow_ips can't hold networks, so it isn't used)
+worker_class = "core.server.ProductionUvicornWorker"
+
+# Import the app (and with it the property catalog + NLP indexes) in the
+# master before forking, so every worker shares that memory copy-on-write
+preload_app = True
+
+keepalive = int(os.getenv("KEEP_ALIVE", "5"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = 30
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+
+
+def when_ready(server):
+    """Called in the master after the app is preloaded, before workers fork"""
+    # Move everything loaded so far into the permanent generation. Otherwise
+    # the first GC pass in each worker touches every object header and
+    # defeats copy-on-write sharing of the preloaded catalog.
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Preloaded app, forking {workers} workers")
@@ -1,12 +1,52 @@
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
-from routes import chat_routes, property_routes, user_routes, auth_routes
+from routes import chat_routes, property_routes, user_routes, auth_routes, admin_routes
 from fastapi.middleware.cors import CORSMiddleware
 from core.db import test_connection
+from core.config import settings
+from core.llm_usage import start_request, finish_request, UNMATCHED_ENDPOINT
+from services.rate_limit import check_request
+from services.data_service import preload_catalog
+from services.catalog_store import add_listener, start_watcher, MULTI_WORKER_WATCH_INTERVAL
+from services.property_repository import get_property_repository, MongoPropertyRepository
+from nlp import preload_indexes, update_cities, load_intent_model
 
 app = FastAPI(title="Agent Mira Backend")
 
+def preload_data():
+    """
+    Load the property catalog, NLP indexes and the intent model before any
+    traffic is accepted.
+
+    Runs at import time: under gunicorn with preload_app the master imports
+    this module once and forks workers afterwards, so the loaded data is
+    shared copy-on-write instead of being duplicated per worker.
+    """
+    property_count = preload_catalog()
+    city_count = preload_indexes()
+    load_intent_model()
+    print(f"📚 Preloaded {property_count} properties and {city_count} cities")
+
+    # Keep the NLP city list in step with catalog updates
+    add_listener(lambda snapshot: update_cities(p.get("location", "") for p in snapshot.records))
+
+preload_data()
+
+@app.middleware("http")
+async def rate_limit_middleware(request: Request, call_next):
+    """
+    Reject requests over their client's rate limit (429) or arriving while
+    the server is overloaded (503) before any work is done for them
+
+    Registered before CORS so CORS wraps it and rejections stay readable
+    by the browser.
+    """
+    rejection = check_request(request)
+    if rejection is not None:
+        return rejection
+    return await call_next(request)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -21,14 +61,46 @@ app.include_router(auth_routes.router, prefix="/auth", tags=["Auth"])
 app.include_router(chat_routes.router, prefix="/chat", tags=["Chat"])
 app.include_router(property_routes.router, prefix="/properties", tags=["Properties"])
 app.include_router(user_routes.router, prefix="/user", tags=["User"])
+app.include_router(admin_routes.router, prefix="/admin", tags=["Admin"])
+
+@app.middleware("http")
+async def llm_usage_middleware(request: Request, call_next):
+    """Account Gemini usage per request and fold it into per-endpoint totals"""
+    usage = start_request()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    finish_request(getattr(route, "path", UNMATCHED_ENDPOINT), usage)
+    return response
+
+def catalog_watch_interval() -> float:
+    """
+    Seconds between catalog watcher checks
+
+    With more than one worker the watcher is how admin changes made in one
+    worker reach the others, so it runs by default then.
+    """
+    interval = settings.CATALOG_WATCH_INTERVAL
+    if interval is None:
+        return MULTI_WORKER_WATCH_INTERVAL if settings.WEB_CONCURRENCY > 1 else 0
+    if interval <= 0 and settings.WEB_CONCURRENCY > 1:
+        print(f"⚠️  Warning: Catalog watcher is off with {settings.WEB_CONCURRENCY} workers; "
+              "admin changes will only reach the worker that served them")
+    return interval
 
 @app.on_event("startup")
 async def startup_event():
-    """Test database connection on startup"""
+    """Start the catalog watcher and test database connection on startup"""
+    # Started per worker (threads don't survive fork)
+    start_watcher(catalog_watch_interval())
+
     result = await test_connection()
     if result["status"] == "success":
         print(f"✅ {result['message']}")
         print(f"📦 Database: {result['database']}")
+        repository = get_property_repository()
+        if isinstance(repository, MongoPropertyRepository):
+            await repository.ensure_indexes()
+            print("🏠 Serving properties from MongoDB")
     else:
         print(f"⚠️  {result['message']}")
         print(f"💡 Hint: {result.get('hint', '')}")
@@ -4,9 +4,15 @@ from nlp.hybrid_extractor import (
     extract_with_hybrid,
     extract_filters,
     get_search_summary,
-    should_use_llm_for_query
+    should_use_llm_for_query,
+    get_llm_routing_reasons
 )
 
+from nlp.intent_classifier import classify_intent_with_rules
+from nlp.intent_model import classify_intent_locally, load_intent_model
+
+from nlp.extractor import preload_indexes, update_cities
+
 from nlp.llm_extractor import (
     classify_intent_with_llm,
     extract_preferences_with_llm,
@@ -18,6 +24,12 @@ __all__ = [
     "extract_filters",
     "get_search_summary",
     "should_use_llm_for_query",
+    "get_llm_routing_reasons",
+    "classify_intent_with_rules",
+    "classify_intent_locally",
+    "load_intent_model",
+    "preload_indexes",
+    "update_cities",
     "classify_intent_with_llm",
     "extract_preferences_with_llm",
     "is_llm_available"
@@ -0,0 +1,168 @@
+"""
+Budget parsing and bucketing
+
+Budgets arrive as bucket labels ("50L-1Cr"), ranges ("20-80 lakh",
+"$200k-$500k"), bounds ("under 50L", "above 2 crore", "3Cr+") or single
+amounts ("1.5 crore"). parse_budget turns any of them into an INR
+(min, max) range; single amounts snap to the BUDGET_RANGES bucket that
+contains them. Ranges are half-open: min <= price < max. Amounts are in
+INR unless the text names another currency ("$500k", "300000 EUR"), in
+which case they are converted at the current rate (see core/currency.py).
+
+Reading the amounts is memoized - the same few budget strings make up
+almost all traffic - while the currency is detected per call, since the
+known currencies follow the rates file. budget_bucket maps a price to its
+bucket so properties can be bucketed once when the catalog loads.
+"""
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Optional, Tuple
+from core.currency import BASE_CURRENCY, currency_symbol, detect_currency, to_inr
+from nlp import config
+
+# Distinct budget strings whose parse is remembered
+PARSE_CACHE_SIZE = 4096
+
+# Bucket lower bounds, for bisecting prices into buckets
+_BUCKET_STARTS = [low for low, _, _ in config.BUDGET_RANGES]
+_BUCKET_LABELS = {label.lower(): (low, high) for low, high, label in config.BUDGET_RANGES}
+
+# Longest unit first so "lakh" isn't read as "l" followed by "akh"
+_UNITS = sorted(config.CURRENCY_MULTIPLIERS, key=len, reverse=True)
+
+# An amount with an optional unit ("50", "1.5cr", "20 lakhs"). The unit must
+# end the word, so "3 bedroom" is 3 and not 3 billion.
+_AMOUNT = re.compile(
+    r"(\d+(?:\.\d+)?)\s*(" + "|".join(re.escape(u) for u in _UNITS) + r")?s?(?![a-z])"
+)
+
+
+def _phrases(words) -> "re.Pattern":
+    return re.compile("|".join(
+        re.escape(w) if not w[0].isalpha() else rf"\b{re.escape(w)}\b" for w in words
+    ))
+
+
+_MAX_WORDS = _phrases(config.BUDGET_MAX_WORDS)
+_MIN_WORDS = _phrases(config.BUDGET_MIN_WORDS)
+
+
+def budget_bucket(price_inr: float) -> int:
+    """Index of the BUDGET_RANGES bucket containing a price"""
+    return max(bisect_right(_BUCKET_STARTS, price_inr) - 1, 0)
+
+
+def bucket_for_range(budget_range: Tuple[float, float]) -> Optional[int]:
+    """Index of the bucket exactly matching a (min, max) range, or None"""
+    for index, (low, high, _) in enumerate(config.BUDGET_RANGES):
+        if (low, high) == tuple(budget_range):
+            return index
+    return None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _read_amounts(budget: str) -> Tuple[float, float, bool, bool]:
+    """
+    Read a budget's amounts, without its currency
+
+    The currency is detected on every call instead (see _read_budget): which
+    currency codes count depends on the rates file, which can change while
+    this cache lives.
+
+    Returns:
+        (min, max, priced, snap) - priced is False when the amounts are INR
+        whatever the text says (bucket labels, no amount); snap is True for a
+        single amount that should snap to its bucket once converted to INR
+    """
+    text = budget.lower().replace(',', '')
+    compact = re.sub(r"[\s$₹]", "", text)
+    if compact in _BUCKET_LABELS:
+        return (*_BUCKET_LABELS[compact], False, False)
+
+    amounts = [(float(m.group(1)), m.group(2)) for m in _AMOUNT.finditer(text)]
+    if not amounts:
+        return (0, float('inf'), False, False)
+
+    if len(amounts) >= 2:
+        # "20-80 lakh": a bare first amount takes the second one's unit
+        (low, low_unit), (high, high_unit) = amounts[:2]
+        low *= config.CURRENCY_MULTIPLIERS.get(low_unit or high_unit, 1)
+        high *= config.CURRENCY_MULTIPLIERS.get(high_unit, 1)
+        return (min(low, high), max(low, high), True, False)
+
+    value, unit = amounts[0]
+    value *= config.CURRENCY_MULTIPLIERS.get(unit, 1)
+    if _MAX_WORDS.search(text):
+        return (0, value, True, False)
+    if _MIN_WORDS.search(text):
+        return (value, float('inf'), True, False)
+    return (value, value, True, True)
+
+
+def _read_budget(budget: str) -> Tuple[float, float, str, bool]:
+    """
+    Read a budget's amounts and currency without converting them
+
+    Returns:
+        (min, max, currency, snap) - snap is True for a single amount that
+        should snap to its bucket once converted to INR
+    """
+    low, high, priced, snap = _read_amounts(budget)
+    currency = (detect_currency(budget.lower()) or BASE_CURRENCY) if priced else BASE_CURRENCY
+    return (low, high, currency, snap)
+
+
+def parse_budget(budget: Optional[str]) -> Tuple[float, float]:
+    """
+    Parse a budget string into an INR range
+
+    Args:
+        budget: Budget text, e.g. "50L-1Cr", "under 30 lakh", "2 crore", "$500k"
+
+    Returns:
+        (min, max) in INR; (0, inf) when no amount can be read
+    """
+    if not budget:
+        return (0, float('inf'))
+    low, high, currency, snap = _read_budget(budget)
+    low, high = to_inr(low, currency), to_inr(high, currency)
+    if snap:
+        low, high, _ = config.BUDGET_RANGES[budget_bucket(low)]
+    return (low, high)
+
+
+def format_amount(value: float, currency: str = BASE_CURRENCY) -> str:
+    """Short amount ("50L", "1.5Cr" in INR, "300k", "1.2M" otherwise)"""
+    units = (("Cr", 10000000), ("L", 100000), ("k", 1000)) if currency == BASE_CURRENCY else (("M", 1000000), ("k", 1000))
+    for unit, multiplier in units:
+        if value >= multiplier:
+            return f"{value / multiplier:g}{unit}"
+    return f"{value:g}"
+
+
+def normalize_budget(budget: Optional[str]) -> Optional[str]:
+    """
+    Canonical form of a budget string
+
+    Bucket ranges get their BUDGET_RANGES label, other ranges a compact
+    label that parse_budget reads back: "20L-80L", "0-30L", "3Cr+" in INR,
+    "$0-$300k" for ranges given in another currency (converted when used,
+    at the rate of the day).
+
+    Returns:
+        The label, or None if the text has no amount
+    """
+    if not budget or not _AMOUNT.search(budget.lower().replace(',', '')):
+        return None
+    low, high, currency, snap = _read_budget(budget)
+    if currency == BASE_CURRENCY or snap:
+        low, high = parse_budget(budget)
+        currency = BASE_CURRENCY
+        bucket = bucket_for_range((low, high))
+        if bucket is not None:
+            return config.BUDGET_RANGES[bucket][2]
+    symbol = currency_symbol(currency) if currency != BASE_CURRENCY else ""
+    if high == float('inf'):
+        return f"{symbol}{format_amount(low, currency)}+"
+    return f"{symbol}{format_amount(low, currency)}-{symbol}{format_amount(high, currency)}"
@@ -7,19 +7,25 @@ Customize entity extraction patterns and thresholds
 # Higher = stricter matching, Lower = more lenient
 FUZZY_MATCH_THRESHOLD = 0.75
 
-# Budget ranges configuration (in base currency)
+# Budget buckets (min and max in INR, label), lowest first. Budget filters
+# and extracted single amounts snap to these; see nlp/budget.py
 # Adjust these ranges based on your market
 BUDGET_RANGES = [
-    (0, 50000, "0-50k"),
-    (50000, 100000, "50k-100k"),
-    (100000, 200000, "100k-200k"),
-    (200000, 300000, "200k-300k"),
-    (300000, 500000, "300k-500k"),
-    (500000, 750000, "500k-750k"),
-    (750000, 1000000, "750k-1m"),
-    (1000000, float('inf'), "1m+")
+    (0, 5000000, "0-50L"),
+    (5000000, 10000000, "50L-1Cr"),
+    (10000000, 20000000, "1Cr-2Cr"),
+    (20000000, float('inf'), "2Cr+"),
 ]
 
+# Words marking an amount as the top of a budget ("under 50L")
+BUDGET_MAX_WORDS = ["under", "below", "less than", "upto", "up to", "max", "maximum", "within"]
+
+# Words marking an amount as the bottom of a budget ("above 2Cr", "2Cr+")
+BUDGET_MIN_WORDS = ["above", "over", "more than", "at least", "atleast", "min", "minimum", "+"]
+
+# Extracted budgets topping out below this are not prices ("2-3 bhk")
+MIN_BUDGET_AMOUNT = 10000
+
 # Currency multipliers
 CURRENCY_MULTIPLIERS = {
     'k': 1000,
@@ -63,3 +69,113 @@ FALLBACK_CITIES = [
     "chicago", "dallas", "seattle", "boston", "mumbai", "delhi",
     "bangalore", "pune", "hyderabad", "chennai"
 ]
+
+# Alternative place names, mapped to the name used in property locations
+# (see nlp/locations.py)
+LOCATION_ALIASES = {
+    "bengaluru": "bangalore",
+    "bombay": "mumbai",
+    "new delhi": "delhi",
+    "gurugram": "gurgaon",
+    "madras": "chennai",
+    "poona": "pune",
+    "nyc": "new york",
+    "new york city": "new york",
+    "manhattan": "new york",
+    "sf": "san francisco",
+    "san fran": "san francisco",
+    "l.a.": "los angeles",
+    "philly": "philadelphia",
+}
+
+# State names, mapped to the abbreviation used in property locations
+STATE_ABBREVIATIONS = {
+    "alabama": "al", "alaska": "ak", "arizona": "az", "arkansas": "ar", "california": "ca",
+    "colorado": "co", "connecticut": "ct", "delaware": "de", "florida": "fl", "georgia": "ga",
+    "hawaii": "hi", "idaho": "id", "illinois": "il", "indiana": "in", "iowa": "ia",
+    "kansas": "ks", "kentucky": "ky", "louisiana": "la", "maine": "me", "maryland": "md",
+    "massachusetts": "ma", "michigan": "mi", "minnesota": "mn", "mississippi": "ms", "missouri": "mo",
+    "montana": "mt", "nebraska": "ne", "nevada": "nv", "new hampshire": "nh", "new jersey": "nj",
+    "new mexico": "nm", "new york state": "ny", "north carolina": "nc", "north dakota": "nd", "ohio": "oh",
+    "oklahoma": "ok", "oregon": "or", "pennsylvania": "pa", "rhode island": "ri", "south carolina": "sc",
+    "south dakota": "sd", "tennessee": "tn", "texas": "tx", "utah": "ut", "vermont": "vt",
+    "virginia": "va", "washington state": "wa", "west virginia": "wv", "wisconsin": "wi", "wyoming": "wy",
+}
+
+# States of cities whose locations don't name one ("Mumbai")
+CITY_STATES = {
+    "mumbai": "maharashtra",
+    "pune": "maharashtra",
+    "delhi": "delhi",
+    "gurgaon": "haryana",
+    "noida": "uttar pradesh",
+    "bangalore": "karnataka",
+    "hyderabad": "telangana",
+    "chennai": "tamil nadu",
+}
+
+# Rule-based intent patterns (regexes matched against the lowercased message).
+# Each hit adds the weight to the intent's score; see nlp/intent_classifier.py
+INTENT_PATTERNS = {
+    "greeting": [
+        (r"^\s*(hi|hello|hey|hiya|namaste|good (morning|afternoon|evening))\b", 0.9),
+        (r"\b(my name is|i am new here|nice to meet you)\b", 0.5),
+    ],
+    "save_property": [
+        (r"\b(save|bookmark|shortlist|favou?rite)\b.*\b(property|home|house|flat|apartment|listing|this|it|one)\b", 0.9),
+        (r"\badd\b.*\bto (my )?(saved|favou?rites|shortlist)\b", 0.9),
+    ],
+    "view_saved": [
+        (r"\b(show|see|view|list|open)\b.*\b(saved|bookmarked|shortlisted|favou?rite)", 0.95),
+        (r"\bmy (saved|favou?rites|shortlist|bookmarks)\b", 0.8),
+    ],
+    "complaint": [
+        (r"\b(not helpful|useless|terrible|awful|frustrat\w*|annoy\w*|disappointed|waste of time|doesn'?t work|not working)\b", 0.85),
+        (r"\b(wrong|bad) (results?|answers?|properties)\b", 0.7),
+    ],
+    "smalltalk": [
+        (r"\b(how are you|what'?s up|tell me a joke|who are you|what is your name|thank(s| you))\b", 0.85),
+        (r"^\s*(ok|okay|cool|nice|great|bye|goodbye)\s*[.!]*\s*$", 0.8),
+    ],
+    "property_search": [
+        (r"\b(show|find|search|looking for|look for|want|need|get|buy|rent|list)\b.*\b(property|properties|home|homes|house|houses|flat|flats|apartment|apartments|villa|villas|condo|condos|penthouse|studio|bhk|listing|listings)\b", 0.8),
+        (r"\b(property|properties|home|homes|house|houses|flat|flats|apartment|apartments|villa|villas|condo|penthouse|studio)\b.*\b(in|near|under|below|with|around)\b", 0.6),
+        (r"\b\d+\s*(bhk|bed|bedroom|br)\b", 0.5),
+    ],
+    "general_inquiry": [
+        (r"^\s*(what|how|why|when|is|are|can|should|do|does)\b.*\b(buy|buying|rent|renting|mortgage|loan|emi|market|price|prices|invest\w*|registration|stamp duty|tax|area|neighbou?rhood)\b", 0.8),
+        (r"\b(difference between|pros and cons|tips|advice|process)\b", 0.6),
+    ],
+}
+
+# Intent confidence a structured filter (location/budget/bedrooms) adds to
+# property_search - a message naming a city or budget is almost always a search
+ENTITY_INTENT_BOOST = 0.35
+
+# Minimum rule-based intent confidence to skip LLM intent classification
+INTENT_CONFIDENCE_THRESHOLD = 0.7
+
+# Messages longer than this (in words) are considered conversational and
+# sent to the LLM
+LLM_WORD_COUNT_THRESHOLD = 15
+
+# Phrases that mark a message as ambiguous enough to need the LLM
+UNCERTAINTY_MARKERS = ["maybe", "perhaps", "not sure", "need help", "either", "somewhere", "something like"]
+
+# Phrases that carry preferences the rules can't extract
+PREFERENCE_KEYWORDS = [
+    "must have", "prefer", "require", "would like", "important", "essential",
+    "nice to have", "work from home", "pets", "family", "kids", "style",
+    "modern", "luxury", "don't want", "do not want", "without", "avoid",
+]
+
+# Local intent model (nlp/intent_model.py)
+# Character n-gram sizes used as features
+INTENT_NGRAM_RANGE = (2, 4)
+# Additive (Laplace) smoothing of feature counts
+INTENT_SMOOTHING = 0.5
+# Sharpness of the model's probabilities - higher = more confident
+INTENT_CALIBRATION = 4.0
+# How strongly a matching INTENT_PATTERNS rule shifts the model's
+# probabilities (each intent is scaled by exp(weight * rule score))
+INTENT_RULE_WEIGHT = 4.0
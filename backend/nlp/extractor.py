@@ -1,15 +1,27 @@
 import re
 import json
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple, Iterable
 from pathlib import Path
 from difflib import SequenceMatcher
 from nlp import config
+from nlp.budget import normalize_budget, parse_budget
+from nlp.locations import find_alias, parse_location
 
 # Cache for loaded cities
 _CITIES_CACHE = None
 _DATA_DIR = Path(__file__).parent.parent / "data"
 
 
+def _known_cities(locations: Iterable[str]) -> List[str]:
+    """Canonical cities of property locations, skipping any locality ("Bandra, Mumbai" -> "mumbai")"""
+    cities = set()
+    for location in locations:
+        city = parse_location(location or "")["city"]
+        if city:
+            cities.add(city)
+    return list(cities)
+
+
 def _load_cities_from_data() -> List[str]:
     """Dynamically load all unique cities from property data"""
     global _CITIES_CACHE
@@ -17,27 +29,47 @@ def _load_cities_from_data() -> List[str]:
     if _CITIES_CACHE is not None:
         return _CITIES_CACHE
     
-    cities = set()
+    cities = []
     try:
         property_file = _DATA_DIR / "property_basics.json"
         if property_file.exists():
             with open(property_file, 'r') as f:
                 properties = json.load(f)
-                for prop in properties:
-                    location = prop.get('location', '')
-                    # Extract city name (before comma)
-                    if location:
-                        city = location.split(',')[0].strip()
-                        cities.add(city.lower())
+                cities = _known_cities(prop.get('location', '') for prop in properties)
     except Exception as e:
         print(f"Warning: Could not load cities from data: {e}")
         # Fallback to common cities from config
-        cities = set(config.FALLBACK_CITIES)
+        cities = list(set(config.FALLBACK_CITIES))
     
-    _CITIES_CACHE = list(cities)
+    _CITIES_CACHE = cities
     return _CITIES_CACHE
 
 
+def update_cities(locations: Iterable[str]) -> int:
+    """
+    Replace the known city list, e.g. after the property catalog changed
+
+    Args:
+        locations: Property location strings
+
+    Returns:
+        Number of known cities
+    """
+    global _CITIES_CACHE
+    _CITIES_CACHE = _known_cities(locations)
+    return len(_CITIES_CACHE)
+
+
+def preload_indexes() -> int:
+    """
+    Build the city lookup used by extract_location ahead of the first request
+
+    Returns:
+        Number of known cities
+    """
+    return len(_load_cities_from_data())
+
+
 def _fuzzy_match(text: str, candidates: List[str], threshold: float = 0.6) -> Optional[Tuple[str, float]]:
     """Fuzzy match text against candidates, return best match if above threshold"""
     text_lower = text.lower()
@@ -68,6 +100,11 @@ def extract_location(text: str) -> Optional[str]:
     cities = _load_cities_from_data()
     text_lower = text.lower()
     
+    # Other names for a city ("Bengaluru", "NYC")
+    alias = find_alias(text_lower)
+    if alias:
+        return alias.title()
+    
     # Try exact match first (fast path)
     for city in cities:
         if city in text_lower:
@@ -92,6 +129,10 @@ def extract_location(text: str) -> Optional[str]:
     
     return None
 
+# Amount units in budget text; a unit must end its word ("3 bedroom" has none)
+_BUDGET_UNIT = r'(?:(?:lakhs?|lacs?|crores?|cr|thousand|million|billion|[klmb])(?![a-z]))'
+
+
 def extract_budget(text: str) -> Optional[str]:
     """Extract budget range from text - supports multiple currencies and formats"""
     if not text:
@@ -101,78 +142,42 @@ def extract_budget(text: str) -> Optional[str]:
     
     # Pattern 1: Explicit range keywords ("0-50l", "under 50k", "$200k-$500k")
     range_patterns = [
-        r'(?:under|below|less than|upto|up to)\s*(?:[$₹])?\s*(\d+)\s*([kKlLmM]|lakhs?|crores?|thousand|million)?',
-        r'(?:[$₹])?\s*(\d+)\s*([kKlLmM]|lakhs?|crores?)?\s*(?:to|-|–)\s*(?:[$₹])?\s*(\d+)\s*([kKlLmM]|lakhs?|crores?|thousand|million)?',
-        r'(?:[$₹])?\s*(\d+)\s*([kKlLmM]|lakhs?|crores?|thousand|million)?\s*(?:budget|price|cost)',
+        rf'(?:under|below|less than|upto|up to)\s*(?:[$₹])?\s*(\d+(?:\.\d+)?)\s*{_BUDGET_UNIT}?',
+        rf'(?:[$₹])?\s*(\d+(?:\.\d+)?)\s*{_BUDGET_UNIT}?\s*(?:to|-|–|and)\s*(?:[$₹])?\s*(\d+(?:\.\d+)?)\s*{_BUDGET_UNIT}?',
+        rf'(?:above|over|more than)\s*(?:[$₹])?\s*(\d+(?:\.\d+)?)\s*{_BUDGET_UNIT}?\+?',
+        rf'(?:[$₹])?\s*(\d+(?:\.\d+)?)\s*{_BUDGET_UNIT}?\s*(?:budget|price|cost)',
     ]
     
     for pattern in range_patterns:
         match = re.search(pattern, text_lower)
         if match:
-            return _normalize_budget(match.group(0))
+            budget = _plausible_budget(match.group(0))
+            if budget:
+                return budget
     
     # Pattern 2: Numeric values with currency symbols
     numeric_patterns = [
-        r'[$₹]\s*(\d+[,.]?\d*)\s*([kKmMbB]|lakhs?|crores?|thousand|million)?',
-        r'(\d+[,.]?\d*)\s*([kKlLmMbB]|lakhs?|crores?|thousand|million)',
+        rf'[$₹]\s*(\d+[,.]?\d*)\s*{_BUDGET_UNIT}?',
+        rf'(\d+[,.]?\d*)\s*{_BUDGET_UNIT}\+?',
     ]
     
     for pattern in numeric_patterns:
         match = re.search(pattern, text_lower)
         if match:
-            return _normalize_budget(match.group(0))
+            budget = _plausible_budget(match.group(0))
+            if budget:
+                return budget
     
     return None
 
 
-def _normalize_budget(budget_str: str) -> str:
-    """Normalize budget string to standard Indian ranges (0-50L, 50L-1Cr, 1Cr-2Cr)"""
-    if not budget_str:
-        return None
-    
-    budget_lower = budget_str.lower().replace(',', '').replace('$', '').replace('₹', '').replace(' ', '').strip()
-    
-    # Check for explicit Indian range patterns first
-    if '0-50l' in budget_lower or '050l' in budget_lower or ('0' in budget_lower and '50' in budget_lower and ('l' in budget_lower or 'lakh' in budget_lower)):
-        return "0-50L"
-    elif '50l-1cr' in budget_lower or '50l1cr' in budget_lower or ('50' in budget_lower and '1cr' in budget_lower):
-        return "50L-1Cr"
-    elif '1cr-2cr' in budget_lower or '1cr2cr' in budget_lower or ('1cr' in budget_lower and '2cr' in budget_lower):
-        return "1Cr-2Cr"
-    elif '2cr' in budget_lower and ('above' in budget_lower or 'more' in budget_lower or '+' in budget_lower):
-        return "2Cr+"
-    
-    # Extract numeric value
-    num_match = re.search(r'(\d+(?:\.\d+)?)', budget_lower)
-    if not num_match:
-        return None
-    
-    value = float(num_match.group(1))
-    
-    # Determine multiplier using config
-    multiplier_applied = False
-    for key, multiplier in config.CURRENCY_MULTIPLIERS.items():
-        if key in budget_lower:
-            value *= multiplier
-            multiplier_applied = True
-            break
-    
-    # If no multiplier found but value is large, assume it's already in base currency
-    # Convert to INR if needed (for Indian properties)
-    # Map to Indian budget ranges (in INR)
-    # 0-50L = 0 to 5,000,000
-    # 50L-1Cr = 5,000,000 to 10,000,000
-    # 1Cr-2Cr = 10,000,000 to 20,000,000
-    # 2Cr+ = 20,000,000+
-    
-    if value < 5000000:  # Less than 50L
-        return "0-50L"
-    elif value < 10000000:  # 50L to 1Cr
-        return "50L-1Cr"
-    elif value < 20000000:  # 1Cr to 2Cr
-        return "1Cr-2Cr"
-    else:  # Above 2Cr
-        return "2Cr+"
+def _plausible_budget(budget_str: str) -> Optional[str]:
+    """Normalized budget, or None for ranges too small to be prices ("2-3 bhk")"""
+    budget = normalize_budget(budget_str)
+    if budget and parse_budget(budget)[1] >= config.MIN_BUDGET_AMOUNT:
+        return budget
+    return None
+
 
 def extract_bedrooms(text: str) -> Optional[str]:
     """Extract number of bedrooms from text with improved pattern matching"""
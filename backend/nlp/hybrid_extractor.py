@@ -1,10 +1,13 @@
 """
 Hybrid NLP Extractor - Combines rule-based and LLM extraction
-Uses rules for fast, reliable extraction and LLM for complex cases
+Uses rules for fast, reliable extraction and LLM only for ambiguous cases
 """
 
+import re
 from typing import Dict, Optional, List
+from nlp import config
 from nlp.extractor import extract_filters as rule_based_extract
+from nlp.intent_model import classify_intent_locally
 from nlp.llm_extractor import (
     extract_entities_with_llm,
     classify_intent_with_llm,
@@ -13,22 +16,29 @@ from nlp.llm_extractor import (
 )
 
 
-def extract_with_hybrid(text: str, use_llm: bool = True) -> Dict:
+def extract_with_hybrid(text: str, use_llm: bool = True, defer_preferences: bool = False) -> Dict:
     """
-    Extract entities using hybrid approach: rules first, LLM as fallback/enhancement
+    Extract entities using hybrid approach: rules first, LLM only when needed
     
     Strategy:
-    1. Try rule-based extraction (fast, reliable for common patterns)
-    2. If rules miss entities and LLM available, use LLM
-    3. Merge results, preferring rule-based for structured fields
-    4. Add LLM-only fields (preferences, intent)
+    1. Rule-based extraction and local intent classification (naive Bayes
+       model, see nlp/intent_model.py)
+    2. Route: if the rules are confident (see get_llm_routing_reasons), stop
+       here - no LLM calls
+    3. Otherwise call only the LLM steps the rules couldn't cover: entities
+       when rules found at most one, intent when the rule intent is unsure,
+       preferences when the message carries preferences
+    4. Merge results, preferring rule-based for structured fields
     
     Args:
         text: User's natural language query
         use_llm: Whether to use LLM (default True if available)
+        defer_preferences: Skip the preference LLM call and set
+            "preferences_deferred" instead, for callers that extract
+            preferences in the background (see services/chat_sessions.py)
     
     Returns:
-        Dict with all extracted information
+        Dict with all extracted information, including the routing decision
     """
     result = {
         "location": None,
@@ -38,6 +48,7 @@ def extract_with_hybrid(text: str, use_llm: bool = True) -> Dict:
         "amenities": None,
         "intent": None,
         "preferences": {},
+        "preferences_deferred": False,
         "extraction_method": "rule-based"
     }
     
@@ -55,14 +66,27 @@ def extract_with_hybrid(text: str, use_llm: bool = True) -> Dict:
     if entities_found > 0:
         print(f"📋 Rule-based extraction found {entities_found} entities: {rule_results}")
     
-    # Step 2: LLM extraction (if enabled and available)
-    llm_is_available = is_llm_available()
+    intent_result = classify_intent_locally(text, rule_results)
+    result["intent"] = intent_result["intent"]
+    result["intent_confidence"] = intent_result["confidence"]
     
-    if use_llm and llm_is_available:
-        # Use LLM if:
-        # a) Rules found nothing or only 1 entity (might be complex query)
-        # b) Always extract additional info (intent, preferences)
-        
+    # Step 2: Route - decide whether this message needs the LLM at all
+    reasons = get_llm_routing_reasons(text, rule_results or {}, intent_result)
+    llm_is_available = is_llm_available() if use_llm and reasons else False
+    result["routing"] = {"use_llm": bool(reasons) and llm_is_available, "reasons": reasons}
+    
+    if not reasons:
+        print(f"🧭 Router: rules only (intent={intent_result['intent']} "
+              f"{intent_result['confidence']:.2f}, {entities_found} entities)")
+    elif not use_llm:
+        print(f"🧭 Router: rules only (LLM disabled; would use it for: {', '.join(reasons)})")
+    elif not llm_is_available:
+        print(f"⚠️  LLM requested but not available - using rule-based only ({', '.join(reasons)})")
+    else:
+        print(f"🧭 Router: LLM for {', '.join(reasons)}")
+    
+    # Step 3: LLM extraction, only for what the rules couldn't cover
+    if result["routing"]["use_llm"]:
         if entities_found <= 1:
             print(f"💡 Using LLM to enhance extraction (only {entities_found} entity found by rules)")
             # Try LLM extraction for basic entities
@@ -86,19 +110,22 @@ def extract_with_hybrid(text: str, use_llm: bool = True) -> Dict:
                 result["property_type"] = llm_results.get("property_type")
                 result["amenities"] = llm_results.get("amenities")
         
-        # Step 3: Intent classification (always do this with LLM)
-        intent_result = classify_intent_with_llm(text)
-        result["intent"] = intent_result.get("intent")
-        result["intent_confidence"] = intent_result.get("confidence")
+        # Intent classification, unless the rules were already sure
+        if intent_result["confidence"] < config.INTENT_CONFIDENCE_THRESHOLD:
+            llm_intent = classify_intent_with_llm(text)
+            if llm_intent.get("intent") not in (None, "unknown"):
+                result["intent"] = llm_intent.get("intent")
+                result["intent_confidence"] = llm_intent.get("confidence")
         
-        # Step 4: Extract detailed preferences (if it looks like a property search)
-        if result["intent"] in ["property_search", "general_inquiry"]:
-            preferences = extract_preferences_with_llm(text)
-            if preferences:
-                result["preferences"] = preferences
-                result["extraction_method"] = "hybrid"
-    elif use_llm and not llm_is_available:
-        print("⚠️  LLM requested but not available - using rule-based only")
+        # Detailed preferences, if it looks like a property search that has some
+        if result["intent"] in ["property_search", "general_inquiry"] and _has_preferences(text):
+            if defer_preferences:
+                result["preferences_deferred"] = True
+            else:
+                preferences = extract_preferences_with_llm(text)
+                if preferences:
+                    result["preferences"] = preferences
+                    result["extraction_method"] = "hybrid"
     
     # Log final result
     if entities_found > 0 or result.get("intent"):
@@ -108,43 +135,79 @@ def extract_with_hybrid(text: str, use_llm: bool = True) -> Dict:
     return result
 
 
-def should_use_llm_for_query(text: str, rule_results: Dict) -> bool:
+def _contains_phrase(text_lower: str, phrases: List[str]) -> Optional[str]:
+    """Return the first phrase found as whole words in the text"""
+    for phrase in phrases:
+        if re.search(rf"\b{re.escape(phrase)}\b", text_lower):
+            return phrase
+    return None
+
+
+def _has_preferences(text: str) -> bool:
+    return (
+        len(text.split()) > config.LLM_WORD_COUNT_THRESHOLD
+        or _contains_phrase(text.lower(), config.PREFERENCE_KEYWORDS) is not None
+    )
+
+
+def get_llm_routing_reasons(text: str, rule_results: Dict, intent_result: Optional[Dict] = None) -> List[str]:
     """
-    Decide if LLM should be used based on query complexity
+    Explain why a query needs the LLM
     
     Args:
         text: User's query
         rule_results: Results from rule-based extraction
+        intent_result: Result of classify_intent_locally (computed if omitted)
     
     Returns:
-        Boolean indicating if LLM should be used
+        List of reasons; empty when the rules are confident on their own
     """
-    # Use LLM if:
-    # 1. Query is long and conversational (> 15 words)
+    text_lower = text.lower()
+    reasons = []
+    if intent_result is None:
+        intent_result = classify_intent_locally(text, rule_results)
+    entities_found = sum(1 for v in rule_results.values() if v)
+    
+    # 1. Query is long and conversational
     word_count = len(text.split())
-    if word_count > 15:
-        return True
+    if word_count > config.LLM_WORD_COUNT_THRESHOLD:
+        reasons.append(f"long message ({word_count} words)")
     
-    # 2. Contains uncertainty or questions
-    uncertainty_markers = ["maybe", "perhaps", "not sure", "?", "looking for", "need help"]
-    if any(marker in text.lower() for marker in uncertainty_markers):
-        return True
+    # 2. Contains uncertainty
+    marker = _contains_phrase(text_lower, config.UNCERTAINTY_MARKERS)
+    if marker:
+        reasons.append(f"uncertain ('{marker}')")
     
-    # 3. Rules found nothing
-    entities_found = sum(1 for v in rule_results.values() if v)
-    if entities_found == 0:
-        return True
-    
-    # 4. Contains complex preferences
-    preference_keywords = [
-        "must have", "prefer", "need", "require", "would like",
-        "important", "essential", "nice to have", "work from home",
-        "pets", "family", "kids", "style", "modern", "luxury"
-    ]
-    if any(keyword in text.lower() for keyword in preference_keywords):
-        return True
-    
-    return False
+    # 3. A question the rules found nothing in
+    if "?" in text and entities_found == 0:
+        reasons.append("open question")
+    
+    # 4. The rule-based intent is unsure
+    if intent_result["confidence"] < config.INTENT_CONFIDENCE_THRESHOLD:
+        reasons.append(f"low intent confidence ({intent_result['intent']} {intent_result['confidence']:.2f})")
+    
+    # 5. Searches with preferences the rules can't extract
+    if intent_result["intent"] in ["property_search", "general_inquiry"]:
+        keyword = _contains_phrase(text_lower, config.PREFERENCE_KEYWORDS)
+        if keyword:
+            reasons.append(f"preferences ('{keyword}')")
+    
+    return reasons
+
+
+def should_use_llm_for_query(text: str, rule_results: Dict, intent_result: Optional[Dict] = None) -> bool:
+    """
+    Decide if LLM should be used based on query complexity
+    
+    Args:
+        text: User's query
+        rule_results: Results from rule-based extraction
+        intent_result: Result of classify_intent_locally (computed if omitted)
+    
+    Returns:
+        Boolean indicating if LLM should be used
+    """
+    return bool(get_llm_routing_reasons(text, rule_results, intent_result))
 
 
 def get_search_summary(extraction_result: Dict) -> str:
@@ -0,0 +1,76 @@
+"""
+Rule-based intent classifier
+
+Keyword/regex counterpart of classify_intent_with_llm: same intents, same
+return shape, no network call. Patterns and weights live in
+nlp.config.INTENT_PATTERNS.
+"""
+
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+from nlp import config
+
+_COMPILED_PATTERNS: Optional[Dict[str, List[Tuple[Pattern, float]]]] = None
+
+
+def _patterns() -> Dict[str, List[Tuple[Pattern, float]]]:
+    global _COMPILED_PATTERNS
+    if _COMPILED_PATTERNS is None:
+        _COMPILED_PATTERNS = {
+            intent: [(re.compile(pattern), weight) for pattern, weight in patterns]
+            for intent, patterns in config.INTENT_PATTERNS.items()
+        }
+    return _COMPILED_PATTERNS
+
+
+def score_intents_with_rules(text: str) -> Dict[str, float]:
+    """
+    Pattern score (0.0 - 1.0) of every intent with at least one matching pattern
+    """
+    text_lower = (text or "").lower().strip()
+    scores: Dict[str, float] = {}
+    for intent, patterns in _patterns().items():
+        for pattern, weight in patterns:
+            if pattern.search(text_lower):
+                # Combine independent hits: 1 - (1 - a)(1 - b)
+                scores[intent] = 1 - (1 - scores.get(intent, 0.0)) * (1 - weight)
+    return scores
+
+
+def classify_intent_with_rules(text: str, entities: Optional[Dict] = None) -> Dict[str, any]:
+    """
+    Classify user intent with keyword/regex patterns
+
+    Args:
+        text: User's message
+        entities: Rule-based extraction results (location, budget, bedrooms);
+                  any structured filter counts towards property_search
+
+    Returns:
+        Dict with intent, confidence (0.0 - 1.0) and reasoning, like
+        classify_intent_with_llm. Unmatched messages are "unclear" with
+        confidence 0.
+    """
+    if not (text or "").strip():
+        return {"intent": "unclear", "confidence": 0.0, "reasoning": "empty message"}
+
+    scores = score_intents_with_rules(text)
+
+    found = [name for name, value in (entities or {}).items() if value]
+    if found:
+        boost = config.ENTITY_INTENT_BOOST * len(found)
+        scores["property_search"] = min(1.0, scores.get("property_search", 0.0) + boost)
+
+    if not scores:
+        return {"intent": "unclear", "confidence": 0.0, "reasoning": "no pattern matched"}
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    intent, confidence = ranked[0]
+    # Competing intents make the call less certain
+    if len(ranked) > 1:
+        confidence -= ranked[1][1] / 2
+
+    reasoning = f"matched {', '.join(name for name, _ in ranked)} patterns"
+    if found:
+        reasoning += f"; found {', '.join(found)}"
+    return {"intent": intent, "confidence": round(max(confidence, 0.0), 2), "reasoning": reasoning}
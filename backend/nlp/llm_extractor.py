@@ -1,14 +1,34 @@
 """
 LLM-based entity extraction using Google Gemini
 Fallback/enhancement for rule-based extraction
+
+Results are cached (see _cached) in the configured cache backend, keyed by
+the prompt and the normalized message, so a message any instance has
+already sent to Gemini is answered from the cache.
 """
 
+import copy
+import hashlib
 import json
+import queue
 import re
-from typing import Dict, Optional, List
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, List
+from core.cache import backend_stats, create_cache
 from core.config import settings
+from core.llm_usage import RequestUsage, current_usage, use_request
+from nlp.budget import normalize_budget
+from nlp.prompts import (
+    ENTITY_EXTRACTION, ENTITY_EXTRACTION_BATCH, INTENT_CLASSIFICATION, PREFERENCE_EXTRACTION, PromptTemplate
+)
 import google.generativeai as genai
 
+# Cached LLM results (only successful, non-empty ones are stored)
+_llm_cache = create_cache("llm", max_entries=settings.LLM_CACHE_SIZE, ttl=settings.LLM_CACHE_TTL)
+_llm_cache_stats = {"hits": 0, "misses": 0}
+
 # Initialize Gemini
 _gemini_model = None
 
@@ -34,52 +54,67 @@ def is_llm_available() -> bool:
     return True
 
 
-def extract_entities_with_llm(text: str) -> Dict[str, Optional[str]]:
+def _cache_key(template: PromptTemplate, text: str) -> str:
+    """Cache key of a message sent with a template: a prompt change starts a new key space"""
+    prompt = hashlib.sha1(f"{_gemini_model.model_name}\n{template.system}\n{template.user}".encode("utf-8")).hexdigest()[:12]
+    message = re.sub(r"\s+", " ", text.lower()).strip()
+    return f"{template.name}:{prompt}:{message}"
+
+
+def _cached(template: PromptTemplate, text: str, call: Callable[[], Dict], keep: Callable[[Dict], bool] = bool) -> Dict:
     """
-    Extract real estate entities using Gemini LLM
-    
+    Return the cached result of an LLM call for a message, or make the call
+
     Args:
-        text: User's natural language query
-    
-    Returns:
-        Dict with location, budget, bedrooms, and additional preferences
+        template: Prompt the call uses
+        text: User's message
+        call: Makes the LLM call
+        keep: Whether a result is worth caching (failed calls return empty results)
     """
-    if not is_llm_available():
-        return {}
+    key = _cache_key(template, text)
+    result = _llm_cache.get(key)
+    if result is not None:
+        _llm_cache_stats["hits"] += 1
+        # Callers may modify their result; the memory backend returns the stored one
+        return copy.deepcopy(result)
+    _llm_cache_stats["misses"] += 1
+    result = call()
+    if keep(result):
+        _llm_cache.set(key, copy.deepcopy(result))
+    return result
+
+
+def get_llm_cache_stats() -> Dict:
+    """LLM cache hits, misses and backend counters"""
+    return {**_llm_cache_stats, **backend_stats(_llm_cache), "size": len(_llm_cache)}
+
+
+def _clean_entities(entities: Dict) -> Dict[str, Optional[str]]:
+    """Normalize entities parsed from an LLM response"""
+    # Normalize budget to Indian ranges if provided
+    budget = entities.get("budget")
+    if budget:
+        normalized_budget = normalize_budget(str(budget))
+        if normalized_budget:
+            budget = normalized_budget
     
+    # Clean up the extracted entities
+    return {
+        "location": entities.get("location"),
+        "budget": budget,
+        "bedrooms": str(entities.get("bedrooms")) if entities.get("bedrooms") else None,
+        "property_type": entities.get("property_type"),
+        "amenities": entities.get("amenities") if isinstance(entities.get("amenities"), list) else None,
+        "urgency": entities.get("urgency")
+    }
+
+
+def _extract_entities(text: str) -> Dict[str, Optional[str]]:
+    """Extract entities from one message with one LLM call"""
     print(f"🤖 Using Gemini LLM for entity extraction...")
     
     try:
-        prompt = f"""You are an AI assistant specialized in extracting real estate search parameters from natural language queries.
-
-Extract the following information from the user's message:
-1. **location**: City or area name (e.g., "Mumbai", "Delhi", "Bangalore", "Pune")
-2. **budget**: Budget range - MUST normalize to Indian ranges: "0-50L", "50L-1Cr", "1Cr-2Cr", or "2Cr+"
-   - For Indian properties: Convert any amount to these ranges
-   - Examples: "50 lakhs" -> "50L-1Cr", "1 crore" -> "1Cr-2Cr", "under 50L" -> "0-50L"
-3. **bedrooms**: Number of bedrooms (e.g., "1", "2", "3", "4")
-4. **property_type**: Type of property (e.g., "apartment", "house", "villa", "condo")
-5. **amenities**: List of desired amenities (e.g., ["parking", "gym", "pool"])
-6. **urgency**: How urgent is the search (e.g., "immediate", "1-3 months", "just browsing")
-
-User query: "{text}"
-
-Return ONLY a valid JSON object with these fields. Use null for missing information.
-IMPORTANT: Budget must be one of: "0-50L", "50L-1Cr", "1Cr-2Cr", or "2Cr+"
-
-Example format:
-{{
-  "location": "Mumbai",
-  "budget": "50L-1Cr",
-  "bedrooms": "2",
-  "property_type": "apartment",
-  "amenities": ["parking", "gym"],
-  "urgency": "1-3 months"
-}}
-
-JSON response:"""
-
-        response = _gemini_model.generate_content(prompt)
+        response = ENTITY_EXTRACTION.generate(_gemini_model, text=text)
         
         if response and response.text:
             # Extract JSON from response
@@ -89,26 +124,7 @@ JSON response:"""
             json_match = re.search(r'\{.*\}', text_response, re.DOTALL)
             if json_match:
                 json_str = json_match.group(0)
-                entities = json.loads(json_str)
-                
-                # Normalize budget to Indian ranges if provided
-                budget = entities.get("budget")
-                if budget:
-                    # Import the normalization function
-                    from nlp.extractor import _normalize_budget
-                    normalized_budget = _normalize_budget(str(budget))
-                    if normalized_budget:
-                        budget = normalized_budget
-                
-                # Clean up the extracted entities
-                return {
-                    "location": entities.get("location"),
-                    "budget": budget,
-                    "bedrooms": str(entities.get("bedrooms")) if entities.get("bedrooms") else None,
-                    "property_type": entities.get("property_type"),
-                    "amenities": entities.get("amenities") if isinstance(entities.get("amenities"), list) else None,
-                    "urgency": entities.get("urgency")
-                }
+                return _clean_entities(json.loads(json_str))
     
     except Exception as e:
         print(f"Error in LLM extraction: {e}")
@@ -116,6 +132,134 @@ JSON response:"""
     return {}
 
 
+def _extract_entities_batch(texts: List[str]) -> List[Dict[str, Optional[str]]]:
+    """
+    Extract entities from several messages with one LLM call
+
+    Returns:
+        One result per message, in order ({} for messages the response missed)
+    """
+    if len(texts) == 1:
+        return [_extract_entities(texts[0])]
+    
+    print(f"🤖 Using Gemini LLM for batched entity extraction ({len(texts)} messages)...")
+    results: List[Dict] = [{} for _ in texts]
+    
+    try:
+        queries = "\n".join(f"{i}. {json.dumps(text)}" for i, text in enumerate(texts))
+        response = ENTITY_EXTRACTION_BATCH.generate(_gemini_model, queries=queries)
+        
+        if response and response.text:
+            json_match = re.search(r'\[.*\]', response.text.strip(), re.DOTALL)
+            if json_match:
+                items = json.loads(json_match.group(0))
+                for position, entities in enumerate(items if isinstance(items, list) else []):
+                    if not isinstance(entities, dict):
+                        continue
+                    index = entities.get("index", position)
+                    if isinstance(index, int) and 0 <= index < len(texts):
+                        results[index] = _clean_entities(entities)
+    
+    except Exception as e:
+        print(f"Error in batched LLM extraction: {e}")
+    
+    return results
+
+
+class EntityBatcher:
+    """
+    Coalesce concurrent entity extractions into batched LLM calls
+
+    Chat requests run extraction in threadpool threads. Each caller submits
+    its message and blocks on a Future; a collector thread waits up to
+    `window` seconds after the first pending message (or until `max_size`
+    are queued), sends them as one prompt on a worker thread and fans the
+    results back out. A message arriving alone waits at most `window`.
+    """
+
+    def __init__(self, window: float, max_size: int, workers: int = 4):
+        self.window = window
+        self.max_size = max(1, max_size)
+        self._queue: "queue.Queue" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-batch")
+        self._collector: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, text: str) -> Future:
+        """Queue a message for extraction; the Future resolves to its entities"""
+        future: Future = Future()
+        self._queue.put((text, future, current_usage()))
+        with self._lock:
+            if self._collector is None or not self._collector.is_alive():
+                self._collector = threading.Thread(target=self._collect, name="llm-batch-collector", daemon=True)
+                self._collector.start()
+        return future
+
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._executor.submit(self._run, batch)
+
+    @staticmethod
+    def _run(batch):
+        # Account the shared call to every request in the batch, each
+        # carrying an equal share of its tokens and cost
+        batch_usage = RequestUsage()
+        use_request(batch_usage)
+        try:
+            results = _extract_entities_batch([text for text, _, _ in batch])
+        except Exception as e:
+            print(f"Error in batched LLM extraction: {e}")
+            results = [{} for _ in batch]
+        for (_, future, usage), result in zip(batch, results):
+            if usage is not None:
+                usage.merge(batch_usage, share=1 / len(batch))
+            future.set_result(result)
+
+
+_entity_batcher: Optional[EntityBatcher] = None
+
+
+def _get_entity_batcher() -> Optional[EntityBatcher]:
+    global _entity_batcher
+    if settings.LLM_BATCH_WINDOW_MS <= 0 or settings.LLM_BATCH_MAX_SIZE <= 1:
+        return None
+    if _entity_batcher is None:
+        _entity_batcher = EntityBatcher(settings.LLM_BATCH_WINDOW_MS / 1000, settings.LLM_BATCH_MAX_SIZE)
+    return _entity_batcher
+
+
+def extract_entities_with_llm(text: str) -> Dict[str, Optional[str]]:
+    """
+    Extract real estate entities using Gemini LLM
+    
+    Concurrent calls are micro-batched (see EntityBatcher): messages arriving
+    within LLM_BATCH_WINDOW_MS of each other share one Gemini request.
+    
+    Args:
+        text: User's natural language query
+    
+    Returns:
+        Dict with location, budget, bedrooms, and additional preferences
+    """
+    if not is_llm_available():
+        return {}
+    
+    batcher = _get_entity_batcher()
+    if batcher is None:
+        return _cached(ENTITY_EXTRACTION, text, lambda: _extract_entities(text))
+    return _cached(ENTITY_EXTRACTION, text, lambda: batcher.submit(text).result())
+
+
 def classify_intent_with_llm(text: str) -> Dict[str, any]:
     """
     Classify user intent using Gemini LLM
@@ -129,38 +273,18 @@ def classify_intent_with_llm(text: str) -> Dict[str, any]:
     if not is_llm_available():
         return {"intent": "unknown", "confidence": 0.0}
     
+    return _cached(
+        INTENT_CLASSIFICATION, text, lambda: _classify_intent(text),
+        keep=lambda result: result["intent"] != "unknown"
+    )
+
+
+def _classify_intent(text: str) -> Dict[str, any]:
+    """Classify intent with one LLM call"""
     print(f"🎯 Classifying intent with Gemini LLM...")
     
     try:
-        prompt = f"""You are an AI assistant that classifies user intents in a real estate chatbot context.
-
-Classify the following user message into ONE of these intents:
-1. **property_search**: User is searching for properties with specific criteria
-2. **general_inquiry**: User is asking general questions about real estate
-3. **greeting**: User is greeting or introducing themselves
-4. **save_property**: User wants to save/bookmark a property
-5. **view_saved**: User wants to see their saved properties
-6. **smalltalk**: Casual conversation not related to real estate
-7. **complaint**: User is expressing dissatisfaction
-8. **unclear**: Message is unclear or ambiguous
-
-User message: "{text}"
-
-Return ONLY a valid JSON object with:
-- "intent": one of the above intent types
-- "confidence": a number between 0.0 and 1.0
-- "reasoning": brief explanation (optional)
-
-Example:
-{{
-  "intent": "property_search",
-  "confidence": 0.95,
-  "reasoning": "User is explicitly looking for 2 bedroom apartments"
-}}
-
-JSON response:"""
-
-        response = _gemini_model.generate_content(prompt)
+        response = INTENT_CLASSIFICATION.generate(_gemini_model, text=text)
         
         if response and response.text:
             text_response = response.text.strip()
@@ -195,37 +319,13 @@ def extract_preferences_with_llm(text: str) -> Dict[str, any]:
     if not is_llm_available():
         return {}
     
+    return _cached(PREFERENCE_EXTRACTION, text, lambda: _extract_preferences(text))
+
+
+def _extract_preferences(text: str) -> Dict[str, any]:
+    """Extract preferences with one LLM call"""
     try:
-        prompt = f"""You are an AI assistant extracting detailed real estate preferences from user messages.
-
-Extract the following detailed preferences:
-1. **style**: Property style (e.g., "modern", "traditional", "minimalist", "luxury")
-2. **move_in_date**: Desired move-in date or timeframe
-3. **must_haves**: List of essential features (e.g., ["parking", "balcony", "natural light"])
-4. **nice_to_haves**: List of preferred but not essential features
-5. **deal_breakers**: Things the user definitely doesn't want
-6. **family_size**: Information about household size
-7. **work_from_home**: Whether user works from home (true/false)
-8. **pets**: Whether user has pets
-
-User message: "{text}"
-
-Return ONLY a valid JSON object. Use null for missing information.
-Example:
-{{
-  "style": "modern",
-  "move_in_date": "immediate",
-  "must_haves": ["parking", "gym"],
-  "nice_to_haves": ["pool", "garden"],
-  "deal_breakers": ["ground floor"],
-  "family_size": 4,
-  "work_from_home": true,
-  "pets": false
-}}
-
-JSON response:"""
-
-        response = _gemini_model.generate_content(prompt)
+        response = PREFERENCE_EXTRACTION.generate(_gemini_model, text=text)
         
         if response and response.text:
             text_response = response.text.strip()
@@ -0,0 +1,83 @@
+"""
+Place names in property locations
+
+Locations look like "City", "City, ST" or "Locality, City, ST".
+parse_location splits one into locality, city and state using canonical
+names: lowercase, aliases resolved ("Bengaluru" -> "bangalore", "NYC" ->
+"new york") and US states abbreviated ("Texas" -> "tx"), so different
+spellings of a place compare equal. Cities without a state in their
+location get one from CITY_STATES.
+"""
+import re
+from typing import Dict, List, Optional
+from nlp import config
+
+_KNOWN_STATES = set(config.STATE_ABBREVIATIONS.values()) | set(config.CITY_STATES.values())
+
+# Aliases as whole words, longest first ("new york city" before "nyc")
+_ALIAS_PATTERN = re.compile(
+    r"(?<![\w.])(" + "|".join(
+        re.escape(alias) for alias in sorted(config.LOCATION_ALIASES, key=len, reverse=True)
+    ) + r")(?![\w])"
+)
+
+
+def canonical_place(name: Optional[str]) -> str:
+    """Lowercased, alias-resolved name of a place ("Bengaluru" -> "bangalore")"""
+    name = re.sub(r"\s+", " ", (name or "").lower()).strip()
+    name = config.LOCATION_ALIASES.get(name, name)
+    return config.STATE_ABBREVIATIONS.get(name, name)
+
+
+def canonical_location(location: Optional[str]) -> str:
+    """Canonical form of a whole location ("Austin, Texas" -> "austin, tx")"""
+    return ", ".join(canonical_place(part) for part in (location or "").split(",") if part.strip())
+
+
+def parse_location(location: Optional[str]) -> Dict[str, Optional[str]]:
+    """
+    Split a location into canonical locality, city and state
+
+    "Austin, TX" -> {"locality": None, "city": "austin", "state": "tx"}
+    "Bandra, Mumbai" -> {"locality": "bandra", "city": "mumbai", "state": "maharashtra"}
+    """
+    parts = [canonical_place(part) for part in (location or "").split(",") if part.strip()]
+    locality = city = state = None
+    if len(parts) == 1:
+        city = parts[0]
+    elif len(parts) == 2:
+        if parts[1] in _KNOWN_STATES:
+            city, state = parts
+        else:
+            locality, city = parts
+    elif len(parts) >= 3:
+        locality, city, state = parts[0], parts[-2], parts[-1]
+    if city and not state:
+        state = config.CITY_STATES.get(city)
+    return {"locality": locality, "city": city, "state": state}
+
+
+def place_keys(location: Optional[str]) -> List[str]:
+    """
+    Lookup keys a location can be found by: the whole location, its
+    locality, city, state and "city, state"
+
+    "New York, NY" -> ["new york, ny", "new york", "ny"]
+    """
+    whole = canonical_location(location)
+    if not whole:
+        return []
+    parsed = parse_location(location)
+    keys = [whole]
+    if parsed["city"] and parsed["state"]:
+        keys.append(f"{parsed['city']}, {parsed['state']}")
+    for key in (parsed["locality"], parsed["city"], parsed["state"]):
+        if key:
+            keys.append(key)
+    return list(dict.fromkeys(keys))
+
+
+def find_alias(text: str) -> Optional[str]:
+    """Canonical city for the first place alias mentioned in text ("NYC" -> "new york")"""
+    match = _ALIAS_PATTERN.search(text.lower())
+    return config.LOCATION_ALIASES[match.group(1)] if match else None
@@ -0,0 +1,289 @@
+"""
+Prompt templates for every Gemini call
+
+Each template splits its prompt into a static part - the role, rules, field
+lists and examples, built once at import - and a short per-call part with
+the user's message and search context. The static part is sent as the
+model's system instruction (one GenerativeModel per template, created on
+first use) and each call only sends the per-call part. System instructions
+need google-generativeai 0.5 or later (requirements.txt pins 0.8); older
+versions get the precomputed static prefix prepended to the per-call part,
+which saves nothing.
+
+Context caching is not used: Gemini only caches contexts of at least a few
+thousand tokens, and these static parts are a few hundred.
+"""
+
+import inspect
+import threading
+from typing import Dict, Tuple
+import google.generativeai as genai
+from core.llm_usage import record_call
+
+# Whether this google-generativeai version accepts system instructions
+SUPPORTS_SYSTEM_INSTRUCTION = "system_instruction" in inspect.signature(genai.GenerativeModel.__init__).parameters
+
+# GenerativeModel per (model name, template name) carrying the system instruction
+_MODELS: Dict[Tuple[str, str], "genai.GenerativeModel"] = {}
+_MODELS_LOCK = threading.Lock()
+
+
+class PromptTemplate:
+    """A prompt with a static system part and a per-call user part"""
+
+    def __init__(self, name: str, system: str, user: str):
+        """
+        Args:
+            name: Template name (also identifies the call site)
+            system: Static instructions, sent once per model when supported
+            user: str.format template for the per-call part
+        """
+        self.name = name
+        self.system = system.strip()
+        self.user = user.strip()
+        # Precomputed prefix for clients without system instructions
+        self.prefix = self.system + "\n\n"
+
+    def render(self, **values) -> str:
+        """The per-call part of the prompt"""
+        return self.user.format(**values)
+
+    def full_prompt(self, **values) -> str:
+        """Static and per-call parts as one prompt"""
+        return self.prefix + self.render(**values)
+
+    def model_for(self, model: "genai.GenerativeModel") -> "genai.GenerativeModel":
+        """The model carrying this template's system instruction"""
+        key = (model.model_name, self.name)
+        template_model = _MODELS.get(key)
+        if template_model is None:
+            with _MODELS_LOCK:
+                template_model = _MODELS.get(key)
+                if template_model is None:
+                    template_model = genai.GenerativeModel(model.model_name, system_instruction=self.system)
+                    _MODELS[key] = template_model
+        return template_model
+
+    def generate(self, model: "genai.GenerativeModel", **values):
+        """
+        Call Gemini with this template
+
+        Args:
+            model: Configured GenerativeModel (its model name is reused)
+            **values: Values for the per-call part
+
+        Returns:
+            The generate_content response
+        """
+        if SUPPORTS_SYSTEM_INSTRUCTION:
+            template_model, prompt = self.model_for(model), self.render(**values)
+        else:
+            template_model, prompt = model, self.full_prompt(**values)
+        # Token, latency and cost accounting per template (see core/llm_usage.py)
+        return record_call(self.name, model.model_name, lambda: template_model.generate_content(prompt))
+
+
+# --- Chat replies (services/gemini_service.py) ---
+
+_MIRA = "You are Mira, a friendly and helpful AI real estate assistant."
+
+_REPLY_INSTRUCTION = "Generate a natural, conversational response (2-3 sentences max) that strictly adheres to the rules above:"
+
+SEARCH_RESULTS_REPLY = PromptTemplate(
+    "search_results_reply",
+    system=f"""{_MIRA}
+
+CRITICAL RULES:
+1. You can ONLY talk about properties that are provided to you in the properties list below
+2. DO NOT make up, invent, or hallucinate any properties that are not in the list
+3. DO NOT mention properties that don't exist in the database
+4. If a property is not in the provided list, it does NOT exist - do not reference it
+5. Keep responses concise (2-3 sentences max)
+6. Be conversational, warm, and professional
+7. Use emojis sparingly (max 1-2 per response)
+
+You found properties matching the user's search. Acknowledge this naturally and mention that you're showing them the best options.""",
+    user=f"""{{context_info}}
+ACTUAL PROPERTIES FOUND IN DATABASE ({{property_count}} total):
+{{properties_list}}
+
+IMPORTANT: You can ONLY reference these properties. Do not mention any other properties.
+
+User message: {{message}}
+
+{_REPLY_INSTRUCTION}""",
+)
+
+SEARCH_NO_RESULTS_REPLY = PromptTemplate(
+    "search_no_results_reply",
+    system=f"""{_MIRA}
+
+CRITICAL RULES:
+1. NO properties were found matching the user's criteria
+2. DO NOT make up or suggest properties that don't exist
+3. DO NOT say "I found some properties" or similar - you found ZERO properties
+4. Clearly state that no properties match their criteria
+5. Suggest they try different filters (location, budget, bedrooms)
+6. Be helpful and encouraging, but honest about the lack of results
+7. Keep responses concise (2-3 sentences max)
+8. Use emojis sparingly
+
+The user searched for properties but NO matches were found in the database.""",
+    user=f"""{{context_info}}
+NO PROPERTIES FOUND: The database search returned ZERO results. Do not suggest or mention any properties.
+
+User message: {{message}}
+
+{_REPLY_INSTRUCTION}""",
+)
+
+GENERAL_CHAT_REPLY = PromptTemplate(
+    "general_chat_reply",
+    system="""You are Mira, a friendly and helpful AI real estate assistant.
+Your role is to help users find their dream properties. Be conversational, warm, and professional.
+Keep responses concise (2-3 sentences max) and natural. Use emojis sparingly.
+
+Engage in natural conversation. If the user is asking about properties, help them. If they're just chatting, be friendly and helpful.
+Always be encouraging and ready to help with property searches.""",
+    user=f"""User message: {{message}}
+
+{_REPLY_INSTRUCTION}""",
+)
+
+ENHANCE_REPLY = PromptTemplate(
+    "enhance_reply",
+    system="""You are Mira, a real estate assistant.
+
+Create a natural, conversational response (2-3 sentences) that:
+1. Acknowledges finding properties
+2. Mentions key highlights naturally
+3. Encourages the user to explore
+
+Keep it warm and helpful. Don't list all properties, just mention naturally.""",
+    user="""A user asked about properties and I found {property_count} matching properties.
+
+Properties found:
+{properties_summary}""",
+)
+
+
+# --- NLP extraction (nlp/llm_extractor.py) ---
+
+ENTITY_FIELDS = """1. **location**: City or area name (e.g., "Mumbai", "Delhi", "Bangalore", "Pune")
+2. **budget**: Budget range - MUST normalize to Indian ranges: "0-50L", "50L-1Cr", "1Cr-2Cr", or "2Cr+"
+   - For Indian properties: Convert any amount to these ranges
+   - Examples: "50 lakhs" -> "50L-1Cr", "1 crore" -> "1Cr-2Cr", "under 50L" -> "0-50L"
+3. **bedrooms**: Number of bedrooms (e.g., "1", "2", "3", "4")
+4. **property_type**: Type of property (e.g., "apartment", "house", "villa", "condo")
+5. **amenities**: List of desired amenities (e.g., ["parking", "gym", "pool"])
+6. **urgency**: How urgent is the search (e.g., "immediate", "1-3 months", "just browsing")"""
+
+_EXTRACTOR_ROLE = "You are an AI assistant specialized in extracting real estate search parameters from natural language queries."
+
+ENTITY_EXTRACTION = PromptTemplate(
+    "entity_extraction",
+    system=f"""{_EXTRACTOR_ROLE}
+
+Extract the following information from the user's message:
+{ENTITY_FIELDS}
+
+Return ONLY a valid JSON object with these fields. Use null for missing information.
+IMPORTANT: Budget must be one of: "0-50L", "50L-1Cr", "1Cr-2Cr", or "2Cr+"
+
+Example format:
+{{
+  "location": "Mumbai",
+  "budget": "50L-1Cr",
+  "bedrooms": "2",
+  "property_type": "apartment",
+  "amenities": ["parking", "gym"],
+  "urgency": "1-3 months"
+}}""",
+    user="""User query: "{text}"
+
+JSON response:""",
+)
+
+ENTITY_EXTRACTION_BATCH = PromptTemplate(
+    "entity_extraction_batch",
+    system=f"""{_EXTRACTOR_ROLE}
+
+For EACH numbered user query, extract the following information:
+{ENTITY_FIELDS}
+
+Return ONLY a valid JSON array with one object per query, in the same order.
+Each object has an "index" field with the query number plus the fields above.
+Use null for missing information.
+IMPORTANT: Budget must be one of: "0-50L", "50L-1Cr", "1Cr-2Cr", or "2Cr+"
+
+Example format:
+[
+  {{"index": 0, "location": "Mumbai", "budget": "50L-1Cr", "bedrooms": "2", "property_type": "apartment", "amenities": ["parking"], "urgency": null}},
+  {{"index": 1, "location": null, "budget": null, "bedrooms": "3", "property_type": "villa", "amenities": null, "urgency": "immediate"}}
+]""",
+    user="""User queries:
+{queries}
+
+JSON response:""",
+)
+
+INTENT_CLASSIFICATION = PromptTemplate(
+    "intent_classification",
+    system="""You are an AI assistant that classifies user intents in a real estate chatbot context.
+
+Classify the user message into ONE of these intents:
+1. **property_search**: User is searching for properties with specific criteria
+2. **general_inquiry**: User is asking general questions about real estate
+3. **greeting**: User is greeting or introducing themselves
+4. **save_property**: User wants to save/bookmark a property
+5. **view_saved**: User wants to see their saved properties
+6. **smalltalk**: Casual conversation not related to real estate
+7. **complaint**: User is expressing dissatisfaction
+8. **unclear**: Message is unclear or ambiguous
+
+Return ONLY a valid JSON object with:
+- "intent": one of the above intent types
+- "confidence": a number between 0.0 and 1.0
+- "reasoning": brief explanation (optional)
+
+Example:
+{
+  "intent": "property_search",
+  "confidence": 0.95,
+  "reasoning": "User is explicitly looking for 2 bedroom apartments"
+}""",
+    user="""User message: "{text}"
+
+JSON response:""",
+)
+
+PREFERENCE_EXTRACTION = PromptTemplate(
+    "preference_extraction",
+    system="""You are an AI assistant extracting detailed real estate preferences from user messages.
+
+Extract the following detailed preferences:
+1. **style**: Property style (e.g., "modern", "traditional", "minimalist", "luxury")
+2. **move_in_date**: Desired move-in date or timeframe
+3. **must_haves**: List of essential features (e.g., ["parking", "balcony", "natural light"])
+4. **nice_to_haves**: List of preferred but not essential features
+5. **deal_breakers**: Things the user definitely doesn't want
+6. **family_size**: Information about household size
+7. **work_from_home**: Whether user works from home (true/false)
+8. **pets**: Whether user has pets
+
+Return ONLY a valid JSON object. Use null for missing information.
+Example:
+{
+  "style": "modern",
+  "move_in_date": "immediate",
+  "must_haves": ["parking", "gym"],
+  "nice_to_haves": ["pool", "garden"],
+  "deal_breakers": ["ground floor"],
+  "family_size": 4,
+  "work_from_home": true,
+  "pets": false
+}""",
+    user="""User message: "{text}"
+
+JSON response:""",
+)
@@ -0,0 +1,128 @@
+import secrets
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, List, Dict, Any
+from core.config import settings
+from services.data_service import validate_property
+from services.catalog_store import get_snapshot, record_changes, normalize_id, sync_journal
+from services.property_repository import get_property_repository, MongoPropertyRepository
+from core.llm_usage import get_usage_stats
+from core.cache import backend_stats
+from nlp.llm_extractor import get_llm_cache_stats
+from services.rate_limit import get_admission_stats
+from services.chat_sessions import chat_sessions
+from services.reply_cache import reply_cache
+from services.filter_cache import filter_cache
+from services.single_flight import chat_flight, search_flight
+
+router = APIRouter()
+
+def require_admin(x_admin_key: Optional[str] = Header(default=None)):
+    """Allow the request only with a valid X-Admin-Key header"""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Admin API is disabled. Set ADMIN_API_KEY to enable it."
+        )
+    if not secrets.compare_digest((x_admin_key or "").encode(), settings.ADMIN_API_KEY.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin key"
+        )
+
+class CatalogBatch(BaseModel):
+    upserts: List[Dict[str, Any]] = []
+    deletes: List[Any] = []
+    merge: bool = False  # Merge upserts into existing records instead of replacing them
+
+def _catalog_status(snapshot) -> Dict:
+    return {"version": snapshot.version, "count": len(snapshot.records)}
+
+def _validated_upserts(upserts: List[Dict], merge: bool) -> List[Dict]:
+    """Validate upserts as they will look once applied"""
+    snapshot = get_snapshot()
+    for record in upserts:
+        if "id" not in record:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Every upsert needs an 'id'")
+        existing = snapshot.get(record["id"]) if merge else None
+        reason = validate_property({**existing, **record} if existing else record)
+        if reason:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid property {record['id']}: {reason}"
+            )
+    return upserts
+
+async def _record_changes(upserts: List[Dict] = (), deletes: List[Any] = (), merge: bool = False):
+    """
+    Apply changes to the catalog (journal write and index updates run in the
+    threadpool) and write them through to MongoDB when that's the backend
+    """
+    snapshot = await run_in_threadpool(record_changes, upserts, deletes, merge)
+    repository = get_property_repository()
+    if isinstance(repository, MongoPropertyRepository):
+        changed = [normalize_id(record["id"]) for record in upserts]
+        try:
+            result = await repository.apply_changes(
+                [(snapshot.get(pid), snapshot.positions[pid]) for pid in changed if snapshot.get(pid) is not None],
+                [normalize_id(pid) for pid in deletes],
+            )
+            print(f"🏠 Wrote catalog changes to MongoDB: {result}")
+        except Exception as e:
+            print(f"⚠️  Warning: Could not write catalog changes to MongoDB, "
+                  f"run `python -m services.property_repository sync`: {e}")
+    return snapshot
+
+@router.get("/catalog", dependencies=[Depends(require_admin)])
+def catalog_status():
+    """Current catalog version and size (picks up pending journal entries first)"""
+    sync_journal()
+    return _catalog_status(get_snapshot())
+
+@router.post("/catalog/batch", dependencies=[Depends(require_admin)])
+async def apply_catalog_batch(batch: CatalogBatch):
+    """Apply several upserts and deletes as one catalog version"""
+    upserts = _validated_upserts(batch.upserts, batch.merge)
+    snapshot = await _record_changes(upserts, batch.deletes, merge=batch.merge)
+    return _catalog_status(snapshot)
+
+@router.put("/properties/{property_id}", dependencies=[Depends(require_admin)])
+async def upsert_property(property_id: str, record: Dict[str, Any]):
+    """Insert or replace a single property"""
+    record = {"id": normalize_id(property_id), **{k: v for k, v in record.items() if k != "id"}}
+    snapshot = await _record_changes(_validated_upserts([record], merge=False))
+    return {**_catalog_status(snapshot), "property": snapshot.get(property_id)}
+
+@router.patch("/properties/{property_id}", dependencies=[Depends(require_admin)])
+async def update_property(property_id: str, fields: Dict[str, Any]):
+    """Update some fields of an existing property"""
+    if get_snapshot().get(property_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Property not found")
+    record = {"id": normalize_id(property_id), **{k: v for k, v in fields.items() if k != "id"}}
+    snapshot = await _record_changes(_validated_upserts([record], merge=True), merge=True)
+    return {**_catalog_status(snapshot), "property": snapshot.get(property_id)}
+
+@router.delete("/properties/{property_id}", dependencies=[Depends(require_admin)])
+async def delete_property(property_id: str):
+    """Remove a property from the catalog"""
+    if get_snapshot().get(property_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Property not found")
+    snapshot = await _record_changes(deletes=[normalize_id(property_id)])
+    return _catalog_status(snapshot)
+
+@router.get("/metrics", dependencies=[Depends(require_admin)])
+def metrics():
+    """LLM usage (calls, tokens, latency, cost) and cache statistics for this worker"""
+    return {
+        "llm": get_usage_stats(),
+        "reply_cache": {**reply_cache.stats, **backend_stats(reply_cache.backend), "size": len(reply_cache)},
+        "filter_cache": {**filter_cache.stats, **backend_stats(filter_cache.backend), "size": len(filter_cache)},
+        "llm_cache": get_llm_cache_stats(),
+        "admission": get_admission_stats(),
+        "chat_sessions": {**chat_sessions.stats, "size": len(chat_sessions), "pending": chat_sessions.pending()},
+        "single_flight": {
+            flight.name: {**flight.stats, "in_flight": flight.in_flight()}
+            for flight in (chat_flight, search_flight)
+        },
+    }
@@ -1,29 +1,54 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from pydantic import BaseModel
 from typing import Optional, Dict
+from core.cache import run_cache_op
+from core.config import settings
+from core.llm_usage import current_usage
+from core.responses import json_response
 from services.chat_service import handle_chat
+from services.chat_sessions import chat_sessions
+from services.single_flight import chat_flight, request_key
 
 router = APIRouter()
 
 class ChatMessage(BaseModel):
     message: Optional[str] = ""
     filters: Optional[Dict[str, Optional[str]]] = {}
+    session_id: Optional[str] = None
 
 @router.post("/message")
-def chat_message(data: ChatMessage):
-    """Handle chat messages with optional filters"""
+async def chat_message(data: ChatMessage, request: Request):
+    """
+    Handle chat messages with optional filters
+
+    Without filters, handle_chat extracts them from the message (rules
+    first, LLM only for ambiguous messages). The response carries a
+    session_id; sending it back with later messages lets their results be
+    ranked with preferences learned from earlier ones. Identical concurrent
+    messages with the same filters and session preferences share one
+    handle_chat call, whichever sessions they come from. With
+    LLM_USAGE_HEADER set, the response carries the request's Gemini usage in
+    an X-LLM-Usage header.
+    """
     message = data.message or ""
     filters = data.filters or {}
+    session_id = chat_sessions.resolve(data.session_id)
+    preferences = await run_cache_op(chat_sessions.backend, chat_sessions.get_preferences, session_id)
+    defer_preferences = chat_sessions.max_sessions > 0
     
-    # Extract filters from message if not provided
-    if not filters and message:
-        from nlp.extractor import extract_filters
-        extracted_filters = extract_filters(message)
-        filters = {
-            "location": extracted_filters.get("location"),
-            "budget": extracted_filters.get("budget"),
-            "bedrooms": extracted_filters.get("bedrooms")
-        }
+    result = await chat_flight.do(
+        request_key(message, {**filters, "preferences": preferences}),
+        lambda: handle_chat(message, filters, preferences, defer_preferences)
+    )
+    result = dict(result)
+    # Every session coalesced onto the call learns this message's preferences
+    if result.pop("preferences_deferred", False):
+        chat_sessions.refine_in_background(session_id, message)
+    result["session_id"] = session_id
     
-    result = handle_chat(message, filters)
-    return result
+    # Gemini calls, tokens and cost spent on this request (debug)
+    usage = current_usage()
+    headers = {}
+    if settings.LLM_USAGE_HEADER and usage is not None:
+        headers["X-LLM-Usage"] = usage.header_value()
+    return await json_response(result, request, headers=headers)
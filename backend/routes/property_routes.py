@@ -1,22 +1,90 @@
-from fastapi import APIRouter
-from services.data_service import filter_properties, merge_json_data
-from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Request
+from core.responses import EncodedBody, json_response
+from nlp.budget import normalize_budget
+from nlp.locations import canonical_location
+from services.http_cache import cache_headers, make_etag, matching_etag, not_modified
+from services.property_repository import get_property_repository
+from services.search_index import parse_amenities
+from services.single_flight import search_flight, request_key
+from typing import Optional, Tuple
 
 router = APIRouter()
 
+# The full listing, encoded once per catalog version: (ETag, body)
+_all_listing: Optional[Tuple[str, EncodedBody]] = None
+
 @router.get("")
-def get_properties(
+async def get_properties(
+    request: Request,
     location: Optional[str] = None,
     budget: Optional[str] = None,
-    bedrooms: Optional[str] = None
+    bedrooms: Optional[str] = None,
+    q: Optional[str] = None,
+    amenities: Optional[str] = None,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    radius_km: Optional[float] = None,
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get properties with optional filters"""
-    results = filter_properties(location=location, budget=budget, bedrooms=bedrooms)
-    return {"properties": results}
+    """
+    Get properties with optional filters
+
+    `q` searches titles, amenities and locations by keyword and by meaning
+    ("home near water" finds lakefront properties), best match first, and
+    `amenities` is a comma-separated list every result must have.
+    `location` accepts a city, state or locality in any common spelling
+    ("Bengaluru", "NYC", "Texas"); `lat`/`lon` with `radius_km` limit
+    results to properties within that distance, nearest first.
+
+    Responses carry an ETag; sending it back in If-None-Match returns 304
+    while the catalog is unchanged.
+    """
+    if (lat is None) != (lon is None):
+        raise HTTPException(status_code=400, detail="lat and lon must be given together")
+    if lat is not None and not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise HTTPException(status_code=400, detail="lat must be in [-90, 90] and lon in [-180, 180]")
+    if radius_km is not None and radius_km <= 0:
+        raise HTTPException(status_code=400, detail="radius_km must be positive")
+    near = (lat, lon) if lat is not None else None
+    amenity_list = parse_amenities(amenities)
+    # Differently spelled but equivalent filters ("Bengaluru", "bangalore") share a key
+    key = request_key(q, {
+        "location": canonical_location(location), "budget": normalize_budget(budget) or budget,
+        "bedrooms": bedrooms, "amenities": sorted(amenity_list or []),
+        "near": near, "radius_km": radius_km,
+    })
+    repository = get_property_repository()
+    version = repository.content_version()
+    etag = make_etag(version, key) if version else None
+    matched = matching_etag(if_none_match, etag) if etag else None
+    if matched:
+        return not_modified(matched)
+    # Identical concurrent searches share one repository query
+    results = await search_flight.do(key, lambda: repository.search(
+        location=location, budget=budget, bedrooms=bedrooms,
+        query=q, amenities=amenity_list, near=near, radius_km=radius_km
+    ))
+    return await json_response({"properties": results}, request, headers=cache_headers(etag))
 
 @router.get("/all")
-def get_all_properties():
-    """Get all properties"""
-    properties = merge_json_data()
-    return {"properties": properties}
+async def get_all_properties(request: Request, if_none_match: Optional[str] = Header(None)):
+    """
+    Get all properties (ETag and 304 handling as for GET /properties)
+
+    The encoded (and compressed) listing is reused until the catalog changes.
+    """
+    global _all_listing
+    repository = get_property_repository()
+    version = repository.content_version()
+    etag = make_etag(version, "all") if version else None
+    matched = matching_etag(if_none_match, etag) if etag else None
+    if matched:
+        return not_modified(matched)
+    if etag and _all_listing is not None and _all_listing[0] == etag:
+        body = _all_listing[1]
+    else:
+        body = EncodedBody({"properties": await repository.list_all()})
+        if etag:
+            _all_listing = (etag, body)
+    return await body.response(request, headers=cache_headers(etag))
 
@@ -5,6 +5,7 @@ from typing import Optional
 from services.auth_service import get_current_active_user
 from models.user_model import UserInDB
 from core.db import db
+from core.currency import currency_symbol
 
 router = APIRouter()
 
@@ -36,12 +37,8 @@ async def save_property_for_user(
         # Get full property data if not provided
         property_data = data.property_data
         if not property_data:
-            from services.data_service import merge_json_data
-            all_properties = merge_json_data()
-            for prop in all_properties:
-                if str(prop.get("id", "")) == str(data.property_id):
-                    property_data = prop
-                    break
+            from services.property_repository import get_property_repository
+            property_data = await get_property_repository().get(data.property_id)
         
         # Save property with full data
         saved_property = {
@@ -94,7 +91,7 @@ async def get_saved_properties(
                 "saved_properties": []
             }
         
-        from services.data_service import is_indian_city
+        from services.data_service import get_currency, get_price
         formatted_properties = []
         
         # First, try to use stored property_data
@@ -109,32 +106,19 @@ async def get_saved_properties(
             else:
                 # Fallback: try to find property in merged data
                 print(f"No stored data for {property_id}, searching in merged data...")
-                from services.data_service import merge_json_data
-                all_properties = merge_json_data()
-                prop = None
-                for p in all_properties:
-                    if str(p.get("id", "")) == property_id:
-                        prop = p
-                        break
+                from services.property_repository import get_property_repository
+                prop = await get_property_repository().get(property_id)
                 
                 if not prop:
                     print(f"Warning: Property {property_id} not found in data")
                     continue
             
             # Format price
-            price = prop.get("price", 0)
-            if isinstance(price, str):
-                try:
-                    price = float(price.replace(',', '').replace('₹', '').replace('Rs', '').replace('$', '').strip())
-                except (ValueError, AttributeError):
-                    price = 0
+            price = get_price(prop)
             
-            if not isinstance(price, (int, float)):
-                price = 0
-            
-            # Format price string
-            prop_location = prop.get("location", "")
-            if is_indian_city(prop_location):
+            # Format price string in the property's currency
+            currency = get_currency(prop)
+            if currency == "INR":
                 if price >= 10000000:
                     price_str = f"₹{price/10000000:.1f}Cr"
                 elif price >= 100000:
@@ -142,7 +126,7 @@ async def get_saved_properties(
                 else:
                     price_str = f"₹{price:,.0f}" if price > 0 else "Price on request"
             else:
-                price_str = f"${price:,.0f}" if price > 0 else "Price on request"
+                price_str = f"{currency_symbol(currency)}{price:,.0f}" if price > 0 else "Price on request"
             
             # Get bedrooms
             bedrooms_count = prop.get("bedrooms") or prop.get("bedrooms_count") or prop.get("bhk") or 0
@@ -0,0 +1,462 @@
+"""
+Versioned, copy-on-write property catalog
+
+The catalog lives in an immutable CatalogSnapshot. Readers grab the current
+snapshot once (a single reference read) and work on it for the whole request,
+so they never block and never see a half-applied update. Writers build the
+next snapshot from the previous one - carrying over untouched records and
+updating derived indexes incrementally - and publish it with one reference
+swap under a writer lock.
+
+Changes arrive in three ways:
+- apply_changes() - upserts/deletes of individual properties (admin API)
+- the update journal (data/catalog_updates.ndjson) - every admin change is
+  appended there so other worker processes, and the next restart, replay it
+- the file watcher - when the JSON sources change on disk they are re-read
+  and diffed against the current snapshot, applying only what changed. It
+  also picks up currency rate changes (sync_rates), which rebuild only the
+  indexes holding converted prices.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+JOURNAL_FILENAME = "catalog_updates.ndjson"
+
+
+class CatalogIndex:
+    """
+    Base class for derived indexes kept in sync with the catalog
+
+    Subclasses set `name`, implement build() and may override apply() to
+    update incrementally. Indexes are immutable: apply() returns a new index
+    and must not modify self, which older snapshots still reference.
+    Indexes holding converted (INR) prices set `price_dependent` so they are
+    rebuilt when currency rates change.
+    """
+    name = ""
+    price_dependent = False
+
+    @classmethod
+    def build(cls, records: Dict[Any, Dict]) -> "CatalogIndex":
+        raise NotImplementedError
+
+    def apply(
+        self,
+        records: Dict[Any, Dict],
+        upserted: Dict[Any, Dict],
+        deleted: Dict[Any, Dict],
+        previous: Dict[Any, Dict],
+    ) -> "CatalogIndex":
+        """
+        Return an index reflecting a set of changes
+
+        Args:
+            records: Records of the new snapshot, by id
+            upserted: New versions of inserted/updated records, by id
+            deleted: Removed records, by id
+            previous: Old versions of updated records, by id
+
+        The default implementation rebuilds from scratch.
+        """
+        return type(self).build(records)
+
+
+# Index classes maintained for every snapshot, in registration order
+_INDEX_TYPES: List[type] = []
+
+
+def register_index(index_type: type) -> type:
+    """Register a CatalogIndex subclass (usable as a class decorator)"""
+    if index_type not in _INDEX_TYPES:
+        _INDEX_TYPES.append(index_type)
+        # Build it for an already loaded catalog
+        if _SNAPSHOT is not None:
+            with _WRITE_LOCK:
+                _publish(CatalogSnapshot(
+                    _SNAPSHOT.version,
+                    _SNAPSHOT.by_id,
+                    {**_SNAPSHOT.indexes, index_type.name: index_type.build(_SNAPSHOT.by_id)},
+                ))
+    return index_type
+
+
+class CatalogSnapshot:
+    """Immutable view of the catalog at one version"""
+    __slots__ = ("version", "by_id", "records", "positions", "indexes")
+
+    def __init__(self, version: int, by_id: Dict[Any, Dict], indexes: Dict[str, CatalogIndex]):
+        self.version = version
+        self.by_id = by_id
+        self.records = list(by_id.values())
+        # Catalog order of each id, for ordering index lookups
+        self.positions = {pid: i for i, pid in enumerate(by_id)}
+        self.indexes = indexes
+
+    def get(self, property_id) -> Optional[Dict]:
+        """Look up a property by id (accepts the id as int or str)"""
+        return self.by_id.get(normalize_id(property_id))
+
+    def index(self, name: str) -> Optional[CatalogIndex]:
+        """Return a registered index by name"""
+        return self.indexes.get(name)
+
+
+_SNAPSHOT: Optional[CatalogSnapshot] = None
+_WRITE_LOCK = threading.RLock()
+_LISTENERS: List[Callable[[CatalogSnapshot], None]] = []
+
+# Journal read position (bytes) and file identity for this process
+_journal_offset = 0
+_journal_inode = None
+
+# Watcher interval when CATALOG_WATCH_INTERVAL is unset and more than one worker runs
+MULTI_WORKER_WATCH_INTERVAL = 2.0
+
+# File watcher state
+_watch_thread: Optional[threading.Thread] = None
+_watch_stop = threading.Event()
+_source_mtimes: Dict[str, float] = {}
+
+
+def normalize_id(property_id):
+    """Ids in the feed are ints; accept their string form from URLs too"""
+    if isinstance(property_id, str) and property_id.strip().lstrip("-").isdigit():
+        return int(property_id)
+    return property_id
+
+
+def _publish(snapshot: CatalogSnapshot):
+    """Swap in a new snapshot and notify listeners (caller holds the lock)"""
+    global _SNAPSHOT
+    _SNAPSHOT = snapshot
+    for listener in _LISTENERS:
+        try:
+            listener(snapshot)
+        except Exception as e:
+            print(f"Warning: Catalog listener failed: {e}")
+
+
+def add_listener(listener: Callable[[CatalogSnapshot], None]):
+    """Call `listener(snapshot)` every time a new catalog version is published"""
+    _LISTENERS.append(listener)
+
+
+def _journal_path() -> Path:
+    from services.data_service import DATA_DIR
+    return DATA_DIR / JOURNAL_FILENAME
+
+
+def _build_snapshot(records: Iterable[Dict], version: int) -> CatalogSnapshot:
+    by_id = {}
+    for record in records:
+        by_id[normalize_id(record["id"])] = record
+    indexes = {index_type.name: index_type.build(by_id) for index_type in _INDEX_TYPES}
+    return CatalogSnapshot(version, by_id, indexes)
+
+
+def get_snapshot() -> CatalogSnapshot:
+    """Return the current catalog snapshot, loading the catalog on first use"""
+    snapshot = _SNAPSHOT
+    if snapshot is not None:
+        return snapshot
+    with _WRITE_LOCK:
+        if _SNAPSHOT is None:
+            reload_catalog()
+        return _SNAPSHOT
+
+
+def reload_catalog() -> CatalogSnapshot:
+    """Rebuild the catalog from the data files with the update journal replayed on top"""
+    from services.data_service import merge_json_data
+
+    global _journal_offset, _journal_inode
+    with _WRITE_LOCK:
+        _remember_source_mtimes()
+        by_id = {normalize_id(r["id"]): r for r in merge_json_data()}
+        _journal_offset, _journal_inode = _replay_journal(by_id)
+        version = _SNAPSHOT.version + 1 if _SNAPSHOT is not None else 1
+        _publish(_build_snapshot(by_id.values(), version))
+        return _SNAPSHOT
+
+
+def rebuild_indexes(predicate: Callable[[type], bool]) -> CatalogSnapshot:
+    """
+    Rebuild the indexes whose class matches `predicate` as a new version
+
+    The records are unchanged; the new version tells caches keyed on it
+    that derived data (e.g. converted prices) has changed.
+    """
+    with _WRITE_LOCK:
+        current = get_snapshot()
+        indexes = {
+            index_type.name: index_type.build(current.by_id) if predicate(index_type) else current.indexes[index_type.name]
+            for index_type in _INDEX_TYPES
+        }
+        _publish(CatalogSnapshot(current.version + 1, current.by_id, indexes))
+        return _SNAPSHOT
+
+
+def sync_rates() -> bool:
+    """
+    Re-read the currency rates file and, if the rates changed, recompute
+    converted prices (rebuild price-dependent indexes)
+
+    Returns:
+        True if the rates had changed
+    """
+    from core.currency import refresh_rates
+
+    with _WRITE_LOCK:
+        if not refresh_rates() or _SNAPSHOT is None:
+            return False
+        rebuild_indexes(lambda index_type: index_type.price_dependent)
+        print(f"💱 Catalog v{_SNAPSHOT.version}: prices converted at the new currency rates")
+        return True
+
+
+def apply_changes(
+    upserts: Iterable[Dict] = (),
+    deletes: Iterable[Any] = (),
+    merge: bool = False,
+) -> CatalogSnapshot:
+    """
+    Apply upserts and deletes to the in-memory catalog as one new version
+
+    Args:
+        upserts: Property records; each must contain an "id"
+        deletes: Ids of properties to remove
+        merge: If True, upserts are merged into existing records instead of
+               replacing them
+
+    Returns:
+        The published snapshot (the current one if nothing changed)
+    """
+    with _WRITE_LOCK:
+        current = get_snapshot()
+        by_id = dict(current.by_id)
+        upserted: Dict[Any, Dict] = {}
+        deleted: Dict[Any, Dict] = {}
+        previous: Dict[Any, Dict] = {}
+
+        for record in upserts:
+            pid = normalize_id(record["id"])
+            old = by_id.get(pid)
+            new = {**old, **record} if merge and old is not None else dict(record)
+            if new == old:
+                continue
+            if old is not None and pid not in previous:
+                previous[pid] = old
+            by_id[pid] = new
+            upserted[pid] = new
+
+        for property_id in deletes:
+            pid = normalize_id(property_id)
+            old = by_id.pop(pid, None)
+            if old is None:
+                continue
+            if upserted.pop(pid, None) is not None:
+                if pid not in previous:
+                    continue  # Inserted and deleted within this batch
+                # Updated and deleted in the same batch - it's the original that goes away
+                old = previous.pop(pid)
+            deleted[pid] = old
+
+        if not upserted and not deleted:
+            return current
+
+        indexes = {
+            name: index.apply(by_id, upserted, deleted, previous)
+            for name, index in current.indexes.items()
+        }
+        _publish(CatalogSnapshot(current.version + 1, by_id, indexes))
+        print(f"📝 Catalog v{_SNAPSHOT.version}: {len(upserted)} upserted, {len(deleted)} deleted")
+        return _SNAPSHOT
+
+
+def record_changes(
+    upserts: List[Dict] = (),
+    deletes: List[Any] = (),
+    merge: bool = False,
+) -> CatalogSnapshot:
+    """
+    Persist changes to the update journal, then apply them
+
+    Other worker processes pick the change up from the journal through their
+    file watcher, and restarts replay it on top of the data files.
+    """
+    entry = {"upserts": list(upserts), "deletes": list(deletes), "merge": merge}
+    with _WRITE_LOCK:
+        with open(_journal_path(), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        # Apply through the journal so this process reads its own entry
+        # exactly like every other process does
+        sync_journal()
+        return get_snapshot()
+
+
+def _read_journal(offset: int):
+    """
+    Yield (entry, offset after entry) for complete journal lines past `offset`
+
+    A trailing line without a newline is a write in progress and is left for
+    the next read.
+    """
+    path = _journal_path()
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                entry["upserts"], entry["deletes"]
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"Warning: Skipping bad catalog journal entry: {e}")
+                continue
+            yield entry, offset
+
+
+def _journal_identity():
+    try:
+        return _journal_path().stat().st_ino
+    except FileNotFoundError:
+        return None
+
+
+def _replay_journal(by_id: Dict[Any, Dict]):
+    """
+    Apply the whole journal to a plain id -> record dict
+
+    Returns:
+        (offset, inode) of the journal that was read
+    """
+    inode = _journal_identity()
+    offset = 0
+    for entry, offset in _read_journal(0):
+        for record in entry["upserts"]:
+            pid = normalize_id(record["id"])
+            old = by_id.get(pid)
+            by_id[pid] = {**old, **record} if entry.get("merge") and old is not None else dict(record)
+        for property_id in entry["deletes"]:
+            by_id.pop(normalize_id(property_id), None)
+    return offset, inode
+
+
+def sync_journal() -> int:
+    """
+    Apply journal entries written since the last sync
+
+    Returns:
+        Number of entries applied
+    """
+    global _journal_offset, _journal_inode
+    with _WRITE_LOCK:
+        inode = _journal_identity()
+        if inode is None:
+            _journal_offset, _journal_inode = 0, None
+            return 0
+        if inode != _journal_inode:
+            if _journal_inode is not None or _journal_offset:
+                # Journal was replaced - rebuild so entries aren't applied twice
+                reload_catalog()
+                return 0
+            _journal_inode = inode
+
+        applied = 0
+        for entry, offset in _read_journal(_journal_offset):
+            _journal_offset = offset
+            apply_changes(entry["upserts"], entry["deletes"], entry.get("merge", False))
+            applied += 1
+        return applied
+
+
+def _remember_source_mtimes():
+    from services.data_service import SOURCE_NAMES, resolve_source
+
+    _source_mtimes.clear()
+    for name in SOURCE_NAMES:
+        path = resolve_source(name)
+        _source_mtimes[str(path)] = path.stat().st_mtime if path.exists() else 0.0
+
+
+def _sources_changed() -> bool:
+    from services.data_service import SOURCE_NAMES, resolve_source
+
+    for name in SOURCE_NAMES:
+        path = resolve_source(name)
+        mtime = path.stat().st_mtime if path.exists() else 0.0
+        if _source_mtimes.get(str(path)) != mtime:
+            return True
+    return False
+
+
+def sync_sources() -> bool:
+    """
+    Re-read the data files if they changed and apply only the differences
+
+    The journal is replayed on top of the new files before diffing, so admin
+    changes survive and readers go straight from the old version to the new.
+
+    Returns:
+        True if the files had changed
+    """
+    from services.data_service import merge_json_data
+
+    global _journal_offset, _journal_inode
+    with _WRITE_LOCK:
+        if not _sources_changed():
+            return False
+        _remember_source_mtimes()
+        current = get_snapshot()
+        fresh = {normalize_id(r["id"]): r for r in merge_json_data()}
+        _journal_offset, _journal_inode = _replay_journal(fresh)
+        upserts = [r for pid, r in fresh.items() if current.by_id.get(pid) != r]
+        deletes = [pid for pid in current.by_id if pid not in fresh]
+        apply_changes(upserts, deletes)
+        return True
+
+
+def _watch_loop(interval: float):
+    while not _watch_stop.wait(interval):
+        try:
+            sync_sources()
+            sync_journal()
+            sync_rates()
+        except Exception as e:
+            print(f"Warning: Catalog watcher error: {e}")
+
+
+def start_watcher(interval: float) -> bool:
+    """
+    Poll the data files, update journal and currency rates every `interval` seconds
+
+    Returns:
+        True if a watcher was started
+    """
+    global _watch_thread
+    if interval <= 0 or (_watch_thread is not None and _watch_thread.is_alive()):
+        return False
+    _watch_stop.clear()
+    _watch_thread = threading.Thread(target=_watch_loop, args=(interval,), name="catalog-watcher", daemon=True)
+    _watch_thread.start()
+    print(f"👀 Watching catalog files every {interval:g}s (pid {os.getpid()})")
+    return True
+
+
+def stop_watcher():
+    """Stop the file watcher thread"""
+    global _watch_thread
+    _watch_stop.set()
+    if _watch_thread is not None:
+        _watch_thread.join(timeout=5)
+        _watch_thread = None
@@ -1,8 +1,34 @@
+import asyncio
+import contextvars
+import functools
 import random
-from nlp import extract_with_hybrid, extract_filters, is_llm_available
-from services.data_service import filter_properties
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from starlette.concurrency import run_in_threadpool
+from core.cache import run_cache_op
+from core.config import settings
+from core.currency import currency_symbol
+from nlp import extract_with_hybrid, is_llm_available
+from services.property_repository import get_property_repository
+from services.chat_sessions import merge_preferences
+from services.data_service import get_currency
+from services.ranking import rank_properties
+from services.reply_cache import reply_cache, reply_key
 from services.gemini_service import generate_chat_response, enhance_response_with_properties, is_gemini_available
-from typing import Dict, Optional, List
+from typing import Any, Callable, Dict, Optional, List
+
+# Number of properties returned to the frontend
+MAX_RESULTS = 6
+
+# Threads for LLM stages run under the chat deadline. Unlike
+# run_in_threadpool, a call awaited here can be abandoned when it times out.
+_stage_executor: Optional[ThreadPoolExecutor] = None
+
+# Stages submitted but not started or cancelled yet (the executor's own
+# queue still counts cancelled jobs until a thread gets to them)
+_queued_stages = 0
+_queued_lock = threading.Lock()
 
 # Random response messages for different scenarios
 GREETING_RESPONSES = [
@@ -38,6 +64,75 @@ def get_random_response(responses: List[str]) -> str:
     """Get a random response from a list"""
     return random.choice(responses)
 
+def _get_stage_executor() -> ThreadPoolExecutor:
+    global _stage_executor
+    if _stage_executor is None:
+        _stage_executor = ThreadPoolExecutor(
+            max_workers=settings.CHAT_STAGE_WORKERS, thread_name_prefix="chat-stage"
+        )
+    return _stage_executor
+
+def _count_queued(delta: int):
+    global _queued_stages
+    with _queued_lock:
+        _queued_stages += delta
+
+def stage_queue_depth() -> int:
+    """LLM stages waiting for a stage thread (admission control reads it)"""
+    return _queued_stages
+
+async def _run_stage(
+    stage: str,
+    deadline: Optional[float],
+    degraded: List[str],
+    func: Callable[..., Any],
+    *args,
+    **kwargs
+) -> Any:
+    """
+    Run a blocking LLM stage in a thread, giving up when the deadline passes
+    
+    A stage that misses the deadline while still queued for a stage thread
+    is cancelled, so answered requests don't keep adding Gemini calls to
+    the backlog. A running thread can't be interrupted, so a stage that is
+    already running is abandoned: it finishes in the background and its
+    result is dropped.
+    
+    Args:
+        stage: Stage name reported in the response's "degraded" list
+        deadline: time.monotonic() deadline, or None for no deadline
+        degraded: Stages that missed the deadline (appended to)
+        func: Blocking function to run (with *args and **kwargs)
+    
+    Returns:
+        func's result, or None if the stage missed the deadline
+    """
+    timeout = None if deadline is None else deadline - time.monotonic()
+    if timeout is not None and timeout <= 0:
+        print(f"⏱️  Chat deadline passed, skipping {stage}")
+        degraded.append(stage)
+        return None
+    
+    # Carry the request context (LLM usage accounting) into the thread
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    
+    def run_stage():
+        _count_queued(-1)
+        return call()
+    
+    _count_queued(1)
+    job = _get_stage_executor().submit(run_stage)
+    future = asyncio.wrap_future(job)
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+    except asyncio.TimeoutError:
+        print(f"⏱️  Chat deadline passed during {stage}, falling back")
+        degraded.append(stage)
+        if job.cancel():
+            # Still queued: it never runs
+            _count_queued(-1)
+        return None
+
 def _is_property_search(message: str, filters: Optional[Dict]) -> bool:
     """Check if user is searching for properties"""
     message_lower = message.lower().strip()
@@ -58,28 +153,71 @@ def _is_property_search(message: str, filters: Optional[Dict]) -> bool:
     
     return has_search_keywords or has_filters
 
-def handle_chat(message: str, filters: Optional[Dict[str, Optional[str]]] = None) -> Dict:
+def _get_search_terms(extraction_result: Optional[Dict]) -> Optional[str]:
+    """Build a free-text search query from extracted amenities and property type"""
+    if not extraction_result:
+        return None
+    terms = []
+    amenities = extraction_result.get("amenities")
+    if isinstance(amenities, list):
+        terms.extend(a for a in amenities if isinstance(a, str))
+    if isinstance(extraction_result.get("property_type"), str):
+        terms.append(extraction_result["property_type"])
+    return " ".join(terms) or None
+
+async def handle_chat(
+    message: str,
+    filters: Optional[Dict[str, Optional[str]]] = None,
+    session_preferences: Optional[Dict] = None,
+    defer_preferences: bool = False
+) -> Dict:
     """
     Handle chat messages and return properties with response
     Enhanced with Gemini AI for natural conversations
+
+    Blocking NLP and Gemini calls run in threads; properties come from the
+    configured property repository. The LLM stages share a latency budget
+    of CHAT_DEADLINE_MS: a stage still running when it runs out is
+    abandoned, and rule-based extraction or the fallback reply is used
+    instead.
+    
+    Results are ranked with the preferences of the session's earlier
+    turns. With defer_preferences, this message's preferences aren't
+    extracted here: the caller extracts them in the background and stores
+    them on the session (see services/chat_sessions.py). The result depends
+    on the session only through session_preferences, so identical messages
+    from sessions with the same preferences can share one call.
     
     Args:
         message: User's chat message
         filters: Optional filters dict with location, budget, bedrooms
+        session_preferences: Preferences learned from the session's earlier turns
+        defer_preferences: Leave preference extraction to the caller
     
     Returns:
-        Dict with response message and properties
+        Dict with response message, properties, filters, the stages that
+        were degraded by the deadline ("extraction", "reply") and whether
+        preference extraction was deferred ("preferences_deferred")
     """
     message_lower = message.lower().strip()
     use_gemini = is_gemini_available()
     use_llm_nlp = is_llm_available()
+    deadline = time.monotonic() + settings.CHAT_DEADLINE_MS / 1000 if settings.CHAT_DEADLINE_MS > 0 else None
+    degraded: List[str] = []
+    preferences_deferred = False
     
     # Use hybrid NLP extraction (rules + LLM)
     extraction_result = None
     if not filters:
         try:
-            # Try hybrid extraction if LLM is available, otherwise use rules only
-            extraction_result = extract_with_hybrid(message, use_llm=use_llm_nlp)
+            # Hybrid extraction: rules first, LLM only for ambiguous messages
+            extraction_result = await _run_stage(
+                "extraction", deadline, degraded, extract_with_hybrid, message,
+                use_llm=use_llm_nlp, defer_preferences=defer_preferences
+            )
+            if extraction_result is None:
+                # Out of time: rules and the local intent model only
+                extraction_result = await run_in_threadpool(extract_with_hybrid, message, use_llm=False)
             filters = {
                 "location": extraction_result.get("location"),
                 "budget": extraction_result.get("budget"),
@@ -91,13 +229,17 @@ def handle_chat(message: str, filters: Optional[Dict[str, Optional[str]]] = None
             if any(filters.values()):
                 print(f"🔍 Extracted using {method}: {filters}")
             
+            # Preferences only refine ranking, so they are extracted off the
+            # critical path and used from the session's next turn
+            preferences_deferred = bool(extraction_result.get("preferences_deferred"))
+            
         except Exception as e:
             print(f"Error extracting filters: {e}")
             filters = {}
             extraction_result = {}
     
     # Determine if this is a property search using intent if available
-    if extraction_result and extraction_result.get("intent"):
+    if extraction_result and extraction_result.get("intent") not in (None, "unclear", "unknown"):
         intent = extraction_result["intent"]
         is_property_search = intent in ["property_search", "general_inquiry"]
         print(f"🎯 Intent: {intent} (confidence: {extraction_result.get('intent_confidence', 0):.2f})")
@@ -106,16 +248,57 @@ def handle_chat(message: str, filters: Optional[Dict[str, Optional[str]]] = None
     
     # Only filter properties if user is searching for properties
     results = []
+    matches = []
     if is_property_search:
         location = filters.get("location") if filters else None
         budget = filters.get("budget") if filters else None
         bedrooms = filters.get("bedrooms") if filters else None
         
-        results = filter_properties(
+        repository = get_property_repository()
+        results = await repository.search(
             location=location,
             budget=budget,
             bedrooms=bedrooms
         )
+        
+        # Properties matching the extracted amenities / property type (BM25
+        # over titles and amenities) come before the rest
+        search_terms = _get_search_terms(extraction_result)
+        if results and search_terms:
+            matches = await repository.search(
+                location=location,
+                budget=budget,
+                bedrooms=bedrooms,
+                query=search_terms
+            )
+            if matches:
+                print(f"🔎 {len(matches)} properties match: {search_terms}")
+    
+    # Preferences learned from the session's earlier turns, refined by any
+    # extracted from this message
+    preferences = merge_preferences(
+        session_preferences,
+        extraction_result.get("preferences") if extraction_result else None
+    )
+    
+    # Rank candidates against the extracted preferences and keep the best
+    # few - the reply and the frontend only ever use the top results.
+    # Keyword matches are ranked first; the rest only fill remaining slots.
+    property_count = len(results)
+    if results:
+        rank = functools.partial(
+            rank_properties,
+            budget=filters.get("budget") if filters else None,
+            amenities=extraction_result.get("amenities") if extraction_result else None,
+            property_type=extraction_result.get("property_type") if extraction_result else None,
+            preferences=preferences,
+            query=message
+        )
+        matched_ids = {str(p.get("id")) for p in matches}
+        rest = [p for p in results if str(p.get("id")) not in matched_ids]
+        results = rank(matches, k=MAX_RESULTS) if matches else []
+        if len(results) < MAX_RESULTS and rest:
+            results += rank(rest, k=MAX_RESULTS - len(results))
     
     # Generate response message using Gemini if available, otherwise use fallback
     # IMPORTANT: Only pass actual properties that exist in the database
@@ -125,21 +308,35 @@ def handle_chat(message: str, filters: Optional[Dict[str, Optional[str]]] = None
             # Only pass properties that actually exist (results from filter_properties)
             context = {
                 "filters": filters if is_property_search else {},
-                "has_properties": len(results) > 0,
-                "property_count": len(results),
+                "has_properties": property_count > 0,
+                "property_count": property_count,
                 "intent": extraction_result.get("intent") if extraction_result else None,
-                "preferences": extraction_result.get("preferences", {}) if extraction_result else {}
+                "preferences": preferences
             }
             
             # Only pass actual properties from database - never make up properties
             actual_properties = results[:5] if results else []  # Limit to 5 for context
             
-            gemini_response = generate_chat_response(
-                user_message=message,
-                context=context,
-                properties=actual_properties,  # Only actual properties from database
-                is_property_search=is_property_search
+            # Repeat searches reuse a cached reply instead of calling Gemini
+            cache_key = reply_key(
+                context["intent"], context["filters"], actual_properties, is_property_search, message
             )
+            gemini_response = await run_cache_op(reply_cache.backend, reply_cache.get, cache_key)
+            if gemini_response is None:
+                def generate_and_cache() -> Optional[str]:
+                    reply = generate_chat_response(
+                        user_message=message,
+                        context=context,
+                        properties=actual_properties,  # Only actual properties from database
+                        is_property_search=is_property_search
+                    )
+                    # Cached from the stage thread, so a reply arriving after
+                    # the deadline still serves the next request
+                    if reply:
+                        reply_cache.put(cache_key, reply)
+                    return reply
+                
+                gemini_response = await _run_stage("reply", deadline, degraded, generate_and_cache)
             
             if gemini_response:
                 reply = gemini_response
@@ -155,17 +352,13 @@ def handle_chat(message: str, filters: Optional[Dict[str, Optional[str]]] = None
     
     # Format properties for frontend
     properties = []
-    for prop in results[:6]:  # Limit to 6 properties
-        # Format price based on location (USD for US, INR for India)
+    for prop in results[:MAX_RESULTS]:
+        # Format price in the property's currency (resolved when the catalog loaded)
         price = prop.get("price", 0)
-        prop_location = prop.get("location", "")
-        
-        # Check if it's an Indian city
-        from services.data_service import is_indian_city
-        is_india = is_indian_city(prop_location)
+        currency = get_currency(prop)
         
         if isinstance(price, (int, float)):
-            if is_india:
+            if currency == "INR":
                 # Format in Indian currency (INR)
                 if price >= 10000000:
                     price_str = f"₹{price/10000000:.1f}Cr"
@@ -174,8 +367,7 @@ def handle_chat(message: str, filters: Optional[Dict[str, Optional[str]]] = None
                 else:
                     price_str = f"₹{price:,}"
             else:
-                # Format in US currency (USD)
-                price_str = f"${price:,.0f}"
+                price_str = f"{currency_symbol(currency)}{price:,.0f}"
         else:
             price_str = str(price)
         
@@ -199,7 +391,9 @@ def handle_chat(message: str, filters: Optional[Dict[str, Optional[str]]] = None
     return {
         "response": reply,
         "properties": properties,
-        "filters": filters or {}
+        "filters": filters or {},
+        "degraded": degraded,
+        "preferences_deferred": preferences_deferred
     }
 
 def _generate_fallback_response(results: List[Dict], filters: Dict, message_lower: str = "", is_property_search: bool = False) -> str:
@@ -0,0 +1,132 @@
+"""
+Per-session chat state
+
+Preference extraction (an LLM call) only refines ranking, so it is kept
+off the chat critical path: a turn is answered as soon as its filters and
+results are ready, and the message's preferences are extracted by a
+background task afterwards. The result is stored on the user's chat
+session and used to rank the results of that session's next turns.
+
+Sessions are identified by the session_id the chat route hands out and
+the client sends back. Their preferences are stored in the configured cache
+backend (core/cache.py): with CACHE_BACKEND=redis every worker and instance
+sees them; with the default in-memory backend they are per worker, so only
+a single worker (WEB_CONCURRENCY=1) keeps them across turns. Either way
+sessions expire after CHAT_SESSION_TTL seconds of inactivity, and the
+in-memory backend keeps at most CHAT_SESSIONS_MAX (least recently used are
+evicted).
+"""
+import asyncio
+import re
+import uuid
+from typing import Dict, Optional, Set
+from starlette.concurrency import run_in_threadpool
+from core.cache import CacheBackend, create_cache, run_cache_op
+from core.config import settings
+from nlp import extract_preferences_with_llm
+from services.single_flight import SingleFlight, normalize_message
+
+# Client-supplied session ids must look like ids we hand out
+_SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+# Preferences that accumulate across turns; other fields are replaced
+_LIST_PREFERENCES = ("must_haves", "nice_to_haves", "deal_breakers")
+
+
+def merge_preferences(current: Dict, new: Dict) -> Dict:
+    """
+    Fold newly extracted preferences into a session's preferences
+
+    List preferences (must-haves, nice-to-haves, deal breakers) are unioned;
+    other fields take the newer non-null value.
+    """
+    merged = dict(current or {})
+    for key, value in (new or {}).items():
+        if value in (None, "", []):
+            continue
+        if key in _LIST_PREFERENCES:
+            values = value if isinstance(value, list) else [value]
+            existing = merged.get(key) or []
+            merged[key] = existing + [v for v in values if v not in existing]
+        else:
+            merged[key] = value
+    return merged
+
+
+class ChatSessions:
+    """Chat session preferences in a CacheBackend, expiring after inactivity"""
+
+    def __init__(self, backend: CacheBackend, max_sessions: int, ttl: float):
+        self.backend = backend
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        # Running background tasks (referenced so they aren't garbage collected)
+        self._tasks: Set[asyncio.Task] = set()
+        # Sessions sending the same message at once share one extraction
+        self._extractions = SingleFlight("preferences")
+        self.stats = {"refinements": 0, "errors": 0}
+
+    def resolve(self, session_id: Optional[str]) -> str:
+        """Return the client's session id if valid, otherwise a new one"""
+        if session_id and _SESSION_ID_PATTERN.fullmatch(session_id):
+            return session_id
+        return uuid.uuid4().hex
+
+    def get_preferences(self, session_id: Optional[str]) -> Dict:
+        """Preferences learned from the session's earlier turns"""
+        preferences = self.backend.get(session_id) if session_id else None
+        if not preferences:
+            return {}
+        # Activity extends the session
+        self.backend.set(session_id, preferences, ttl=self.ttl)
+        return preferences
+
+    def add_preferences(self, session_id: str, preferences: Dict):
+        """Merge preferences into the session (creating it if needed)"""
+        if self.max_sessions <= 0 or not preferences:
+            return
+        merged = merge_preferences(self.backend.get(session_id) or {}, preferences)
+        self.backend.set(session_id, merged, ttl=self.ttl)
+
+    def refine_in_background(self, session_id: str, message: str) -> asyncio.Task:
+        """
+        Extract the message's preferences after the turn has been answered
+
+        Args:
+            session_id: Session the preferences are stored on
+            message: User's chat message
+
+        Returns:
+            The background task
+        """
+        task = asyncio.ensure_future(self._refine(session_id, message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _refine(self, session_id: str, message: str):
+        try:
+            preferences = await self._extractions.do(
+                normalize_message(message), lambda: run_in_threadpool(extract_preferences_with_llm, message)
+            )
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"Error extracting preferences in the background: {e}")
+            return
+        self.stats["refinements"] += 1
+        if preferences:
+            await run_cache_op(self.backend, self.add_preferences, session_id, preferences)
+            print(f"🧩 Stored preferences for session {session_id[:8]}: {preferences}")
+
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
+
+chat_sessions = ChatSessions(
+    backend=create_cache("sessions", max_entries=settings.CHAT_SESSIONS_MAX, ttl=settings.CHAT_SESSION_TTL),
+    max_sessions=settings.CHAT_SESSIONS_MAX,
+    ttl=settings.CHAT_SESSION_TTL,
+)
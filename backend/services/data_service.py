@@ -1,14 +1,177 @@
 import json
+import re
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator, Tuple
+from services.catalog_store import CatalogIndex, register_index, get_snapshot, normalize_id
+from services.search_index import TextSearchIndex
+from services.semantic_index import SemanticIndex
+from services.location_index import LocationIndex, DEFAULT_RADIUS_KM
+from services.filter_cache import filter_cache, filter_key
+from services.http_cache import CatalogDigest  # noqa: F401 - registers the digest used for ETags
+from core.currency import BASE_CURRENCY, to_inr
+from nlp.budget import budget_bucket, bucket_for_range, parse_budget
 
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+SOURCE_NAMES = ["property_basics", "property_characteristics", "property_images"]
+
+# Weight of (normalised) BM25 scores relative to semantic similarity
+KEYWORD_WEIGHT = 0.5
+
+# Read size for streaming ingestion
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Per-source record schema: required fields and optional typed fields.
+# Records that fail validation are skipped with a warning during ingestion.
+RECORD_SCHEMAS = {
+    "property_basics": {
+        "required": {"id": (int, str), "title": (str,), "price": (int, float, str), "location": (str,)},
+        "optional": {"currency": (str,), "latitude": (int, float), "longitude": (int, float)},
+    },
+    "property_characteristics": {
+        "required": {"id": (int, str)},
+        "optional": {"bedrooms": (int, str), "bathrooms": (int, float, str), "size_sqft": (int, float), "amenities": (list,)},
+    },
+    "property_images": {
+        "required": {"id": (int, str)},
+        "optional": {"image_url": (str,)},
+    },
+}
+
+def resolve_source(name: str) -> Path:
+    """
+    Find the data file for a source, accepting JSON arrays or NDJSON
+
+    Args:
+        name: Source name without extension (e.g. "property_basics")
+
+    Returns:
+        Path to the first existing of name.json, name.ndjson, name.jsonl
+        (name.json if none exist)
+    """
+    for extension in (".json", ".ndjson", ".jsonl"):
+        path = DATA_DIR / f"{name}{extension}"
+        if path.exists():
+            return path
+    return DATA_DIR / f"{name}.json"
+
+def iter_json_records(path: Path) -> Iterator[Dict]:
+    """
+    Stream records from a JSON array or NDJSON file
+
+    The file is read in STREAM_CHUNK_SIZE chunks and decoded one record at a
+    time, so memory use is bounded by the largest single record rather than
+    the file size.
+
+    Raises:
+        FileNotFoundError: if the file doesn't exist
+        json.JSONDecodeError: on malformed input (records already yielded stay valid)
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+        in_array = None  # None until the first non-whitespace character is seen
+
+        def fill() -> bool:
+            nonlocal buffer, pos, eof
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                eof = True
+                return False
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+
+        def skip_whitespace() -> Optional[str]:
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if eof or not fill():
+                    return None
+
+        while True:
+            char = skip_whitespace()
+            if in_array is None:
+                if char is None:
+                    return
+                in_array = char == "["
+                if in_array:
+                    pos += 1
+                    char = skip_whitespace()
+                    if char == "]":
+                        return
+            elif in_array:
+                if char == "]":
+                    return
+                if char != ",":
+                    raise json.JSONDecodeError("Expected ',' or ']'", buffer, pos)
+                pos += 1
+                char = skip_whitespace()
+            if char is None:
+                if in_array:
+                    raise json.JSONDecodeError("Unterminated array", buffer, pos)
+                return
+
+            # Decode one value, pulling in more data until it is complete
+            while True:
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                    break
+                except json.JSONDecodeError:
+                    if eof or not fill():
+                        raise
+            pos = end
+            yield record
+
+def _validate_record(record, source: str) -> Optional[str]:
+    """Return a reason if the record doesn't match its source schema, else None"""
+    if not isinstance(record, dict):
+        return f"expected an object, got {type(record).__name__}"
+    schema = RECORD_SCHEMAS[source]
+    for field, types in schema["required"].items():
+        value = record.get(field)
+        if value is None:
+            return f"missing '{field}'"
+        if not isinstance(value, types) or isinstance(value, bool):
+            return f"'{field}' has invalid type {type(value).__name__}"
+    for field, types in schema["optional"].items():
+        value = record.get(field)
+        if value is not None and (not isinstance(value, types) or isinstance(value, bool)):
+            return f"'{field}' has invalid type {type(value).__name__}"
+    return None
+
+def stream_source(source: str) -> Iterator[Dict]:
+    """
+    Stream validated records of one source, skipping invalid ones
+
+    Missing files and malformed JSON are reported and end the stream early,
+    matching load_json's forgiving behaviour.
+    """
+    path = resolve_source(source)
+    skipped = 0
+    try:
+        for index, record in enumerate(iter_json_records(path)):
+            reason = _validate_record(record, source)
+            if reason:
+                skipped += 1
+                print(f"Warning: Skipping record {index} in {path.name}: {reason}")
+                continue
+            yield record
+    except FileNotFoundError:
+        print(f"Warning: {path.name} not found")
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON in {path.name}: {e}")
+    if skipped:
+        print(f"Warning: Skipped {skipped} invalid records in {path.name}")
 
 def load_json(filename: str) -> List[Dict]:
     """Load JSON data from file"""
     try:
-        with open(DATA_DIR / filename, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return list(iter_json_records(DATA_DIR / filename))
     except FileNotFoundError:
         print(f"Warning: {filename} not found")
         return []
@@ -18,154 +181,287 @@ def load_json(filename: str) -> List[Dict]:
 
 def merge_json_data() -> List[Dict]:
     """
-    Merge data from three JSON files:
+    Merge data from three JSON (or NDJSON) files:
     - property_basics.json (id, title, price, location)
     - property_characteristics.json (id, bedrooms, bathrooms, size_sqft, amenities)
     - property_images.json (id, image_url)
+
+    Sources are streamed one after another and joined by id as they are read:
+    basics create the merged records, characteristics and images are folded
+    into them in place. Only the merged catalog is ever held in memory, never
+    the raw lists. Records without a matching basics entry are dropped; for
+    duplicate ids the last record wins.
+    """
+    merged: Dict = {}
+    for record in stream_source("property_basics"):
+        merged[record["id"]] = dict(record)
+
+    for source in ("property_characteristics", "property_images"):
+        orphans = 0
+        for record in stream_source(source):
+            target = merged.get(record["id"])
+            if target is None:
+                orphans += 1
+                continue
+            target.update(record)
+        if orphans:
+            print(f"Warning: {orphans} records in {source} have no matching property")
+
+    return list(merged.values())
+
+def get_catalog() -> List[Dict]:
+    """
+    Return the merged property catalog, loading it on first use
+
+    The catalog is held in a versioned snapshot (see services/catalog_store).
+    In production the gunicorn master preloads it before forking so workers
+    share the pages copy-on-write.
     """
-    basics = load_json("property_basics.json")
-    chars = load_json("property_characteristics.json")
-    images = load_json("property_images.json")
+    return get_snapshot().records
 
-    # Create lookup dictionaries for faster merging
-    chars_dict = {c["id"]: c for c in chars}
-    images_dict = {i["id"]: i for i in images}
+def preload_catalog() -> int:
+    """
+    Load the property catalog eagerly so the first request doesn't pay for it
 
-    # Merge all data
-    merged = []
-    for p in basics:
-        pid = p["id"]
-        merged_property = {
-            **p,  # Start with basics
-            **chars_dict.get(pid, {}),  # Add characteristics
-            **images_dict.get(pid, {})  # Add images
-        }
-        merged.append(merged_property)
+    Returns:
+        Number of properties in the catalog
+    """
+    return len(get_catalog())
 
-    return merged
+def validate_property(record) -> Optional[str]:
+    """Validate a merged property record, returning the reason it is invalid (or None)"""
+    for source in RECORD_SCHEMAS:
+        reason = _validate_record(record, source)
+        if reason:
+            return reason
+    return None
 
 def parse_budget_range(budget: Optional[str]) -> tuple:
-    """Parse budget range string to min and max values in Rupees (INR)"""
-    if not budget:
-        return (0, float('inf'))
-    
-    budget_lower = budget.lower().replace(' ', '').replace('-', '').replace('+', '').strip()
-    
-    # Handle Indian budget ranges
-    if '0-50l' in budget_lower or '050l' in budget_lower or budget_lower == '0-50l':
-        return (0, 5000000)  # 0 to 50L (0 to 5M)
-    elif '50l-1cr' in budget_lower or '50l1cr' in budget_lower:
-        return (5000000, 10000000)  # 50L to 1Cr (5M to 10M)
-    elif '1cr-2cr' in budget_lower or '1cr2cr' in budget_lower:
-        return (10000000, 20000000)  # 1Cr to 2Cr (10M to 20M)
-    elif '2cr+' in budget_lower or ('2cr' in budget_lower and ('above' in budget_lower or 'more' in budget_lower or '+' in budget_lower)):
-        return (20000000, float('inf'))  # Above 2Cr
-    else:
-        # Try to parse as a single value and map to range
-        import re
-        num_match = re.search(r'(\d+(?:\.\d+)?)', budget_lower)
-        if num_match:
-            value = float(num_match.group(1))
-            # Check for multipliers (L, Cr, etc.)
-            if 'l' in budget_lower or 'lakh' in budget_lower:
-                value *= 100000
-            elif 'cr' in budget_lower or 'crore' in budget_lower:
-                value *= 10000000
-            
-            # Map to ranges
-            if value < 5000000:
-                return (0, 5000000)
-            elif value < 10000000:
-                return (5000000, 10000000)
-            elif value < 20000000:
-                return (10000000, 20000000)
-            else:
-                return (20000000, float('inf'))
-        
-        return (0, float('inf'))
+    """
+    Parse budget range string to min and max values in Rupees (INR)
+
+    Accepts bucket labels ("50L-1Cr"), arbitrary ranges ("20L-80L"), bounds
+    ("under 30 lakh", "3Cr+") and single amounts (snapped to their bucket);
+    see nlp/budget.py. Parses are memoized.
+    """
+    return parse_budget(budget)
+
+# Properties located in these cities are priced in INR unless they say otherwise
+INDIAN_CITIES = ["mumbai", "delhi", "bangalore", "pune", "gurgaon", "noida", "hyderabad", "chennai"]
+_INDIAN_CITY_PATTERN = re.compile("|".join(INDIAN_CITIES))
 
 def is_indian_city(location: str) -> bool:
     """Check if location is an Indian city"""
-    indian_cities = ["mumbai", "delhi", "bangalore", "pune", "gurgaon", "noida", "hyderabad", "chennai"]
-    location_lower = location.lower()
-    return any(city in location_lower for city in indian_cities)
+    return _INDIAN_CITY_PATTERN.search(location.lower()) is not None
+
+def resolve_currency(prop: Dict) -> str:
+    """
+    Currency a property is priced in
+
+    An explicit "currency" field wins; otherwise properties in Indian cities
+    are priced in INR and everything else in USD. BudgetIndex resolves this
+    once per property when the catalog loads (see get_currency).
+    """
+    currency = prop.get("currency")
+    if isinstance(currency, str) and currency.strip():
+        return currency.strip().upper()
+    return BASE_CURRENCY if is_indian_city(prop.get("location", "")) else "USD"
 
 def convert_usd_to_inr(usd_price: float) -> float:
-    """Convert USD to INR (approximate conversion rate: 83)"""
-    return usd_price * 83
+    """Convert USD to INR at the current rate (see core/currency.py)"""
+    return to_inr(usd_price, "USD")
+
+def get_price(prop: Dict) -> float:
+    """A property's price as a number, in its own currency"""
+    price = prop.get("price", 0)
+    # Ensure price is a number
+    if isinstance(price, str):
+        try:
+            price = float(re.sub(r"[,₹$€£]|rs", "", price.lower()).strip())
+        except ValueError:
+            price = 0
+    
+    if not isinstance(price, (int, float)) or isinstance(price, bool):
+        price = 0
+    return price
+
+def get_price_inr(prop: Dict) -> float:
+    """
+    Get a property's price in INR for budget comparisons
+
+    Prices may be numbers or formatted strings, in the property's currency
+    (resolve_currency), converted at the current rate.
+    """
+    return to_inr(get_price(prop), resolve_currency(prop))
+
+def get_bedroom_count(prop: Dict):
+    """Get the number of bedrooms, handling string formats like "3 BHK" """
+    prop_bedrooms = prop.get("bedrooms") or prop.get("bedrooms_count") or 0
+    if isinstance(prop_bedrooms, str):
+        match = re.search(r'(\d+)', prop_bedrooms)
+        if match:
+            prop_bedrooms = int(match.group(1))
+    return prop_bedrooms
+
+@register_index
+class BudgetIndex(CatalogIndex):
+    """
+    Each property's currency, INR price and budget bucket, computed once per
+    catalog version so budget filtering compares precomputed numbers
+
+    Rebuilt when currency rates change (price_dependent).
+    """
+    name = "budget"
+    price_dependent = True
+
+    def __init__(self, currency: Dict, price_inr: Dict, bucket: Dict):
+        self.currency = currency
+        self.price_inr = price_inr
+        self.bucket = bucket
+
+    @classmethod
+    def build(cls, records: Dict) -> "BudgetIndex":
+        index = cls({}, {}, {})
+        for pid, record in records.items():
+            index._add(pid, record)
+        return index
+
+    def _add(self, pid, record: Dict):
+        self.currency[pid] = resolve_currency(record)
+        self.price_inr[pid] = to_inr(get_price(record), self.currency[pid])
+        self.bucket[pid] = budget_bucket(self.price_inr[pid])
+
+    def apply(self, records, upserted, deleted, previous) -> "BudgetIndex":
+        patched = BudgetIndex(dict(self.currency), dict(self.price_inr), dict(self.bucket))
+        for pid in deleted:
+            patched.currency.pop(pid, None)
+            patched.price_inr.pop(pid, None)
+            patched.bucket.pop(pid, None)
+        for pid, record in upserted.items():
+            patched._add(pid, record)
+        return patched
+
+def get_currency(prop: Dict) -> str:
+    """Currency of a catalog property, as resolved when the catalog loaded"""
+    budget_index = get_snapshot().index(BudgetIndex.name)
+    currency = budget_index.currency.get(normalize_id(prop.get("id"))) if budget_index else None
+    return currency or resolve_currency(prop)
+
+def _blend_scores(keyword_scores: Dict, semantic_scores: Dict, keyword_max: float) -> Dict:
+    """
+    Combine BM25 and semantic similarity scores
+
+    BM25 scores are scaled to 0-1 by the best possible score for the query
+    (so matching one word of a long query counts for little) and weighted by
+    KEYWORD_WEIGHT. Properties that only match in meaning are still found
+    and ranked alongside keyword matches.
+    """
+    keyword_max = keyword_max or 1
+    return {
+        pid: KEYWORD_WEIGHT * keyword_scores.get(pid, 0) / keyword_max + semantic_scores.get(pid, 0)
+        for pid in keyword_scores.keys() | semantic_scores.keys()
+    }
 
 def filter_properties(
     location: Optional[str] = None, 
     budget: Optional[str] = None, 
-    bedrooms: Optional[str] = None
+    bedrooms: Optional[str] = None,
+    query: Optional[str] = None,
+    amenities: Optional[List[str]] = None,
+    near: Optional[Tuple[float, float]] = None,
+    radius_km: Optional[float] = None
 ) -> List[Dict]:
     """
     Filter properties based on location, budget, and bedrooms
     Handles both US properties (USD) and Indian properties (INR)
     
     Args:
-        location: City name (e.g., "Mumbai", "Delhi", "Bangalore", "Pune", "New York")
-        budget: Budget range (e.g., "0-50L", "50L-1Cr", "1Cr-2Cr")
+        location: City, state or locality, in any common spelling (e.g., "Mumbai",
+                  "Bengaluru", "NYC", "Austin, TX", "Texas")
+        budget: Budget range (e.g., "0-50L", "50L-1Cr", "20L-80L", "3Cr+");
+                ranges include their minimum and exclude their maximum
         bedrooms: Number of bedrooms (e.g., "1", "2", "3", "4")
+        query: Free text matched against titles, amenities and locations;
+               results are limited to properties matching it by keyword (BM25)
+               or meaning (SemanticIndex) and ordered by the blended score
+        amenities: Amenities every result must have (e.g., ["gym", "pool"])
+        near: (latitude, longitude) results must be within radius_km of;
+              without a query, results are ordered nearest first
+        radius_km: Search radius around `near` (default DEFAULT_RADIUS_KM)
     
     Returns:
         List of filtered properties with all merged data
     """
-    properties = merge_json_data()
+    # Work on one snapshot so concurrent catalog updates can't change the data mid-scan
+    snapshot = get_snapshot()
+    # Popular searches are answered from the cache while the catalog is unchanged
+    key = filter_key(location, budget, bedrooms, query, amenities, near, radius_km)
+    results = filter_cache.get(snapshot, key)
+    if results is None:
+        results = _filter_snapshot(snapshot, location, budget, bedrooms, query, amenities, near, radius_km)
+        filter_cache.put(snapshot, key, results)
+    return results
+
+def _filter_snapshot(snapshot, location, budget, bedrooms, query, amenities, near, radius_km) -> List[Dict]:
+    """filter_properties over one catalog snapshot, uncached"""
+    candidate_ids = snapshot.by_id.keys()
+    scores = None
+    matched_ids = None
+    distances = None
+    if location or near:
+        # Narrow by place and distance through the location index
+        location_index = snapshot.index(LocationIndex.name)
+        if location:
+            matched_ids = location_index.match(location)
+        if near:
+            distances = location_index.near(near[0], near[1], radius_km or DEFAULT_RADIUS_KM)
+            matched_ids = set(distances) if matched_ids is None else matched_ids & set(distances)
+    if query or amenities:
+        # Narrow the candidates through the inverted index instead of scanning
+        text_index = snapshot.index(TextSearchIndex.name)
+        if amenities:
+            amenity_ids = text_index.match_amenities(amenities)
+            matched_ids = amenity_ids if matched_ids is None else matched_ids & amenity_ids
+        if query:
+            scores = _blend_scores(
+                text_index.score(query),
+                snapshot.index(SemanticIndex.name).score(query),
+                text_index.max_score(query)
+            )
+            matched_ids = set(scores) if matched_ids is None else matched_ids & set(scores)
+    if matched_ids is not None:
+        # Candidates in catalog order (ties in score or distance keep that order too)
+        candidate_ids = sorted(matched_ids, key=snapshot.positions.__getitem__)
+    
+    # Budgets matching a bucket compare each property's precomputed bucket,
+    # other ranges its precomputed INR price
+    budget_index = snapshot.index(BudgetIndex.name)
     min_budget, max_budget = parse_budget_range(budget)
+    wanted_bucket = bucket_for_range((min_budget, max_budget)) if budget else None
     
     results = []
-    for p in properties:
-        prop_location = p.get("location", "")
-        
-        # Location filter (case-insensitive)
-        if location:
-            location_lower = location.lower()
-            prop_location_lower = prop_location.lower()
-            # Check if location matches (supports partial matches like "Mumbai" in "Mumbai, Maharashtra")
-            if location_lower not in prop_location_lower:
-                continue
+    for pid in candidate_ids:
+        p = snapshot.by_id[pid]
         
         # Budget filter
-        if budget:
-            price = p.get("price", 0)
-            # Ensure price is a number
-            if isinstance(price, str):
-                try:
-                    price = float(price.replace(',', '').replace('₹', '').replace('Rs', '').replace('$', '').strip())
-                except (ValueError, AttributeError):
-                    price = 0
-            
-            if not isinstance(price, (int, float)):
-                price = 0
-            
-            # Determine if property is in India or US
-            # If location contains Indian city, price is in INR
-            # Otherwise, assume USD and convert to INR for comparison
-            if is_indian_city(prop_location):
-                # Price is already in INR
-                price_inr = price
-            else:
-                # Price is in USD, convert to INR for comparison
-                price_inr = convert_usd_to_inr(price)
-            
+        if wanted_bucket is not None:
+            if budget_index.bucket[pid] != wanted_bucket:
+                continue
+        elif budget:
             # Check if price is in budget range
-            if price_inr < min_budget or price_inr > max_budget:
+            if not min_budget <= budget_index.price_inr[pid] < max_budget:
                 continue
         
         # Bedrooms filter
         if bedrooms:
-            prop_bedrooms = p.get("bedrooms") or p.get("bedrooms_count") or 0
-            # Handle string format like "3 BHK"
-            if isinstance(prop_bedrooms, str):
-                import re
-                match = re.search(r'(\d+)', prop_bedrooms)
-                if match:
-                    prop_bedrooms = int(match.group(1))
-            
-            if str(prop_bedrooms) != str(bedrooms):
+            if str(get_bedroom_count(p)) != str(bedrooms):
                 continue
         
         results.append(p)
     
+    if scores is not None:
+        results.sort(key=lambda p: scores[normalize_id(p["id"])], reverse=True)
+    elif distances is not None:
+        results.sort(key=lambda p: distances[normalize_id(p["id"])])
+    
     return results
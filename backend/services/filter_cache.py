@@ -0,0 +1,105 @@
+"""
+Cache of filter_properties results
+
+A handful of (location, budget, bedrooms) searches make up most traffic
+through both /properties and chat, so filter_properties results are cached
+under the normalized filters (see filter_key): "Bengaluru" and "bangalore",
+or "50L-1Cr" and "50l - 1cr", share an entry. Entries belong to one catalog
+version; with the in-memory backend the first lookup after the catalog
+changes drops them all.
+
+The cached value is the list of result ids, stored in the configured cache
+backend (core/cache.py) under the catalog's content version and the key.
+Content versions are the same in every worker and instance with the same
+catalog, so with CACHE_BACKEND=redis one instance's searches warm the
+cache for all of them.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from core.cache import CacheBackend, create_cache
+from core.config import settings
+from nlp.budget import normalize_budget
+from nlp.locations import canonical_location
+from services.catalog_store import CatalogSnapshot, normalize_id
+from services.http_cache import catalog_version
+from services.single_flight import normalize_message
+
+# Lifetime of cached results; entries of older catalog versions are never
+# read again, this only bounds how long they take up space in a shared backend
+FILTER_CACHE_TTL = 3600
+
+
+class FilterCache:
+    """Result ids per catalog content version and filter key"""
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.version: Optional[int] = None
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _is_current(self, snapshot: CatalogSnapshot) -> bool:
+        """
+        Track the newest snapshot seen; a private backend drops its entries
+        when the catalog changes (a shared one lets them expire)
+        """
+        if self.version is not None and snapshot.version < self.version:
+            # A reader still on an older snapshot
+            return False
+        if snapshot.version != self.version:
+            if self.version is not None and not self.backend.shared:
+                self.stats["invalidations"] += 1
+                self.backend.clear()
+            self.version = snapshot.version
+        return True
+
+    def get(self, snapshot: CatalogSnapshot, key: str) -> Optional[List[Dict]]:
+        """Cached results for key in a catalog snapshot, or None"""
+        ids = self.backend.get(f"{catalog_version(snapshot)}|{key}") if self._is_current(snapshot) else None
+        try:
+            results = [snapshot.by_id[pid] for pid in ids] if ids is not None else None
+        except (KeyError, TypeError):
+            results = None
+        self.stats["hits" if results is not None else "misses"] += 1
+        return results
+
+    def put(self, snapshot: CatalogSnapshot, key: str, results: List[Dict]):
+        """Cache results computed from a snapshot"""
+        if self._is_current(snapshot):
+            ids = [normalize_id(p["id"]) for p in results]
+            self.backend.set(f"{catalog_version(snapshot)}|{key}", ids)
+
+    def clear(self):
+        self.backend.clear()
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
+
+def filter_key(
+    location: Optional[str] = None,
+    budget: Optional[str] = None,
+    bedrooms: Optional[str] = None,
+    query: Optional[str] = None,
+    amenities: Optional[List[str]] = None,
+    near: Optional[Tuple[float, float]] = None,
+    radius_km: Optional[float] = None,
+) -> str:
+    """
+    Cache key for filter_properties arguments
+
+    Filters are put in canonical form first, so equivalent spellings of the
+    same search share a key.
+    """
+    parts: Dict[str, Any] = {
+        "location": canonical_location(location) if location else None,
+        "budget": (normalize_budget(budget) or budget.strip().lower()) if budget else None,
+        "bedrooms": str(bedrooms) if bedrooms else None,
+        "query": normalize_message(query) if query else None,
+        "amenities": sorted({normalize_message(a) for a in amenities}) if amenities else None,
+        "near": list(near) if near else None,
+        "radius_km": radius_km,
+    }
+    return json.dumps(parts, sort_keys=True)
+
+
+filter_cache = FilterCache(create_cache("filters", max_entries=settings.FILTER_CACHE_SIZE, ttl=FILTER_CACHE_TTL))
@@ -4,6 +4,7 @@ Gemini AI service for enhanced chat conversations
 import google.generativeai as genai
 from typing import Optional, List, Dict
 from core.config import settings
+from nlp.prompts import SEARCH_RESULTS_REPLY, SEARCH_NO_RESULTS_REPLY, GENERAL_CHAT_REPLY, ENHANCE_REPLY
 
 # Initialize Gemini client
 gemini_client = None
@@ -53,50 +54,12 @@ def generate_chat_response(
         return None
     
     try:
-        # Build system prompt with STRICT constraints
-        if is_property_search:
-            if properties and len(properties) > 0:
-                system_prompt = """You are Mira, a friendly and helpful AI real estate assistant.
-
-CRITICAL RULES:
-1. You can ONLY talk about properties that are provided to you in the properties list below
-2. DO NOT make up, invent, or hallucinate any properties that are not in the list
-3. DO NOT mention properties that don't exist in the database
-4. If a property is not in the provided list, it does NOT exist - do not reference it
-5. Keep responses concise (2-3 sentences max)
-6. Be conversational, warm, and professional
-7. Use emojis sparingly (max 1-2 per response)
-
-You found properties matching the user's search. Acknowledge this naturally and mention that you're showing them the best options."""
-            else:
-                # NO PROPERTIES FOUND - be clear about this
-                system_prompt = """You are Mira, a friendly and helpful AI real estate assistant.
-
-CRITICAL RULES:
-1. NO properties were found matching the user's criteria
-2. DO NOT make up or suggest properties that don't exist
-3. DO NOT say "I found some properties" or similar - you found ZERO properties
-4. Clearly state that no properties match their criteria
-5. Suggest they try different filters (location, budget, bedrooms)
-6. Be helpful and encouraging, but honest about the lack of results
-7. Keep responses concise (2-3 sentences max)
-8. Use emojis sparingly
-
-The user searched for properties but NO matches were found in the database."""
-        else:
-            system_prompt = """You are Mira, a friendly and helpful AI real estate assistant. 
-Your role is to help users find their dream properties. Be conversational, warm, and professional.
-Keep responses concise (2-3 sentences max) and natural. Use emojis sparingly.
-
-Engage in natural conversation. If the user is asking about properties, help them. If they're just chatting, be friendly and helpful.
-Always be encouraging and ready to help with property searches."""
-
         # Build context information
         context_info = ""
         if context and is_property_search:
             filters = context.get("filters", {})
             if filters and any(filters.values()):
-                context_info = "\nUser search preferences:\n"
+                context_info = "User search preferences:\n"
                 if filters.get("location"):
                     context_info += f"- Location: {filters['location']}\n"
                 if filters.get("budget"):
@@ -104,35 +67,32 @@ Always be encouraging and ready to help with property searches."""
                 if filters.get("bedrooms"):
                     context_info += f"- Bedrooms: {filters['bedrooms']}\n"
         
-        # Build properties info - ONLY if properties exist
-        properties_info = ""
-        if is_property_search:
-            if properties and len(properties) > 0:
-                # List actual properties that exist
-                properties_list = []
-                for i, prop in enumerate(properties[:5], 1):  # Limit to 5 for context
-                    title = prop.get('title', 'Property')
-                    location = prop.get('location', 'Unknown')
-                    price = prop.get('price', 'N/A')
-                    bedrooms = prop.get('bedrooms', 'N/A')
-                    properties_list.append(f"{i}. {title} in {location} - {price} ({bedrooms} bedrooms)")
-                
-                properties_info = f"\n\nACTUAL PROPERTIES FOUND IN DATABASE ({len(properties)} total):\n"
-                properties_info += "\n".join(properties_list)
-                properties_info += "\n\nIMPORTANT: You can ONLY reference these properties. Do not mention any other properties."
-            else:
-                properties_info = "\n\nNO PROPERTIES FOUND: The database search returned ZERO results. Do not suggest or mention any properties."
-        
-        # Build the full prompt
-        full_prompt = f"""{system_prompt}
-{context_info}{properties_info}
-
-User message: {user_message}
-
-Generate a natural, conversational response (2-3 sentences max) that strictly adheres to the rules above:"""
-
-        # Generate response
-        response = gemini_client.generate_content(full_prompt)
+        # Pick the template for the scenario - its static rules are
+        # precomputed (see nlp/prompts.py), only the context varies per call
+        if is_property_search and properties:
+            # List actual properties that exist - ONLY these can be referenced
+            properties_list = []
+            for i, prop in enumerate(properties[:5], 1):  # Limit to 5 for context
+                title = prop.get('title', 'Property')
+                location = prop.get('location', 'Unknown')
+                price = prop.get('price', 'N/A')
+                bedrooms = prop.get('bedrooms', 'N/A')
+                properties_list.append(f"{i}. {title} in {location} - {price} ({bedrooms} bedrooms)")
+            
+            response = SEARCH_RESULTS_REPLY.generate(
+                gemini_client,
+                context_info=context_info,
+                property_count=len(properties),
+                properties_list="\n".join(properties_list),
+                message=user_message
+            )
+        elif is_property_search:
+            # NO PROPERTIES FOUND - be clear about this
+            response = SEARCH_NO_RESULTS_REPLY.generate(
+                gemini_client, context_info=context_info, message=user_message
+            )
+        else:
+            response = GENERAL_CHAT_REPLY.generate(gemini_client, message=user_message)
         
         if response and response.text:
             return response.text.strip()
@@ -168,20 +128,11 @@ def enhance_response_with_properties(
             summary = f"{prop.get('title', 'Property')} in {prop.get('location', 'Unknown')} - {prop.get('price', 'N/A')}"
             properties_summary.append(summary)
         
-        prompt = f"""You are Mira, a real estate assistant. 
-A user asked about properties and I found {len(properties)} matching properties.
-
-Properties found:
-{chr(10).join(properties_summary)}
-
-Create a natural, conversational response (2-3 sentences) that:
-1. Acknowledges finding properties
-2. Mentions key highlights naturally
-3. Encourages the user to explore
-
-Keep it warm and helpful. Don't list all properties, just mention naturally."""
-
-        response = gemini_client.generate_content(prompt)
+        response = ENHANCE_REPLY.generate(
+            gemini_client,
+            property_count=len(properties),
+            properties_summary="\n".join(properties_summary)
+        )
         
         if response and response.text:
             return response.text.strip()
@@ -0,0 +1,123 @@
+"""
+HTTP caching for property listings
+
+Property responses carry a strong ETag derived from the catalog's content
+version and the normalized query (with the content encoding appended for
+compressed bodies), so a client that already has a listing sends it back
+in If-None-Match and gets 304 Not Modified without the filter running or
+anything being serialized.
+
+The content version is a digest of every record (CatalogDigest, kept
+incrementally with each snapshot) plus the currency rates budgets are
+converted at. Snapshot version numbers are counted per worker and can
+differ between workers holding the same data, so they can't be shared
+with clients; the digest is the same in every worker with the same data.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Optional, Tuple
+from fastapi import Response
+from core.config import settings
+from core.currency import get_rates
+from core.responses import CONTENT_ENCODINGS, encoded_etag
+from services.catalog_store import CatalogIndex, CatalogSnapshot, register_index, get_snapshot
+
+
+def _record_hash(record: Dict) -> int:
+    encoded = json.dumps(record, sort_keys=True, default=str).encode("utf-8")
+    return int.from_bytes(hashlib.sha1(encoded).digest(), "big")
+
+
+@register_index
+class CatalogDigest(CatalogIndex):
+    """
+    Order-independent digest of the catalog's records (XOR of record
+    hashes), updated from the changed records only
+    """
+    name = "digest"
+
+    def __init__(self, value: int, count: int):
+        self.value = value
+        self.count = count
+
+    @classmethod
+    def build(cls, records: Dict[Any, Dict]) -> "CatalogDigest":
+        value = 0
+        for record in records.values():
+            value ^= _record_hash(record)
+        return cls(value, len(records))
+
+    def apply(self, records, upserted, deleted, previous) -> "CatalogDigest":
+        value = self.value
+        for record in list(deleted.values()) + list(previous.values()) + list(upserted.values()):
+            value ^= _record_hash(record)
+        return CatalogDigest(value, len(records))
+
+
+# (snapshot version, content version) of the last snapshot asked about
+_version_memo: Tuple[Optional[int], str] = (None, "")
+
+
+def catalog_version(snapshot: Optional[CatalogSnapshot] = None) -> str:
+    """
+    Content version of a catalog snapshot (the current one by default) and
+    the currency rates its converted prices use
+
+    Rate changes publish a new snapshot (see catalog_store.sync_rates), so
+    the result is computed once per snapshot.
+    """
+    global _version_memo
+    snapshot = snapshot or get_snapshot()
+    memo_version, content_version = _version_memo
+    if memo_version == snapshot.version:
+        return content_version
+    digest = snapshot.index(CatalogDigest.name)
+    rates = json.dumps(get_rates(), sort_keys=True)
+    content_version = f"{digest.count}-{digest.value:040x}-{hashlib.sha1(rates.encode('utf-8')).hexdigest()[:8]}"
+    _version_memo = (snapshot.version, content_version)
+    return content_version
+
+
+def make_etag(version: str, key: str) -> str:
+    """Strong ETag for a response built from a content version and a request key"""
+    return '"' + hashlib.sha1(f"{version}|{key}".encode("utf-8")).hexdigest() + '"'
+
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    The validator in an If-None-Match header value that names a representation
+    of etag - itself or one of its encoded variants (see encoded_etag) - or "*"
+
+    Returns:
+        The ETag the 304 response should carry, or None if nothing matches
+    """
+    if not if_none_match:
+        return None
+    variants = {etag} | {encoded_etag(etag, encoding) for encoding in CONTENT_ENCODINGS}
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        # If-None-Match compares weakly: W/"x" matches "x"
+        candidate = candidate.removeprefix("W/")
+        if candidate in variants:
+            return candidate
+    return None
+
+
+def cache_headers(etag: Optional[str]) -> Dict[str, str]:
+    """ETag and Cache-Control headers for a property listing"""
+    if settings.PROPERTIES_MAX_AGE > 0:
+        cache_control = f"public, max-age={settings.PROPERTIES_MAX_AGE}, must-revalidate"
+    else:
+        # Clients may store the response but revalidate it on every use
+        cache_control = "no-cache"
+    headers = {"Cache-Control": cache_control}
+    if etag:
+        headers["ETag"] = etag
+    return headers
+
+
+def not_modified(etag: str) -> Response:
+    """304 response for a client whose cached copy is current"""
+    return Response(status_code=304, headers=cache_headers(etag))
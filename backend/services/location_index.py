@@ -0,0 +1,180 @@
+"""
+Location lookup and proximity search over the property catalog
+
+LocationIndex parses every property's location into canonical locality,
+city and state once per catalog version (see nlp/locations.py) and keeps a
+posting set per place key, so "Bengaluru", "NYC", "Texas" or "Austin, TX"
+are single dictionary hits instead of a substring scan over the catalog.
+
+Properties with coordinates ("latitude"/"longitude") are also bucketed into
+a grid of GEO_CELL_DEGREES cells; a radius query only visits the cells
+overlapping the circle's bounding box and checks haversine distances for
+the properties in them.
+"""
+import math
+from typing import Any, Dict, Optional, Set, Tuple
+from nlp.locations import canonical_place, parse_location, place_keys
+from services.catalog_store import CatalogIndex, register_index
+
+# Grid cell size for radius queries (about 28km of latitude)
+GEO_CELL_DEGREES = 0.25
+
+# Radius of proximity searches that don't give one
+DEFAULT_RADIUS_KM = 10.0
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def get_coordinates(record: Dict) -> Optional[Tuple[float, float]]:
+    """(latitude, longitude) of a property, or None if it has no valid coordinates"""
+    lat, lon = record.get("latitude"), record.get("longitude")
+    if isinstance(lat, bool) or isinstance(lon, bool) or not isinstance(lat, (int, float)) or not isinstance(lon, (int, float)):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return (float(lat), float(lon))
+
+
+def haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Great-circle distance between two (latitude, longitude) points in km"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+def _cell(point: Tuple[float, float]) -> Tuple[int, int]:
+    return (math.floor(point[0] / GEO_CELL_DEGREES), math.floor(point[1] / GEO_CELL_DEGREES))
+
+
+@register_index
+class LocationIndex(CatalogIndex):
+    """Place-key postings and a coordinate grid"""
+    name = "location"
+
+    def __init__(
+        self,
+        places: Dict[str, Set[Any]],
+        parsed: Dict[Any, Dict],
+        coords: Dict[Any, Tuple[float, float]],
+        grid: Dict[Tuple[int, int], Set[Any]],
+    ):
+        self.places = places
+        self.parsed = parsed
+        self.coords = coords
+        self.grid = grid
+
+    @classmethod
+    def build(cls, records: Dict[Any, Dict]) -> "LocationIndex":
+        index = cls({}, {}, {}, {})
+        for pid, record in records.items():
+            index._add(pid, record, copied=None)
+        return index
+
+    def apply(self, records, upserted, deleted, previous) -> "LocationIndex":
+        # Copy-on-write, as in TextSearchIndex: only the sets that change are copied
+        index = LocationIndex(dict(self.places), dict(self.parsed), dict(self.coords), dict(self.grid))
+        copied: Set = set()
+        for pid, record in list(deleted.items()) + list(previous.items()):
+            index._remove(pid, record, copied)
+        for pid, record in upserted.items():
+            index._add(pid, record, copied)
+        return index
+
+    @staticmethod
+    def _posting(table: Dict, key, copied: Optional[Set]) -> Set:
+        """Get a posting set for writing, copying it first if it's shared"""
+        marker = (id(table), key)
+        posting = table.get(key)
+        if posting is None:
+            posting = table[key] = set()
+            if copied is not None:
+                copied.add(marker)
+        elif copied is not None and marker not in copied:
+            posting = table[key] = set(posting)
+            copied.add(marker)
+        return posting
+
+    def _add(self, pid, record: Dict, copied: Optional[Set]):
+        location = record.get("location", "")
+        for key in place_keys(location):
+            self._posting(self.places, key, copied).add(pid)
+        self.parsed[pid] = parse_location(location)
+        point = get_coordinates(record)
+        if point is not None:
+            self.coords[pid] = point
+            self._posting(self.grid, _cell(point), copied).add(pid)
+
+    def _remove(self, pid, record: Dict, copied: Set):
+        for key in place_keys(record.get("location", "")):
+            posting = self._posting(self.places, key, copied)
+            posting.discard(pid)
+            if not posting:
+                del self.places[key]
+        self.parsed.pop(pid, None)
+        point = self.coords.pop(pid, None)
+        if point is not None:
+            cell = _cell(point)
+            posting = self._posting(self.grid, cell, copied)
+            posting.discard(pid)
+            if not posting:
+                del self.grid[cell]
+
+    def match(self, location: str) -> Set[Any]:
+        """
+        Properties in a place
+
+        Args:
+            location: City, state, locality or "City, ST", in any alias
+                      ("Bengaluru", "NYC", "Texas", "Austin, TX")
+
+        Returns:
+            Set of matching property ids
+        """
+        parts = [canonical_place(part) for part in location.split(",") if part.strip()]
+        if not parts:
+            return set()
+        whole = ", ".join(parts)
+        if whole in self.places:
+            return set(self.places[whole])
+        if len(parts) > 1 and all(part in self.places for part in parts):
+            # Parts that are each known places ("Bandra, Mumbai"): properties in all of them
+            return set.intersection(*(self.places[part] for part in parts))
+        # Not a known place: fall back to partial names ("york"), which only
+        # scans the distinct locations, not the catalog
+        matched: Set[Any] = set()
+        for key, posting in self.places.items():
+            if whole in key:
+                matched |= posting
+        return matched
+
+    def near(self, lat: float, lon: float, radius_km: float) -> Dict[Any, float]:
+        """
+        Properties within a radius of a point
+
+        Returns:
+            Dict of property id -> distance in km (properties without
+            coordinates are never included)
+        """
+        center = (lat, lon)
+        lat_span = radius_km / 111.0
+        # Longitude degrees shrink towards the poles
+        edge = abs(lat) + lat_span
+        lon_span = 180.0 if edge >= 90 else min(180.0, radius_km / (111.0 * math.cos(math.radians(edge))))
+        low_cell, high_cell = _cell((lat - lat_span, lon - lon_span)), _cell((lat + lat_span, lon + lon_span))
+        lon_cells = round(360 / GEO_CELL_DEGREES)
+        offset = lon_cells // 2
+        rows = range(low_cell[0], high_cell[0] + 1)
+        columns = {(j + offset) % lon_cells - offset for j in range(low_cell[1], high_cell[1] + 1)}
+        if len(rows) * len(columns) > len(self.grid):
+            # Large radius: fewer occupied cells than cells in the box
+            cells = [cell for cell in self.grid if cell[0] in rows and cell[1] in columns]
+        else:
+            # Columns wrap around the antimeridian
+            cells = [(i, j) for i in rows for j in columns]
+        distances: Dict[Any, float] = {}
+        for cell in cells:
+            for pid in self.grid.get(cell, ()):
+                distance = haversine_km(center, self.coords[pid])
+                if distance <= radius_km:
+                    distances[pid] = distance
+        return distances
@@ -0,0 +1,314 @@
+"""
+Property storage backends
+
+PropertyRepository is the interface routes and the chat service use to read
+properties. Two backends implement it:
+
+- JsonPropertyRepository: the in-memory catalog loaded from backend/data
+- MongoPropertyRepository: a `properties` collection in MongoDB, so the
+  catalog can outgrow one machine's memory and be shared across instances
+
+The backend is chosen with the PROPERTY_BACKEND setting ("json" or "mongo").
+Seed or refresh the Mongo collection from the JSON data with:
+    python -m services.property_repository sync
+"""
+import asyncio
+import sys
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from pymongo import ASCENDING, GEOSPHERE, TEXT, DeleteMany, ReplaceOne
+from starlette.concurrency import run_in_threadpool
+from core.config import settings
+from services.data_service import (
+    filter_properties, get_catalog, get_price_inr, get_bedroom_count, parse_budget_range
+)
+from services.catalog_store import get_snapshot
+from services.http_cache import catalog_version
+from services.search_index import tokenize, AMENITY_WEIGHT
+from services.location_index import DEFAULT_RADIUS_KM, EARTH_RADIUS_KM, get_coordinates
+from nlp.locations import canonical_place, place_keys
+
+# Fields computed at sync time for server-side filtering, hidden from API responses
+DERIVED_FIELDS = ["price_inr", "location_keys", "geo", "bedroom_count", "amenity_tokens", "position"]
+
+# Documents fetched per round trip when streaming results
+CURSOR_BATCH_SIZE = 200
+
+
+class PropertyRepository:
+    """Interface for reading properties from a storage backend"""
+
+    def find(
+        self,
+        location: Optional[str] = None,
+        budget: Optional[str] = None,
+        bedrooms: Optional[str] = None,
+        limit: Optional[int] = None,
+        query: Optional[str] = None,
+        amenities: Optional[List[str]] = None,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: Optional[float] = None,
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream properties matching the filters (same semantics as filter_properties)
+
+        With a free-text query, results are ordered by relevance.
+        """
+        raise NotImplementedError
+
+    async def get(self, property_id) -> Optional[Dict]:
+        """Get a single property by id"""
+        raise NotImplementedError
+
+    async def search(
+        self,
+        location: Optional[str] = None,
+        budget: Optional[str] = None,
+        bedrooms: Optional[str] = None,
+        limit: Optional[int] = None,
+        query: Optional[str] = None,
+        amenities: Optional[List[str]] = None,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: Optional[float] = None,
+    ) -> List[Dict]:
+        """Collect find() results into a list"""
+        return [
+            p async for p in self.find(
+                location=location, budget=budget, bedrooms=bedrooms, limit=limit,
+                query=query, amenities=amenities, near=near, radius_km=radius_km
+            )
+        ]
+
+    async def list_all(self) -> List[Dict]:
+        """Get every property"""
+        return await self.search()
+
+    def content_version(self) -> Optional[str]:
+        """
+        Version of the data find() reads, for HTTP ETags: equal versions
+        mean identical results for identical queries
+
+        Returns:
+            The version, or None if the backend can't tell cheaply
+        """
+        return None
+
+
+class JsonPropertyRepository(PropertyRepository):
+    """Properties from the in-memory catalog (backend/data JSON files)"""
+
+    async def find(self, location=None, budget=None, bedrooms=None, limit=None, query=None, amenities=None,
+                   near=None, radius_km=None):
+        # The catalog scan is CPU work; keep it off the event loop
+        results = await run_in_threadpool(
+            filter_properties,
+            location=location, budget=budget, bedrooms=bedrooms, query=query, amenities=amenities,
+            near=near, radius_km=radius_km
+        )
+        for prop in results[:limit] if limit else results:
+            yield prop
+
+    async def get(self, property_id) -> Optional[Dict]:
+        return get_snapshot().get(property_id)
+
+    async def list_all(self) -> List[Dict]:
+        return get_catalog()
+
+    def content_version(self) -> Optional[str]:
+        return catalog_version()
+
+
+def to_document(prop: Dict, position: int) -> Dict:
+    """Build the Mongo document for a property, with precomputed filter fields"""
+    bedroom_count = get_bedroom_count(prop)
+    point = get_coordinates(prop)
+    return {
+        **prop,
+        "price_inr": float(get_price_inr(prop)),
+        "location_keys": place_keys(prop.get("location", "")),
+        # GeoJSON points are (longitude, latitude)
+        "geo": {"type": "Point", "coordinates": [point[1], point[0]]} if point else None,
+        "bedroom_count": bedroom_count if isinstance(bedroom_count, int) else None,
+        "amenity_tokens": sorted({
+            token for amenity in prop.get("amenities") or [] if isinstance(amenity, str)
+            for token in tokenize(amenity)
+        }),
+        "position": position,
+    }
+
+
+class MongoPropertyRepository(PropertyRepository):
+    """
+    Properties in a MongoDB collection, filtered server-side
+
+    Location, budget and bedroom predicates are pushed down as an indexed
+    query on precomputed fields instead of scanning in Python. Free-text
+    queries use a Mongo text index over titles and amenities (ranked by
+    textScore), amenity filters match precomputed amenity tokens. Location
+    matches the canonical place keys of nlp/locations.place_keys (city,
+    state, locality, aliases resolved) rather than an arbitrary substring,
+    and radius searches use a 2dsphere index (results keep catalog order
+    instead of nearest first).
+    Responses aren't given ETags (content_version is None): the collection
+    can be re-synced from another process without this one noticing.
+    Admin API changes are written through to the collection (apply_changes);
+    edits to the data files are not - re-run the sync command for those.
+    Semantic (meaning-based) query matching is only available with the JSON
+    backend; here queries match by keyword only.
+    """
+
+    def __init__(self, db, collection_name: str = "properties"):
+        self.collection = db[collection_name]
+
+    async def ensure_indexes(self):
+        """Create the indexes used by find() and get()"""
+        await self.collection.create_index([("id", ASCENDING)], unique=True)
+        await self.collection.create_index([
+            ("location_keys", ASCENDING),
+            ("bedroom_count", ASCENDING),
+            ("price_inr", ASCENDING),
+        ])
+        await self.collection.create_index([("bedroom_count", ASCENDING), ("price_inr", ASCENDING)])
+        await self.collection.create_index([("price_inr", ASCENDING)])
+        await self.collection.create_index([("amenity_tokens", ASCENDING)])
+        await self.collection.create_index([("geo", GEOSPHERE)], sparse=True)
+        await self.collection.create_index(
+            [("title", TEXT), ("amenities", TEXT)],
+            weights={"title": 1, "amenities": AMENITY_WEIGHT},
+            default_language="none",
+        )
+
+    @staticmethod
+    def build_query(location=None, budget=None, bedrooms=None, query=None, amenities=None,
+                    near=None, radius_km=None) -> Dict:
+        """Translate filter_properties arguments into a Mongo query"""
+        mongo_query: Dict = {}
+        if location:
+            parts = [canonical_place(part) for part in location.split(",") if part.strip()]
+            # Every part is a key of a matching location ("austin, tx" -> "austin" and "tx")
+            mongo_query["location_keys"] = parts[0] if len(parts) == 1 else {"$all": parts}
+        if near:
+            radians = (radius_km or DEFAULT_RADIUS_KM) / EARTH_RADIUS_KM
+            mongo_query["geo"] = {"$geoWithin": {"$centerSphere": [[near[1], near[0]], radians]}}
+        if budget:
+            min_budget, max_budget = parse_budget_range(budget)
+            price_range = {"$gte": min_budget}
+            if max_budget != float("inf"):
+                price_range["$lt"] = max_budget
+            mongo_query["price_inr"] = price_range
+        if bedrooms:
+            bedrooms = str(bedrooms).strip()
+            # Non-numeric bedroom values never match, as in filter_properties
+            mongo_query["bedroom_count"] = int(bedrooms) if bedrooms.isdigit() else bedrooms
+        if amenities:
+            tokens = sorted({token for amenity in amenities for token in tokenize(amenity)})
+            if tokens:
+                mongo_query["amenity_tokens"] = {"$all": tokens}
+        if query:
+            mongo_query["$text"] = {"$search": query}
+        return mongo_query
+
+    async def find(self, location=None, budget=None, bedrooms=None, limit=None, query=None, amenities=None,
+                   near=None, radius_km=None):
+        projection = {"_id": 0, **{field: 0 for field in DERIVED_FIELDS}}
+        sort = [("position", ASCENDING)]
+        if query:
+            projection = {"_id": 0, "score": {"$meta": "textScore"}}
+            sort = [("score", {"$meta": "textScore"})] + sort
+        cursor = (
+            self.collection.find(self.build_query(location, budget, bedrooms, query, amenities, near, radius_km), projection)
+            .sort(sort)
+            .batch_size(CURSOR_BATCH_SIZE)
+        )
+        if limit:
+            cursor = cursor.limit(limit)
+        async for doc in cursor:
+            if query:
+                # Text score projections can't be combined with exclusions
+                for field in DERIVED_FIELDS + ["score"]:
+                    doc.pop(field, None)
+            yield doc
+
+    async def get(self, property_id) -> Optional[Dict]:
+        projection = {"_id": 0, **{field: 0 for field in DERIVED_FIELDS}}
+        ids = [property_id]
+        if isinstance(property_id, str) and property_id.isdigit():
+            ids.append(int(property_id))
+        return await self.collection.find_one({"id": {"$in": ids}}, projection)
+
+    async def sync_from(self, properties: List[Dict]) -> Dict:
+        """
+        Make the collection match a list of properties
+
+        Upserts every property by id and removes documents that are no longer
+        in the list.
+        """
+        operations = [
+            ReplaceOne({"id": prop["id"]}, to_document(prop, position), upsert=True)
+            for position, prop in enumerate(properties)
+        ]
+        operations.append(DeleteMany({"id": {"$nin": [prop["id"] for prop in properties]}}))
+        result = await self.collection.bulk_write(operations, ordered=False)
+        await self.ensure_indexes()
+        return {
+            "upserted": result.upserted_count,
+            "modified": result.modified_count,
+            "deleted": result.deleted_count,
+        }
+
+    async def apply_changes(self, upserts: List[Tuple[Dict, int]], deletes: List) -> Dict:
+        """
+        Write catalog changes made through the admin API to the collection
+
+        Args:
+            upserts: (record, catalog position) of each inserted or updated property
+            deletes: Ids of removed properties
+        """
+        operations = [
+            ReplaceOne({"id": prop["id"]}, to_document(prop, position), upsert=True)
+            for prop, position in upserts
+        ]
+        for property_id in deletes:
+            ids = {property_id, str(property_id)}
+            if isinstance(property_id, str) and property_id.isdigit():
+                ids.add(int(property_id))
+            operations.append(DeleteMany({"id": {"$in": list(ids)}}))
+        if not operations:
+            return {"upserted": 0, "modified": 0, "deleted": 0}
+        result = await self.collection.bulk_write(operations, ordered=False)
+        return {
+            "upserted": result.upserted_count,
+            "modified": result.modified_count,
+            "deleted": result.deleted_count,
+        }
+
+
+_repository: Optional[PropertyRepository] = None
+
+
+def get_property_repository() -> PropertyRepository:
+    """Return the repository for the configured PROPERTY_BACKEND"""
+    global _repository
+    if _repository is None:
+        backend = settings.PROPERTY_BACKEND.lower()
+        if backend == "mongo":
+            from core.db import db
+            _repository = MongoPropertyRepository(db)
+        elif backend == "json":
+            _repository = JsonPropertyRepository()
+        else:
+            raise ValueError(f"Unknown PROPERTY_BACKEND '{settings.PROPERTY_BACKEND}' (expected 'json' or 'mongo')")
+    return _repository
+
+
+async def _sync_json_to_mongo():
+    from core.db import db
+    repository = MongoPropertyRepository(db)
+    result = await repository.sync_from(get_catalog())
+    print(f"✅ Synced {len(get_catalog())} properties to MongoDB: {result}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["sync"]:
+        print("Usage: python -m services.property_repository sync")
+        sys.exit(1)
+    asyncio.run(_sync_json_to_mongo())
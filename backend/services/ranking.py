@@ -0,0 +1,301 @@
+"""
+Preference-based ranking of search results
+
+handle_chat used to show the first results in file order. rank_properties
+scores each candidate against what the user asked for - budget, amenities,
+must-haves, deal breakers and style - using precomputed per-property features
+(FeatureIndex, maintained with the catalog snapshot) and vectorized NumPy
+math, then returns the top k through a heap instead of sorting every
+candidate.
+"""
+import heapq
+import itertools
+import math
+from typing import Any, Dict, Iterable, List, Optional, Set
+import numpy as np
+from services.catalog_store import CatalogIndex, register_index, get_snapshot, normalize_id
+from services.data_service import get_price_inr, get_bedroom_count, parse_budget_range
+from services.search_index import tokenize
+from services.semantic_index import SemanticIndex
+
+# Relative weight of each ranking signal
+RANKING_WEIGHTS = {
+    "price_fit": 1.0,
+    "amenities": 2.0,
+    "deal_breakers": 3.0,
+    "size": 0.5,
+    "style": 1.0,
+    "semantic": 2.0,
+}
+
+
+def _amenity_terms(record: Dict) -> Set[str]:
+    amenities = record.get("amenities") or []
+    if not isinstance(amenities, list):
+        return set()
+    return {t for a in amenities if isinstance(a, str) for t in tokenize(a)}
+
+
+def _size_per_bedroom(record: Dict) -> float:
+    size = record.get("size_sqft")
+    if not isinstance(size, (int, float)) or isinstance(size, bool) or size <= 0:
+        return np.nan
+    bedrooms = get_bedroom_count(record)
+    return size / (bedrooms if isinstance(bedrooms, int) and bedrooms > 0 else 1)
+
+
+def _byte_width(vocab_size: int) -> int:
+    """Bytes per row of a bit matrix over a vocabulary"""
+    return max(1, (vocab_size + 7) // 8)
+
+
+def _set_bits(bits, rows: np.ndarray, columns: np.ndarray):
+    """Set bit (row, column) of a packed bit matrix for each pair, in place"""
+    if len(columns):
+        np.bitwise_or.at(bits, (rows, columns >> 3), (0x80 >> (columns & 7)).astype(np.uint8))
+
+
+@register_index
+class FeatureIndex(CatalogIndex):
+    """
+    Columnar ranking features, one row per property
+
+    Amenity and title words are stored as packed bit matrices over a shared
+    vocabulary, so "how many wanted terms does each candidate have" is a
+    handful of vectorized bit tests.
+    """
+    name = "features"
+    price_dependent = True
+
+    def __init__(self, ids: List[Any], price_inr, size_per_bedroom, vocab: Dict[str, int], amenity_bits, title_bits):
+        self.ids = ids
+        self.row_of = {pid: row for row, pid in enumerate(ids)}
+        self.price_inr = price_inr
+        self.size_per_bedroom = size_per_bedroom
+        self.vocab = vocab
+        self.amenity_bits = amenity_bits
+        self.title_bits = title_bits
+
+    @classmethod
+    def build(cls, records: Dict[Any, Dict]) -> "FeatureIndex":
+        ids = list(records)
+        count = len(ids)
+        price_inr = np.zeros(count, dtype=np.float64)
+        size_per_bedroom = np.full(count, np.nan, dtype=np.float64)
+        vocab: Dict[str, int] = {}
+        amenity_rows, title_rows = [], []
+
+        for row, pid in enumerate(ids):
+            record = records[pid]
+            price_inr[row] = get_price_inr(record)
+            size_per_bedroom[row] = _size_per_bedroom(record)
+            amenity_rows.append([vocab.setdefault(t, len(vocab)) for t in _amenity_terms(record)])
+            title_rows.append([vocab.setdefault(t, len(vocab)) for t in tokenize(record.get("title", ""))])
+
+        return cls(
+            ids, price_inr, size_per_bedroom, vocab,
+            cls._pack(amenity_rows, len(vocab)), cls._pack(title_rows, len(vocab)),
+        )
+
+    @staticmethod
+    def _pack(rows: List[List[int]], vocab_size: int):
+        """Bit matrix with each row's columns set, built from the set bits only"""
+        bits = np.zeros((len(rows), _byte_width(vocab_size)), dtype=np.uint8)
+        lengths = [len(columns) for columns in rows]
+        columns = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.intp, count=sum(lengths))
+        _set_bits(bits, np.repeat(np.arange(len(rows)), lengths), columns)
+        return bits
+
+    def apply(self, records, upserted, deleted, previous) -> "FeatureIndex":
+        # The arrays are copied (older snapshots keep using theirs), but
+        # features are only computed for the changed records: deleted rows
+        # are dropped, new properties appended and updated ones patched, and
+        # the bit matrices widen when new words appear
+        vocab = self.vocab
+        changed = {}
+        for pid, record in upserted.items():
+            amenity_terms = _amenity_terms(record)
+            title_terms = tokenize(record.get("title", ""))
+            for term in itertools.chain(amenity_terms, title_terms):
+                if term not in vocab:
+                    if vocab is self.vocab:
+                        vocab = dict(vocab)
+                    vocab[term] = len(vocab)
+            changed[pid] = (
+                record,
+                np.array([vocab[t] for t in amenity_terms], dtype=np.intp),
+                np.array([vocab[t] for t in title_terms], dtype=np.intp),
+            )
+
+        ids = self.ids
+        keep = slice(None)
+        if deleted:
+            keep = np.ones(len(ids), dtype=bool)
+            for pid in deleted:
+                row = self.row_of.get(pid)
+                if row is not None:
+                    keep[row] = False
+            ids = [pid for pid, kept in zip(ids, keep) if kept]
+        added = [pid for pid in upserted if pid not in self.row_of]
+        width = _byte_width(len(vocab))
+
+        def resized(array, fill):
+            # Fancy indexing and np.pad both return new arrays
+            array = array[keep] if deleted else array.copy()
+            if array.ndim == 2 and array.shape[1] < width:
+                array = np.pad(array, ((0, 0), (0, width - array.shape[1])))
+            if added:
+                shape = (len(added),) + array.shape[1:]
+                array = np.concatenate([array, np.full(shape, fill, dtype=array.dtype)])
+            return array
+
+        patched = FeatureIndex(
+            ids + added,
+            resized(self.price_inr, 0),
+            resized(self.size_per_bedroom, np.nan),
+            vocab,
+            resized(self.amenity_bits, 0),
+            resized(self.title_bits, 0),
+        )
+        for pid, (record, amenity_columns, title_columns) in changed.items():
+            row = patched.row_of[pid]
+            patched.price_inr[row] = get_price_inr(record)
+            patched.size_per_bedroom[row] = _size_per_bedroom(record)
+            for bits, columns in ((patched.amenity_bits, amenity_columns), (patched.title_bits, title_columns)):
+                bits[row] = 0
+                _set_bits(bits, np.full(len(columns), row, dtype=np.intp), columns)
+        return patched
+
+    def term_counts(self, rows, terms: Iterable[str], bits) -> np.ndarray:
+        """Count how many of `terms` each of `rows` has set in a bit matrix"""
+        counts = np.zeros(len(rows), dtype=np.float64)
+        for term in terms:
+            column = self.vocab.get(term)
+            if column is None:
+                continue
+            counts += (bits[rows, column >> 3] >> (7 - (column & 7))) & 1
+        return counts
+
+
+def _preference_terms(values) -> Set[str]:
+    if isinstance(values, str):
+        values = [values]
+    if not isinstance(values, list):
+        return set()
+    return {t for v in values if isinstance(v, str) for t in tokenize(v)}
+
+
+def score_properties(
+    features: FeatureIndex,
+    rows: np.ndarray,
+    budget: Optional[str] = None,
+    wanted_terms: Set[str] = frozenset(),
+    avoid_terms: Set[str] = frozenset(),
+    style_terms: Set[str] = frozenset(),
+) -> np.ndarray:
+    """Score feature rows against the user's preferences (higher is better)"""
+    weights = RANKING_WEIGHTS
+    scores = np.zeros(len(rows), dtype=np.float64)
+
+    # Price fit: 1 at the middle of the budget band, 0 at its edges,
+    # negative outside it
+    if budget:
+        min_budget, max_budget = parse_budget_range(budget)
+        prices = features.price_inr[rows]
+        if math.isinf(max_budget):
+            # Open-ended band ("2Cr+"): closest to the lower bound fits best
+            fit = 1 - np.abs(prices - min_budget) / max(min_budget, 1)
+        else:
+            center = (min_budget + max_budget) / 2
+            half_width = max((max_budget - min_budget) / 2, 1)
+            fit = 1 - np.abs(prices - center) / half_width
+        scores += weights["price_fit"] * np.clip(fit, -1, 1)
+
+    if wanted_terms:
+        overlap = features.term_counts(rows, wanted_terms, features.amenity_bits)
+        overlap += features.term_counts(rows, wanted_terms, features.title_bits)
+        scores += weights["amenities"] * np.minimum(overlap, len(wanted_terms)) / len(wanted_terms)
+
+    if avoid_terms:
+        hits = features.term_counts(rows, avoid_terms, features.amenity_bits)
+        hits += features.term_counts(rows, avoid_terms, features.title_bits)
+        scores -= weights["deal_breakers"] * np.minimum(hits, 1)
+
+    # Roomier homes (more sqft per bedroom) rank a little higher
+    sizes = features.size_per_bedroom[rows]
+    known = ~np.isnan(sizes)
+    if known.any():
+        low, high = sizes[known].min(), sizes[known].max()
+        if high > low:
+            scores[known] += weights["size"] * (sizes[known] - low) / (high - low)
+
+    if style_terms:
+        style = features.term_counts(rows, style_terms, features.title_bits)
+        scores += weights["style"] * np.minimum(style, len(style_terms)) / len(style_terms)
+
+    return scores
+
+
+def _catalog_rows(index, index_type, ids: List[Any], properties: List[Dict]):
+    """
+    Rows of the candidates in a catalog index, or a temporary index over just
+    the candidates when some of them aren't in the catalog
+    """
+    if index is None or any(pid not in index.row_of for pid in ids):
+        return index_type.build({i: p for i, p in enumerate(properties)}), np.arange(len(properties))
+    return index, np.fromiter((index.row_of[pid] for pid in ids), dtype=np.intp, count=len(ids))
+
+
+def rank_properties(
+    properties: List[Dict],
+    k: int,
+    budget: Optional[str] = None,
+    amenities: Optional[List[str]] = None,
+    property_type: Optional[str] = None,
+    preferences: Optional[Dict] = None,
+    query: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Return the k best properties for the user's preferences
+
+    Args:
+        properties: Candidates (e.g. filter_properties results)
+        k: Number of properties to return
+        budget: Budget range the user asked for
+        amenities: Amenities extracted from the message
+        property_type: Property type extracted from the message
+        preferences: extract_preferences_with_llm output (style, must_haves,
+                     nice_to_haves, deal_breakers)
+        query: The user's message, matched by meaning (SemanticIndex)
+
+    Returns:
+        Up to k properties, best first. Ties keep the input order.
+    """
+    if not properties:
+        return []
+    preferences = preferences or {}
+    wanted = (
+        _preference_terms(amenities)
+        | _preference_terms(preferences.get("must_haves"))
+        | _preference_terms(preferences.get("nice_to_haves"))
+    )
+    avoid = _preference_terms(preferences.get("deal_breakers")) - wanted
+    style = _preference_terms(preferences.get("style")) | _preference_terms(property_type)
+
+    if not (budget or wanted or avoid or style or query) or len(properties) == 1:
+        # Nothing to rank on - keep the repository order
+        return list(properties[:k])
+
+    # Use the precomputed features when the candidates come from the
+    # in-memory catalog, otherwise compute them for just these candidates
+    snapshot = get_snapshot()
+    ids = [normalize_id(p.get("id")) for p in properties]
+    features, rows = _catalog_rows(snapshot.index(FeatureIndex.name), FeatureIndex, ids, properties)
+
+    scores = score_properties(features, rows, budget, wanted, avoid, style)
+    if query:
+        semantic, semantic_rows = _catalog_rows(snapshot.index(SemanticIndex.name), SemanticIndex, ids, properties)
+        scores += RANKING_WEIGHTS["semantic"] * semantic.similarities([query], semantic_rows)[0]
+    # Negative position breaks ties in favour of the earlier candidate
+    top = heapq.nlargest(k, range(len(properties)), key=lambda i: (scores[i], -i))
+    return [properties[i] for i in top]
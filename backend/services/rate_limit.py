@@ -0,0 +1,178 @@
+"""
+Rate limiting and admission control
+
+Two checks run before a request reaches its route (see the middleware in
+main.py):
+
+- Per-client token buckets, one budget per kind of endpoint: chat (each
+  message can cost Gemini calls), auth (login/register hash passwords with
+  bcrypt) and search. A client is the subject of a valid JWT bearer token,
+  otherwise the client IP (from X-Forwarded-For when the request came
+  through a TRUSTED_PROXIES proxy). Over-budget requests get 429 with
+  Retry-After.
+- Global admission control for chat: when too many Gemini calls are in
+  flight, or too many LLM stages and threadpool jobs are waiting for a
+  thread, new chat messages get 503 instead of queueing behind them, so
+  latency for admitted requests stays stable under overload.
+
+Buckets are kept per worker, so with N workers a client can get up to N
+times its budget.
+"""
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import anyio.to_thread
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from jose import JWTError, jwt
+from core.config import settings
+from core.llm_usage import in_flight_calls
+from services.chat_service import stage_queue_depth
+
+# Path prefixes of each rate limit budget
+BUDGET_PATHS = {
+    "chat": ("/chat",),
+    "auth": ("/auth/login", "/auth/register"),
+    "search": ("/properties",),
+}
+
+# Budgets subject to admission control
+ADMISSION_BUDGETS = ("chat",)
+
+
+class TokenBucketLimiter:
+    """Token bucket per client: `rate` tokens per second, holding up to `burst`"""
+
+    def __init__(self, rate: float, burst: int, max_clients: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_clients = max_clients
+        # Client -> (tokens, last refill time), least recently seen first
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def acquire(self, client: str) -> Optional[float]:
+        """
+        Take a token for a client
+
+        Returns:
+            None if the request may proceed, otherwise seconds until a token is available
+        """
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[client] = (tokens, now)
+        self._buckets.move_to_end(client)
+        # Forgetting a client only gives it a full bucket back
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return None if allowed else (1 - tokens) / self.rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def _limiter(per_minute: float, burst: int) -> Optional[TokenBucketLimiter]:
+    if per_minute <= 0:
+        return None
+    return TokenBucketLimiter(per_minute / 60, burst, settings.RATE_LIMIT_CLIENTS)
+
+
+limiters: Dict[str, Optional[TokenBucketLimiter]] = {
+    "chat": _limiter(settings.CHAT_RATE_PER_MINUTE, settings.CHAT_RATE_BURST),
+    "auth": _limiter(settings.AUTH_RATE_PER_MINUTE, settings.AUTH_RATE_BURST),
+    "search": _limiter(settings.SEARCH_RATE_PER_MINUTE, settings.SEARCH_RATE_BURST),
+}
+
+stats = {"limited": {budget: 0 for budget in BUDGET_PATHS}, "shed": 0}
+
+
+def budget_for(path: str) -> Optional[str]:
+    """Rate limit budget of a request path, or None if it isn't limited"""
+    for budget, prefixes in BUDGET_PATHS.items():
+        if any(path == prefix or path.startswith(prefix + "/") for prefix in prefixes):
+            return budget
+    return None
+
+
+def client_key(request: Request) -> str:
+    """
+    The JWT subject of a valid bearer token, otherwise the client IP
+
+    request.client is already the forwarded client when the server trusts
+    the connecting proxy (see core/server.py).
+    """
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            subject = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]).get("sub")
+            if subject:
+                return f"user:{subject}"
+        except JWTError:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+# The event loop's threadpool limiter, captured by the first check_request
+# (it can only be looked up from the event loop thread)
+_thread_limiter = None
+
+
+def queued_jobs() -> int:
+    """LLM stages plus threadpool jobs waiting for a thread"""
+    waiting = _thread_limiter.statistics().tasks_waiting if _thread_limiter is not None else 0
+    return stage_queue_depth() + waiting
+
+
+def is_overloaded() -> bool:
+    """Whether in-flight Gemini calls or queued jobs are past their thresholds"""
+    if settings.MAX_LLM_IN_FLIGHT > 0 and in_flight_calls() >= settings.MAX_LLM_IN_FLIGHT:
+        return True
+    return settings.MAX_QUEUED_JOBS > 0 and queued_jobs() >= settings.MAX_QUEUED_JOBS
+
+
+def check_request(request: Request) -> Optional[JSONResponse]:
+    """
+    Apply admission control and the request's rate limit budget
+
+    Returns:
+        A 503 or 429 response if the request must be rejected, otherwise None
+    """
+    global _thread_limiter
+    if _thread_limiter is None:
+        _thread_limiter = anyio.to_thread.current_default_thread_limiter()
+    budget = budget_for(request.url.path)
+    if budget is None or request.method == "OPTIONS":
+        return None
+    # Shed before charging the client: a 503 shouldn't use up its budget
+    if budget in ADMISSION_BUDGETS and is_overloaded():
+        stats["shed"] += 1
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "The server is busy, please try again shortly"},
+            headers={"Retry-After": "1"},
+        )
+    limiter = limiters.get(budget)
+    retry_after = limiter.acquire(client_key(request)) if limiter is not None else None
+    if retry_after is not None:
+        stats["limited"][budget] += 1
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Too many requests, please slow down"},
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+    return None
+
+
+def get_admission_stats() -> Dict:
+    """Rejection counts, tracked clients and current load, for /admin/metrics"""
+    return {
+        **stats,
+        "clients": {budget: len(limiter) for budget, limiter in limiters.items() if limiter is not None},
+        "llm_in_flight": in_flight_calls(),
+        "queued_jobs": queued_jobs(),
+    }
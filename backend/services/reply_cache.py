@@ -0,0 +1,106 @@
+"""
+Cache of Gemini-generated chat replies
+
+A search reply depends mostly on the intent, the filters and which
+properties were shown, so replies are cached under those (see reply_key)
+and repeat searches skip the LLM. Each key keeps a small pool of variants;
+until the pool is full a lookup only sometimes returns a cached reply, so
+the pool fills with different wordings and replies don't feel canned.
+Entries expire after a jittered TTL. They are stored in the configured
+cache backend (core/cache.py), so with CACHE_BACKEND=redis every instance
+reuses every other instance's replies.
+"""
+import hashlib
+import json
+import random
+import time
+from typing import Dict, List, Optional
+from core.cache import CacheBackend, create_cache
+from core.config import settings
+from services.single_flight import normalize_message
+
+# TTL is randomized by up to this fraction so entries don't all expire at once
+TTL_JITTER = 0.1
+
+
+class ReplyCache:
+    """Reply variants per key with per-entry TTL, stored in a CacheBackend"""
+
+    def __init__(self, backend: CacheBackend, ttl: float, variants: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.variants = max(1, variants)
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Return a cached reply for key, or None if the caller should generate one
+
+        With fewer variants than the pool size, a cached reply is returned
+        with probability (variants cached / pool size).
+        """
+        entry = self.backend.get(key)
+        if entry is None or random.random() >= len(entry["replies"]) / self.variants:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return random.choice(entry["replies"])
+
+    def put(self, key: str, reply: str):
+        """Add a reply variant for key"""
+        if not reply:
+            return
+        now = time.time()
+        entry = self.backend.get(key)
+        if entry is None or entry["expires_at"] <= now:
+            ttl = self.ttl * random.uniform(1 - TTL_JITTER, 1 + TTL_JITTER)
+            entry = {"replies": [], "expires_at": now + ttl}
+        # Copied: the memory backend hands out the stored entry itself
+        replies = list(entry["replies"])
+        if reply not in replies:
+            if len(replies) >= self.variants:
+                replies.pop(0)
+            replies.append(reply)
+        # Adding a variant doesn't extend the entry's life
+        self.backend.set(key, {"replies": replies, "expires_at": entry["expires_at"]}, ttl=entry["expires_at"] - now)
+
+    def clear(self):
+        self.backend.clear()
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
+
+def reply_key(
+    intent: Optional[str],
+    filters: Optional[Dict],
+    properties: List[Dict],
+    is_property_search: bool,
+    message: Optional[str] = None,
+) -> str:
+    """
+    Cache key for a reply
+
+    Search replies are keyed on intent, filters and a fingerprint of the
+    properties passed to Gemini - their full records, not just their ids, so
+    a reply quoting a property's price or details is not reused after an
+    admin change to it (with either property backend). Other replies answer
+    the message itself, so they are keyed on the normalized message too.
+    """
+    filters = {k: v for k, v in (filters or {}).items() if v not in (None, "", [])}
+    shown = json.dumps(properties, sort_keys=True, default=str)
+    parts = [
+        intent or "",
+        filters,
+        hashlib.sha1(shown.encode("utf-8")).hexdigest()[:16],
+        is_property_search,
+        "" if is_property_search else normalize_message(message),
+    ]
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+reply_cache = ReplyCache(
+    backend=create_cache("replies", max_entries=settings.REPLY_CACHE_SIZE),
+    ttl=settings.REPLY_CACHE_TTL,
+    variants=settings.REPLY_CACHE_VARIANTS,
+)
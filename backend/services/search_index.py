@@ -0,0 +1,197 @@
+"""
+Full-text and amenity search over the property catalog
+
+TextSearchIndex is an inverted index over tokenized titles and amenity lists,
+maintained with every catalog snapshot (see services/catalog_store). Free-text
+queries are scored with BM25; amenity filters are set intersections on the
+amenity postings. Neither scans the catalog, so cost grows with the number of
+matching properties rather than the catalog size.
+"""
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set
+from services.catalog_store import CatalogIndex, register_index
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Amenity terms count more than title terms when scoring
+AMENITY_WEIGHT = 2
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "the", "in", "of", "with", "for", "to", "at", "near",
+    "on", "or", "by", "i", "want", "need", "looking", "some", "have", "has",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics, drop stopwords and fold plurals"""
+    tokens = []
+    for token in _TOKEN_RE.findall((text or "").lower()):
+        if token in STOPWORDS:
+            continue
+        # Crude plural folding: "pools" -> "pool", "terraces" -> "terrace"
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _document_terms(record: Dict) -> Dict[str, int]:
+    """Weighted term frequencies of a property's title and amenities"""
+    terms: Dict[str, int] = {}
+    for token in tokenize(record.get("title", "")):
+        terms[token] = terms.get(token, 0) + 1
+    for token in _amenity_tokens(record):
+        terms[token] = terms.get(token, 0) + AMENITY_WEIGHT
+    return terms
+
+
+def _amenity_tokens(record: Dict) -> Set[str]:
+    amenities = record.get("amenities") or []
+    if not isinstance(amenities, list):
+        return set()
+    tokens = set()
+    for amenity in amenities:
+        if isinstance(amenity, str):
+            tokens.update(tokenize(amenity))
+    return tokens
+
+
+@register_index
+class TextSearchIndex(CatalogIndex):
+    """Inverted index with BM25 scoring over titles and amenities"""
+    name = "text"
+
+    def __init__(
+        self,
+        postings: Dict[str, Dict[Any, int]],
+        amenity_postings: Dict[str, Set[Any]],
+        doc_lengths: Dict[Any, int],
+        total_length: int,
+    ):
+        self.postings = postings
+        self.amenity_postings = amenity_postings
+        self.doc_lengths = doc_lengths
+        self.total_length = total_length
+
+    @classmethod
+    def build(cls, records: Dict[Any, Dict]) -> "TextSearchIndex":
+        index = cls({}, {}, {}, 0)
+        for pid, record in records.items():
+            index._add(pid, record, copied=None)
+        return index
+
+    def apply(self, records, upserted, deleted, previous) -> "TextSearchIndex":
+        # Copy-on-write: the outer maps are copied shallowly and only the
+        # posting lists that change are copied, so older snapshots keep a
+        # consistent index
+        index = TextSearchIndex(
+            dict(self.postings), dict(self.amenity_postings), dict(self.doc_lengths), self.total_length
+        )
+        copied: Set = set()
+        for pid, record in list(deleted.items()) + list(previous.items()):
+            index._remove(pid, record, copied)
+        for pid, record in upserted.items():
+            index._add(pid, record, copied)
+        return index
+
+    def _posting(self, table: Dict, term: str, copied: Optional[Set], factory):
+        """Get a posting list for writing, copying it first if it's shared"""
+        key = (id(table), term)
+        posting = table.get(term)
+        if posting is None:
+            posting = factory()
+            table[term] = posting
+            if copied is not None:
+                copied.add(key)
+        elif copied is not None and key not in copied:
+            posting = factory(posting)
+            table[term] = posting
+            copied.add(key)
+        return posting
+
+    def _add(self, pid, record: Dict, copied: Optional[Set]):
+        terms = _document_terms(record)
+        for term, frequency in terms.items():
+            self._posting(self.postings, term, copied, dict)[pid] = frequency
+        for term in _amenity_tokens(record):
+            self._posting(self.amenity_postings, term, copied, set).add(pid)
+        length = sum(terms.values())
+        self.doc_lengths[pid] = length
+        self.total_length += length
+
+    def _remove(self, pid, record: Dict, copied: Set):
+        for term in _document_terms(record):
+            posting = self._posting(self.postings, term, copied, dict)
+            posting.pop(pid, None)
+            if not posting:
+                del self.postings[term]
+        for term in _amenity_tokens(record):
+            posting = self._posting(self.amenity_postings, term, copied, set)
+            posting.discard(pid)
+            if not posting:
+                del self.amenity_postings[term]
+        self.total_length -= self.doc_lengths.pop(pid, 0)
+
+    def score(self, query: str) -> Dict[Any, float]:
+        """
+        BM25 scores for every property matching at least one query term
+
+        Returns:
+            Dict of property id -> score (unmatched properties are absent)
+        """
+        doc_count = len(self.doc_lengths)
+        if not doc_count:
+            return {}
+        average_length = self.total_length / doc_count
+        scores: Dict[Any, float] = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for pid, frequency in posting.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[pid] / average_length)
+                scores[pid] = scores.get(pid, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return scores
+
+    def max_score(self, query: str) -> float:
+        """
+        Upper bound of score() for a query: a property containing every query
+        term (terms no property has count with the highest idf)
+        """
+        doc_count = len(self.doc_lengths)
+        total = 0.0
+        for term in set(tokenize(query)):
+            matches = len(self.postings.get(term, ()))
+            total += math.log(1 + (doc_count - matches + 0.5) / (matches + 0.5)) * (BM25_K1 + 1)
+        return total
+
+    def match_amenities(self, amenities: Iterable[str]) -> Set[Any]:
+        """
+        Ids of properties that have every requested amenity
+
+        An amenity matches when all of its words appear in the property's
+        amenity list, so "pool" matches "Swimming Pool".
+        """
+        result: Optional[Set[Any]] = None
+        for amenity in amenities:
+            for term in tokenize(amenity):
+                posting = self.amenity_postings.get(term, set())
+                result = set(posting) if result is None else result & posting
+                if not result:
+                    return set()
+        return result if result is not None else set(self.doc_lengths)
+
+
+def parse_amenities(amenities) -> List[str]:
+    """Accept amenities as a list or a comma-separated string"""
+    if not amenities:
+        return []
+    if isinstance(amenities, str):
+        amenities = amenities.split(",")
+    return [a.strip() for a in amenities if isinstance(a, str) and a.strip()]
@@ -0,0 +1,216 @@
+"""
+Offline semantic search over the property catalog
+
+Keyword search only finds properties that share words with the query, so
+"quiet family home near water" misses a "Lakefront House with Dock".
+SemanticIndex embeds each property's title, location and amenities into a
+fixed-size vector with a hashing vectorizer - words, character trigrams (so
+"lake" is close to "lakefront") and a small table of related-word concepts
+("water" ~ lake, sea, beach, dock) - and keeps the vectors as one NumPy
+matrix. Queries are answered with a single matrix product (cosine
+similarity), weighted by inverse document frequency. Everything runs
+locally; there is no model download or network call.
+"""
+import itertools
+import math
+import zlib
+from typing import Any, Dict, List, Optional
+import numpy as np
+from services.catalog_store import CatalogIndex, register_index
+from services.search_index import tokenize
+
+# Width of the hashed embedding
+EMBEDDING_DIM = 1024
+
+# Weight of character trigram features relative to whole words
+TRIGRAM_WEIGHT = 0.3
+
+# Fraction of masked (deleted or replaced) rows at which the matrix is compacted
+COMPACT_FRACTION = 0.25
+
+# Similarity below which a property is not considered a semantic match
+MIN_SIMILARITY = 0.12
+
+# Related words grouped under a concept. A property or query mentioning any
+# of the words (or the concept itself) gets the concept as an extra feature.
+CONCEPTS = {
+    "water": ["lake", "lakefront", "sea", "beach", "ocean", "waterfront", "river", "dock", "marina", "bay"],
+    "quiet": ["peaceful", "calm", "garden", "backyard", "villa", "suburban", "private", "cozy"],
+    "family": ["bhk", "garden", "backyard", "park", "playground", "school", "townhouse", "duplex", "house"],
+    "luxury": ["luxurious", "premium", "penthouse", "villa", "upscale", "jacuzzi", "concierge"],
+    "budget": ["affordable", "cheap", "economical", "studio", "compact"],
+    "modern": ["contemporary", "smart", "minimalist", "new", "renovated"],
+    "view": ["skyline", "sea", "ocean", "panoramic", "terrace", "balcony", "penthouse"],
+    "fitness": ["gym", "pool", "swimming", "sport", "court", "jogging"],
+    "work": ["office", "study", "coworking", "wifi", "internet"],
+    "city": ["downtown", "central", "urban", "metro", "skyline"],
+    "green": ["garden", "park", "lawn", "backyard", "tree", "nature"],
+}
+
+_CONCEPTS_OF: Dict[str, List[str]] = {}
+for _concept, _words in CONCEPTS.items():
+    for _word in [_concept] + _words:
+        _CONCEPTS_OF.setdefault(_word, []).append(_concept)
+
+
+def _bucket(feature: str):
+    """Hash a feature to a (column, sign) pair; stable across processes"""
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % EMBEDDING_DIM, (1.0 if h & 0x80000000 else -1.0)
+
+
+def _features(text: str) -> Dict[str, float]:
+    """Weighted features of a text: words, concepts and character trigrams"""
+    features: Dict[str, float] = {}
+    for token in tokenize(text):
+        features["w:" + token] = features.get("w:" + token, 0.0) + 1.0
+        for concept in _CONCEPTS_OF.get(token, ()):
+            features["c:" + concept] = features.get("c:" + concept, 0.0) + 1.0
+        if len(token) >= 4 and not token.isdigit():
+            padded = f"#{token}#"
+            for i in range(len(padded) - 2):
+                gram = "t:" + padded[i:i + 3]
+                features[gram] = features.get(gram, 0.0) + TRIGRAM_WEIGHT
+    return features
+
+
+def embed(text: str) -> np.ndarray:
+    """Hashed, sublinear-TF, L2-normalised embedding of a text"""
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for feature, weight in _features(text).items():
+        column, sign = _bucket(feature)
+        vector[column] += sign * (1 + math.log(weight)) if weight >= 1 else sign * weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def property_text(record: Dict) -> str:
+    """The text a property is embedded from"""
+    amenities = record.get("amenities") or []
+    if not isinstance(amenities, list):
+        amenities = []
+    parts = [record.get("title", ""), record.get("location", "")]
+    parts.extend(a for a in amenities if isinstance(a, str))
+    return " ".join(p for p in parts if isinstance(p, str))
+
+
+class _VectorStore:
+    """
+    Append-only embedding rows shared by successive SemanticIndex versions
+
+    Rows are never overwritten, so an older index keeps reading the rows it
+    knows about while a newer one appends. Growing reallocates (doubling);
+    indexes holding the old array keep it.
+    """
+
+    def __init__(self, vectors: np.ndarray):
+        self.matrix = vectors
+        self.used = len(vectors)
+
+    def append(self, vectors: np.ndarray) -> np.ndarray:
+        """Add rows and return the matrix of every row so far"""
+        needed = self.used + len(vectors)
+        if needed > len(self.matrix):
+            grown = np.zeros((max(needed, 2 * len(self.matrix)), EMBEDDING_DIM), dtype=np.float32)
+            grown[:self.used] = self.matrix[:self.used]
+            self.matrix = grown
+        self.matrix[self.used:needed] = vectors
+        self.used = needed
+        return self.matrix[:needed]
+
+
+@register_index
+class SemanticIndex(CatalogIndex):
+    """
+    Property embeddings as a matrix, one row per property
+
+    Changes only embed the changed records: an updated property gets a new
+    row and its old row, like a deleted property's, is masked out (`live`).
+    Masked rows are dropped by copying the live rows once they make up
+    COMPACT_FRACTION of the matrix.
+    """
+    name = "semantic"
+
+    def __init__(self, ids: List[Any], vectors: np.ndarray, document_frequency: np.ndarray,
+                 live: Optional[np.ndarray] = None, store: Optional[_VectorStore] = None):
+        # Property id of each row (None for masked rows)
+        self.ids = ids
+        self.row_of = {pid: row for row, pid in enumerate(ids) if pid is not None}
+        self.vectors = vectors
+        self.live = np.ones(len(ids), dtype=bool) if live is None else live
+        self._store = store or _VectorStore(vectors)
+        # Number of properties with a non-zero weight in each column
+        self.document_frequency = document_frequency
+
+    @classmethod
+    def build(cls, records: Dict[Any, Dict]) -> "SemanticIndex":
+        ids = list(records)
+        vectors = np.zeros((len(ids), EMBEDDING_DIM), dtype=np.float32)
+        for row, pid in enumerate(ids):
+            vectors[row] = embed(property_text(records[pid]))
+        return cls(ids, vectors, np.count_nonzero(vectors, axis=0))
+
+    def apply(self, records, upserted, deleted, previous) -> "SemanticIndex":
+        ids = list(self.ids)
+        live = self.live.copy()
+        document_frequency = self.document_frequency.copy()
+        for pid in itertools.chain(deleted, upserted):
+            row = self.row_of.get(pid)
+            if row is not None:
+                ids[row] = None
+                live[row] = False
+                document_frequency -= self.vectors[row] != 0
+
+        vectors, store = self.vectors, self._store
+        if upserted:
+            if store.used != len(vectors):
+                # Another index already appended to the store after this one
+                store = _VectorStore(vectors.copy())
+            added = np.stack([embed(property_text(record)) for record in upserted.values()])
+            document_frequency += np.count_nonzero(added, axis=0)
+            ids.extend(upserted)
+            live = np.concatenate([live, np.ones(len(added), dtype=bool)])
+            vectors = store.append(added)
+
+        masked = len(ids) - int(live.sum())
+        if masked and masked >= COMPACT_FRACTION * len(ids):
+            # Copies the live rows; nothing is embedded again
+            kept = np.flatnonzero(live)
+            return SemanticIndex([ids[row] for row in kept], vectors[kept], document_frequency)
+        return SemanticIndex(ids, vectors, document_frequency, live, store)
+
+    def _idf(self) -> np.ndarray:
+        return np.log(1 + (len(self.row_of) + 1) / (self.document_frequency + 1)).astype(np.float32)
+
+    def similarities(self, queries: List[str], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Cosine similarity of each query to each property, in one batch
+
+        Args:
+            queries: Query texts
+            rows: Restrict to these matrix rows (default: every row, including
+                  masked ones - see `live`)
+
+        Returns:
+            Array of shape (len(queries), number of rows)
+        """
+        idf = self._idf()
+        query_vectors = np.stack([embed(q) for q in queries]) * idf
+        norms = np.linalg.norm(query_vectors, axis=1, keepdims=True)
+        query_vectors /= np.where(norms > 0, norms, 1)
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        return query_vectors @ vectors.T
+
+    def score(self, query: str, min_similarity: float = MIN_SIMILARITY) -> Dict[Any, float]:
+        """
+        Similarity of every property matching the query semantically
+
+        Returns:
+            Dict of property id -> similarity (properties below
+            min_similarity are absent)
+        """
+        if not self.row_of:
+            return {}
+        similarity = self.similarities([query])[0]
+        matches = np.flatnonzero((similarity >= min_similarity) & self.live)
+        return {self.ids[row]: float(similarity[row]) for row in matches}
@@ -0,0 +1,95 @@
+"""
+Request coalescing (single-flight)
+
+When the same chat message or property search arrives many times at once,
+only the first request runs the work (NLP extraction, filtering, Gemini);
+identical requests that arrive while it is in flight await the same result
+instead of repeating it. Nothing is cached - once the shared call finishes
+the next request runs it again.
+
+The shared call's Gemini usage is accounted on its own and split evenly
+between the requests that awaited it (see core/llm_usage.py), so coalesced
+requests don't show as free while the first one pays for all of them.
+"""
+import asyncio
+import json
+import re
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from core.llm_usage import RequestUsage, current_usage, use_request
+
+
+class _Flight:
+    """An in-flight call, its LLM usage and how many requests await it"""
+
+    def __init__(self):
+        self.usage = RequestUsage()
+        self.callers = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers with the same key"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Flight] = {}
+        self.stats = {"calls": 0, "shared": 0}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func() for key, or await the call already in flight for it
+
+        The shared call runs as its own task, so one caller disconnecting
+        (and being cancelled) doesn't cancel it for the others. Each caller
+        that gets the result is charged an equal share of its LLM usage.
+        Joining stops when the task finishes (its done callbacks may run a
+        little later), so the number of shares is fixed by then and a later
+        caller starts a new flight instead.
+        """
+        flight = self._calls.get(key)
+        if flight is None or flight.task.done():
+            self.stats["calls"] += 1
+            flight = _Flight()
+
+            async def run():
+                # The task has its own copy of the context: calls made by it
+                # are accounted to the flight, not to the first caller
+                use_request(flight.usage)
+                return await func()
+
+            flight.task = asyncio.ensure_future(run())
+            self._calls[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.stats["shared"] += 1
+        flight.callers += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            usage = current_usage()
+            # Callers can't join once the task is done, so the count is final
+            if usage is not None and flight.task.done():
+                usage.merge(flight.usage, share=1 / flight.callers)
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        # A caller may already have started the next flight for this key
+        if self._calls.get(key) is flight:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+def normalize_message(message: Optional[str]) -> str:
+    """Lowercase and collapse whitespace so trivially different messages match"""
+    return re.sub(r"\s+", " ", (message or "").lower()).strip()
+
+
+def request_key(message: Optional[str] = None, filters: Optional[Dict] = None) -> str:
+    """Coalescing key for a message plus filters (None and empty values ignored)"""
+    filters = {k: v for k, v in (filters or {}).items() if v not in (None, "", [])}
+    return json.dumps([normalize_message(message), filters], sort_keys=True, default=str)
+
+
+chat_flight = SingleFlight("chat")
+search_flight = SingleFlight("search")
@@ -7,12 +7,36 @@ echo ""
 
 # Use PORT environment variable from Render, default to 8000
 PORT="${PORT:-8000}"
+export PORT
 
-echo "✅ Starting server on 0.0.0.0:$PORT"
+# Number of worker processes (defaults to 1 to match small instances)
+WEB_CONCURRENCY="${WEB_CONCURRENCY:-1}"
+export WEB_CONCURRENCY
+
+# Proxies whose X-Forwarded-For names the client (same default as
+# TRUSTED_PROXIES in core/config.py: cloud load balancers connect from
+# private addresses), so rate limits key on the real client IP
+TRUSTED_PROXIES="${TRUSTED_PROXIES:-127.0.0.1,::1,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16}"
+export TRUSTED_PROXIES
+
+# Train the local intent model from the bundled examples
+python -m nlp.train_intent_model || echo "⚠️  Intent model training failed, the server will train it at startup"
+echo ""
+
+echo "✅ Starting server on 0.0.0.0:$PORT with $WEB_CONCURRENCY worker(s)"
 echo "📚 API Docs will be available at /docs"
 echo ""
 
-# Start the server (production mode)
-# --host 0.0.0.0 binds to all network interfaces (required for Render)
-# --port uses the PORT environment variable from Render
-uvicorn main:app --host 0.0.0.0 --port $PORT
+if [ "$WEB_CONCURRENCY" -gt 1 ]; then
+    # Multi-worker mode: gunicorn master preloads the app and the property
+    # catalog, then forks uvicorn workers (see gunicorn.conf.py)
+    exec gunicorn main:app -c gunicorn.conf.py
+else
+    # Single process mode
+    # --host 0.0.0.0 binds to all network interfaces (required for Render)
+    # --port uses the PORT environment variable from Render
+    exec uvicorn main:app --host 0.0.0.0 --port $PORT \
+        --loop uvloop --http httptools \
+        --timeout-keep-alive "${KEEP_ALIVE:-5}" \
+        --proxy-headers --forwarded-allow-ips "$TRUSTED_PROXIES"
+fi
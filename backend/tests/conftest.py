@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Tests import the backend's modules (core, services, ...) from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings require a Mongo URI; the cache tests never connect to it
+os.environ.setdefault("MONGO_URI", "mongodb://127.0.0.1:1")
@@ -0,0 +1,100 @@
+"""
+Stand-in Redis server for tests
+
+Speaks enough of the Redis protocol (RESP) for core/cache.py: GET, SET with
+PX, DEL, SCAN with MATCH, AUTH, SELECT and PING, with key expiry. It runs
+in a background thread on a free local port, so the cache tests need no
+Redis install. Set `stalled` to make it read commands without replying.
+"""
+import fnmatch
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "RespServer"
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line.startswith(b"*"):
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            if self.server.stalled:
+                continue
+            self.wfile.write(self.server.execute(args))
+
+
+def _bulk(value: Optional[bytes]) -> bytes:
+    return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    """In-memory Redis stand-in on 127.0.0.1"""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.lock = threading.Lock()
+        self.stalled = False
+        self.connections = 0
+
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+    def start(self) -> "RespServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def _live(self, key: bytes) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, args: List[bytes]) -> bytes:
+        command = args[0].upper()
+        with self.lock:
+            if command == b"GET":
+                return _bulk(self._live(args[1]))
+            if command == b"SET":
+                expires_at = None
+                if len(args) >= 5 and args[3].upper() == b"PX":
+                    expires_at = time.monotonic() + int(args[4]) / 1000
+                self.data[args[1]] = (args[2], expires_at)
+                return b"+OK\r\n"
+            if command == b"DEL":
+                return b":%d\r\n" % sum(self.data.pop(key, None) is not None for key in args[1:])
+            if command == b"SCAN":
+                pattern = args[args.index(b"MATCH") + 1].decode("utf-8") if b"MATCH" in args else "*"
+                keys = [k for k in list(self.data) if self._live(k) is not None and fnmatch.fnmatchcase(k.decode("utf-8"), pattern)]
+                return b"*2\r\n" + _bulk(b"0") + b"*%d\r\n" % len(keys) + b"".join(_bulk(k) for k in keys)
+            if command in (b"AUTH", b"SELECT", b"PING"):
+                return b"+OK\r\n"
+            return b"-ERR unknown command '%s'\r\n" % command
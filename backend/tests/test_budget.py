@@ -0,0 +1,96 @@
+import math
+import pytest
+from nlp.budget import budget_bucket, normalize_budget, parse_budget
+from nlp.extractor import extract_bedrooms, extract_budget
+
+INF = math.inf
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Bedroom counts are not amounts ("3 bedroom" is not 3 billion)
+    ("3 bedroom in mumbai", None),
+    ("2-3 bhk in pune", None),
+    ("4 bhk villa", None),
+    ("flat with 2 bathrooms", None),
+    # Ranges
+    ("between 50 lakh and 1 crore", "50L-1Cr"),
+    ("between 20L and 80L", "20L-80L"),
+    ("20-80 lakh", "20L-80L"),
+    ("50L-1Cr", "50L-1Cr"),
+    ("$200k-$500k", "$200k-$500k"),
+    # Bounds
+    ("under 50 lakh", "0-50L"),
+    ("2 bhk under 1 crore", "0-1Cr"),
+    ("above 2 crore", "2Cr+"),
+    ("3cr+", "3Cr+"),
+    # Single amounts snap to their bucket
+    ("1.5 crore", "1Cr-2Cr"),
+    ("budget 1cr", "1Cr-2Cr"),
+    ("50 lakhs", "50L-1Cr"),
+    ("49.99 lakh", "0-50L"),
+])
+def test_extract_budget(text, expected):
+    assert extract_budget(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("3 bedroom in mumbai", "3"),
+    ("2 bhk under 1 crore", "2"),
+    ("between 50 lakh and 1 crore", None),
+])
+def test_extract_bedrooms_next_to_budgets(text, expected):
+    assert extract_bedrooms(text) == expected
+
+
+@pytest.mark.parametrize("budget, expected", [
+    (None, (0, INF)),
+    ("", (0, INF)),
+    ("no amount here", (0, INF)),
+    # Bucket labels
+    ("0-50L", (0, 5000000)),
+    ("50L-1Cr", (5000000, 10000000)),
+    ("1Cr-2Cr", (10000000, 20000000)),
+    ("2Cr+", (20000000, INF)),
+    # Single amounts on and around the bucket edges (buckets are half-open)
+    ("4999999", (0, 5000000)),
+    ("5000000", (5000000, 10000000)),
+    ("50L", (5000000, 10000000)),
+    ("9999999", (5000000, 10000000)),
+    ("10000000", (10000000, 20000000)),
+    ("1 crore", (10000000, 20000000)),
+    ("2 crore", (20000000, INF)),
+    # Ranges and bounds are kept as given
+    ("20-80 lakh", (2000000, 8000000)),
+    ("1cr-50l", (5000000, 10000000)),
+    ("under 50L", (0, 5000000)),
+    ("above 2 crore", (20000000, INF)),
+])
+def test_parse_budget(budget, expected):
+    assert parse_budget(budget) == expected
+
+
+@pytest.mark.parametrize("price, bucket", [
+    (0, 0),
+    (4999999, 0),
+    (5000000, 1),
+    (9999999, 1),
+    (10000000, 2),
+    (19999999, 2),
+    (20000000, 3),
+    (10 ** 9, 3),
+])
+def test_budget_bucket_edges(price, bucket):
+    assert budget_bucket(price) == bucket
+
+
+@pytest.mark.parametrize("budget, expected", [
+    (None, None),
+    ("abc", None),
+    ("5000000", "50L-1Cr"),
+    ("10000000", "1Cr-2Cr"),
+    ("under 50L", "0-50L"),
+    ("20-80 lakh", "20L-80L"),
+    ("above 3 crore", "3Cr+"),
+])
+def test_normalize_budget(budget, expected):
+    assert normalize_budget(budget) == expected
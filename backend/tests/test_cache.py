@@ -0,0 +1,147 @@
+import asyncio
+import socket
+import threading
+import time
+import pytest
+from core import cache as cache_module
+from core.cache import MemoryCache, RedisCache, run_cache_op
+from tests.resp_server import RespServer
+
+
+@pytest.fixture
+def server():
+    server = RespServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def redis_cache(server):
+    return RedisCache(server.url, "test", timeout=0.5)
+
+
+def _closed_port() -> int:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats["evictions"] == 1
+
+
+def test_memory_cache_expires_entries():
+    cache = MemoryCache(max_entries=10, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=10)
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+
+def test_redis_get_set_delete(redis_cache):
+    assert redis_cache.get("missing") is None
+    redis_cache.set("a", {"ids": [1, "2"], "price": 1.5})
+    assert redis_cache.get("a") == {"ids": [1, "2"], "price": 1.5}
+    redis_cache.delete("a")
+    assert redis_cache.get("a") is None
+    assert redis_cache.stats["errors"] == 0
+
+
+def test_redis_ttl(server):
+    cache = RedisCache(server.url, "test", ttl=0.05, timeout=0.5)
+    cache.set("default", 1)
+    cache.set("longer", 2, ttl=10)
+    time.sleep(0.1)
+    assert cache.get("default") is None
+    assert cache.get("longer") == 2
+
+
+def test_redis_clear_keeps_other_namespaces(server, redis_cache):
+    other = RedisCache(server.url, "other", timeout=0.5)
+    redis_cache.set("a", 1)
+    redis_cache.set("b", 2)
+    other.set("a", 3)
+    assert len(redis_cache) == 2
+    redis_cache.clear()
+    assert redis_cache.get("a") is None and redis_cache.get("b") is None
+    assert len(redis_cache) == 0
+    assert other.get("a") == 3
+
+
+def test_redis_len_is_counted_periodically(redis_cache, monkeypatch):
+    redis_cache.set("a", 1)
+    assert len(redis_cache) == 1
+    redis_cache.set("b", 2)
+    assert len(redis_cache) == 1
+    monkeypatch.setattr(cache_module, "SIZE_REFRESH_SECONDS", 0)
+    assert len(redis_cache) == 2
+
+
+def test_redis_reuses_pooled_connections(server, redis_cache):
+    for i in range(20):
+        redis_cache.set(str(i), i)
+    assert server.connections == 1
+
+    def worker(n: int):
+        for i in range(20):
+            assert redis_cache.get(str(i)) == i
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert server.connections <= 4
+    assert len(redis_cache._idle) <= redis_cache.pool_size
+
+
+def test_unreachable_redis_is_a_miss():
+    cache = RedisCache(f"redis://127.0.0.1:{_closed_port()}/0", "test", timeout=0.5)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    cache.delete("a")
+    cache.clear()
+    assert len(cache) == 0
+    # Skipped after the first error instead of reconnecting on every call
+    assert cache.stats["errors"] == 1
+
+
+def test_stalled_redis_times_out_and_recovers(server, monkeypatch):
+    cache = RedisCache(server.url, "test", timeout=0.05)
+    cache.set("a", 1)
+    server.stalled = True
+    started = time.monotonic()
+    assert cache.get("a") is None
+    assert time.monotonic() - started < 1
+    assert cache.stats["errors"] == 1
+
+    server.stalled = False
+    monkeypatch.setattr(cache_module, "REDIS_RETRY_SECONDS", 0)
+    cache._down_until = 0
+    assert cache.get("a") == 1
+
+
+def test_run_cache_op_runs_redis_calls_off_the_event_loop(redis_cache):
+    memory = MemoryCache(max_entries=10)
+
+    async def main():
+        loop_thread = threading.get_ident()
+        memory_thread = await run_cache_op(memory, threading.get_ident)
+        redis_thread = await run_cache_op(redis_cache, threading.get_ident)
+        await run_cache_op(redis_cache, redis_cache.set, "a", 1)
+        return loop_thread, memory_thread, redis_thread, await run_cache_op(redis_cache, redis_cache.get, "a")
+
+    loop_thread, memory_thread, redis_thread, value = asyncio.run(main())
+    assert memory_thread == loop_thread
+    assert redis_thread != loop_thread
+    assert value == 1
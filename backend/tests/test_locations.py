@@ -0,0 +1,63 @@
+import pytest
+from nlp.extractor import extract_location
+from nlp.locations import canonical_location, find_alias, parse_location, place_keys
+
+
+@pytest.mark.parametrize("location, expected", [
+    (None, (None, None, None)),
+    ("", (None, None, None)),
+    ("Mumbai", (None, "mumbai", "maharashtra")),
+    ("Bombay", (None, "mumbai", "maharashtra")),
+    ("Bandra, Mumbai", ("bandra", "mumbai", "maharashtra")),
+    ("Whitefield, Bengaluru", ("whitefield", "bangalore", "karnataka")),
+    ("Koramangala, Bangalore, Karnataka", ("koramangala", "bangalore", "karnataka")),
+    ("Gurugram, Haryana", (None, "gurgaon", "haryana")),
+    ("Austin, TX", (None, "austin", "tx")),
+    ("New York, NY", (None, "new york", "ny")),
+    # Full state names become their abbreviation
+    ("Miami, Florida", (None, "miami", "fl")),
+])
+def test_parse_location(location, expected):
+    parsed = parse_location(location)
+    assert (parsed["locality"], parsed["city"], parsed["state"]) == expected
+
+
+@pytest.mark.parametrize("location, expected", [
+    ("Austin, Texas", "austin, tx"),
+    ("  New   Delhi ", "delhi"),
+    ("Whitefield,  Bengaluru", "whitefield, bangalore"),
+])
+def test_canonical_location(location, expected):
+    assert canonical_location(location) == expected
+
+
+@pytest.mark.parametrize("location, expected", [
+    (None, []),
+    ("New York, NY", ["new york, ny", "new york", "ny"]),
+    ("Bandra, Mumbai", ["bandra, mumbai", "mumbai, maharashtra", "bandra", "mumbai", "maharashtra"]),
+    ("Miami, Florida", ["miami, fl", "miami", "fl"]),
+])
+def test_place_keys(location, expected):
+    assert place_keys(location) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("flat in bombay", "mumbai"),
+    ("homes in nyc", "new york"),
+    ("in bengaluru please", "bangalore"),
+    ("new delhi 2bhk", "delhi"),
+    ("house in sf", "san francisco"),
+    ("3 bhk", None),
+])
+def test_find_alias(text, expected):
+    assert find_alias(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("flat in bombay", "Mumbai"),
+    ("homes in nyc", "New York"),
+    ("2 bhk in Bengaluru", "Bangalore"),
+    ("3 bhk under 1 crore", None),
+])
+def test_extract_location(text, expected):
+    assert extract_location(text) == expected
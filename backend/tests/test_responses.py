@@ -0,0 +1,32 @@
+import pytest
+from core.responses import choose_encoding, encoded_etag
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("GZIP", "gzip"),
+    ("gzip, deflate, br", "br"),
+    ("gzip, deflate, br;q=0.9", "gzip"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("*", "br"),
+    ("*;q=0", None),
+    ("gzip;q=0, *", "br"),
+    ("br;q=0, *", "gzip"),
+    ("br;q=0, gzip;q=0, *", None),
+    ("br;q=0, *;q=0.3", "gzip"),
+    ("gzip;q=invalid", None),
+])
+def test_choose_encoding(accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+
+@pytest.mark.parametrize("etag, encoding, expected", [
+    ('"abc"', None, '"abc"'),
+    ('"abc"', "gzip", '"abc-gzip"'),
+    ('W/"abc"', "br", 'W/"abc-br"'),
+])
+def test_encoded_etag(etag, encoding, expected):
+    assert encoded_etag(etag, encoding) == expected
@@ -0,0 +1,52 @@
+import numpy as np
+from services.semantic_index import SemanticIndex
+
+QUERIES = ["quiet home near water", "gym and pool", "sea view penthouse"]
+
+
+def _record(pid, title, amenities=()):
+    return {"id": pid, "title": title, "location": "Mumbai", "amenities": list(amenities)}
+
+
+def _assert_same(index, records):
+    rebuilt = SemanticIndex.build(records)
+    assert set(index.row_of) == set(records)
+    assert (index.document_frequency == rebuilt.document_frequency).all()
+    for query in QUERIES:
+        expected = rebuilt.score(query, min_similarity=0)
+        actual = index.score(query, min_similarity=0)
+        assert actual.keys() == expected.keys()
+        assert all(abs(actual[pid] - expected[pid]) < 1e-5 for pid in expected)
+    ids = list(records)
+    rows = np.array([index.row_of[pid] for pid in ids])
+    expected_rows = np.array([rebuilt.row_of[pid] for pid in ids])
+    assert np.allclose(index.similarities(QUERIES, rows), rebuilt.similarities(QUERIES, expected_rows), atol=1e-5)
+
+
+def test_apply_matches_a_rebuild_and_keeps_older_versions():
+    words = ["lakefront", "modern", "cozy", "studio", "luxury", "compact", "renovated", "private"]
+    records = {pid: _record(pid, f"{word} villa", ["garden"]) for pid, word in enumerate(words)}
+    first = SemanticIndex.build(records)
+    original = dict(records)
+
+    updated = dict(records)
+    updated[1] = _record(1, "Penthouse with sea view", ["pool", "gym"])
+    updated[9] = _record(9, "Family house near the park")
+    deleted = {2: updated.pop(2)}
+    second = first.apply(updated, {1: updated[1], 9: updated[9]}, deleted, {1: records[1]})
+
+    _assert_same(second, updated)
+    # The older index still answers for its own version
+    _assert_same(first, original)
+    # Replaced and deleted rows are masked (2 of 10 rows, under COMPACT_FRACTION)
+    assert len(second.ids) == len(first.ids) + 2
+    assert not second.live[first.row_of[1]] and not second.live[first.row_of[2]]
+
+
+def test_apply_compacts_masked_rows():
+    records = {pid: _record(pid, f"home {pid}") for pid in range(8)}
+    index = SemanticIndex.build(records)
+    deleted = {pid: records.pop(pid) for pid in range(4)}
+    index = index.apply(records, {}, deleted, {})
+    assert len(index.ids) == len(records) and index.live.all()
+    _assert_same(index, records)
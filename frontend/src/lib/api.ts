@@ -33,11 +33,18 @@ api.interceptors.response.use(
   }
 );
 
-export const sendMessage = (data: { 
+// Chat session handed out by the backend; sent back so later messages are
+// ranked with the preferences it learned from earlier ones
+let chatSessionId: string | undefined;
+
+export const sendMessage = async (data: { 
   message?: string; 
   filters?: { location?: string; budget?: string; bedrooms?: string } 
-}) => 
-  api.post('/chat/message', data);
+}) => {
+  const response = await api.post('/chat/message', { ...data, session_id: chatSessionId });
+  chatSessionId = response.data?.session_id || chatSessionId;
+  return response;
+};
 
 export const getProperties = (params: { location?: string; budget?: string; bedrooms?: string }) => 
   api.get('/properties', { params });